@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+from typing import Callable, Optional, TextIO
+
+# Set before pygame is imported, so that the editor draws to a display with no window and pygame's
+# greeting is not mixed into results written to standard output
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from constants import *
+
+# The editor shares file formats with the game in the parent directory, so that must be importable
+# before the modules which use them
+if PROJECT_DIRECTORY not in sys.path:
+    sys.path.append(PROJECT_DIRECTORY)
+
+from boxes import ArtBox, CharacterBox, Boxes, layer_cache
+from glyphs import glyph_cache
+from history import EditHistory
+from interfacebuttons import LoadButton
+from layout import EditorLayout
+from tools import DragStroke, ShapeDrag, flood_fill_spans, paste_region
+
+"""
+Measures the editor's rendering cost without a window, e.g. in a container, to check that an
+optimisation helps and that nothing has got slower.
+
+For each canvas size, an art box, a character box and the frame counter are laid out as in the
+editor and a scripted sequence of edits is replayed, one edit per frame: clicks, drags, shapes,
+fills, copying and pasting, undoing, panning, zooming and loading. Each frame is drawn as the main
+loop draws it, timing draw_box_features and the whole frame, and the timings are written as JSON.
+"""
+
+DEFAULT_CANVAS_SIZES = ((10, 30), (40, 120), (200, 600), (1000, 3000))
+# Drawn into the character box, which the clicks pick characters from
+PALETTE_CHARACTERS = "#@*+=-.:~%"
+# Drawn into the grid which the load step loads, from which the flood fill then spreads
+LOADED_CHARACTERS = "\x1f\x1f\x1f\x1f/\\|_"
+
+
+class EditorBenchmark:
+
+    """An editor at one canvas size, drawn to the dummy display, which replays SCRIPT a frame at a time."""
+
+    def __init__(self, canvas_height: int, canvas_width: int, display_width: int = DISPLAY_WIDTH,
+                 display_height: int = DISPLAY_HEIGHT, seed: int = 0):
+        self.display = pygame.display.set_mode((display_width, display_height))
+        # Each size starts from empty caches, as the editor does when it starts
+        layer_cache.clear()
+        glyph_cache.clear()
+        self.layout = EditorLayout(display_width, display_height)
+        self.frame_count = self.layout.add_frame_counter()
+        character_box = CharacterBox("character", *self.layout.get_box_margins("character"), 2,
+                                     len(PALETTE_CHARACTERS) // 2, display_width, display_height,
+                                     CHARACTER_BOX_COLOUR)
+        for position, character in enumerate(PALETTE_CHARACTERS):
+            character_box.set_cell(position % character_box.list_width, position // character_box.list_width,
+                                   character)
+        art_box = ArtBox("art", *self.layout.get_box_margins("art"), canvas_height, canvas_width,
+                         display_width, display_height, ART_BOX_COLOUR)
+        self.boxes = Boxes([character_box, art_box])
+        self.history = EditHistory()
+        self.history.attach(self.boxes)
+        self.clock = pygame.time.Clock()
+        self.random = random.Random(seed)
+        self.clipboard = None
+        self.pan_direction = 1
+        # Built up front so that the load step only times replacing the box and drawing it
+        self.loaded_grid = [[self.random.choice(LOADED_CHARACTERS) for _ in range(canvas_width)]
+                            for _ in range(canvas_height)]
+        self.display.fill(BACKGROUND_COLOUR)
+        self.layout.draw_buttons(self.display)
+        self.boxes.draw_box_features(self.display)
+        pygame.display.update()
+
+    @property
+    def art_box(self) -> ArtBox:
+        return self.boxes["art"]
+
+    def get_random_cell(self) -> tuple:
+        # A cell in view, as the mouse can only click cells which are shown
+        art_box = self.art_box
+        return (self.random.randrange(art_box.view_x, art_box.view_x + art_box.view_width),
+                self.random.randrange(art_box.view_y, art_box.view_y + art_box.view_height))
+
+    def get_random_mouse_position(self) -> tuple:
+        return self.art_box.convert_coordinates_to_mouse_position(self.get_random_cell())
+
+    def select_character(self):
+        character_box = self.boxes["character"]
+        cell = (self.random.randrange(character_box.list_width), self.random.randrange(character_box.list_height))
+        self.boxes.check_box_intersect(self.display, character_box.convert_coordinates_to_mouse_position(cell), 1)
+
+    def click(self):
+        for _ in range(4):
+            self.boxes.check_box_intersect(self.display, self.get_random_mouse_position(), 1)
+
+    def erase(self):
+        self.boxes.check_box_intersect(self.display, self.get_random_mouse_position(), 3)
+
+    def drag(self):
+        stroke = DragStroke(self.art_box, 1, self.boxes.get_selected_character(), self.get_random_cell())
+        stroke.move_to(self.get_random_mouse_position())
+
+    def draw_shape(self, tool: str):
+        shape_drag = ShapeDrag(self.art_box, tool, 1, self.boxes.get_selected_character(), self.get_random_cell())
+        return shape_drag.finish(self.get_random_mouse_position())
+
+    def rectangle(self):
+        self.draw_shape("rectangle")
+
+    def ellipse_outline(self):
+        self.draw_shape("ellipse outline")
+
+    def flood_fill(self):
+        x, y = self.get_random_cell()
+        self.art_box.fill_spans(flood_fill_spans(self.art_box, x, y), self.boxes.get_selected_character())
+
+    def copy(self):
+        self.clipboard = self.draw_shape("copy")
+
+    def paste(self):
+        paste_region(self.art_box, self.clipboard, self.get_random_cell())
+
+    def undo(self):
+        self.history.undo()
+
+    def redo(self):
+        self.history.redo()
+
+    def pan(self):
+        # Back and forth, so that large canvases are panned across and small ones stay where they are
+        art_box = self.art_box
+        if not 0 < art_box.view_y + self.pan_direction * art_box.view_height < art_box.list_height:
+            self.pan_direction = -self.pan_direction
+        art_box.pan(self.pan_direction * art_box.view_height // 2, self.pan_direction * art_box.view_width // 2)
+
+    def zoom_in(self):
+        self.art_box.zoom(1)
+
+    def zoom_out(self):
+        self.art_box.zoom(-1)
+
+    def load(self):
+        LoadButton.load_character_lists(self.loaded_grid, None, self.boxes)
+
+    def redraw(self):
+        self.boxes.mark_all_dirty()
+
+    def run_frame(self, step: Callable[["EditorBenchmark"], None]) -> tuple:
+        # As the main loop: the frame's edits, then drawing and updating only what changed
+        frame_start = time.perf_counter()
+        step(self)
+        self.history.commit()
+        draw_start = time.perf_counter()
+        updated_rects = self.boxes.draw_box_features(self.display)
+        draw_time = time.perf_counter() - draw_start
+        if (frames_rect := self.frame_count.draw_frames(self.display, self.clock.get_fps())) is not None:
+            updated_rects.append(frames_rect)
+        pygame.display.update(updated_rects)
+        self.clock.tick()
+        return time.perf_counter() - frame_start, draw_time, len(updated_rects)
+
+
+# Replayed in order; each step is one frame
+SCRIPT = (
+    ("redraw", EditorBenchmark.redraw),
+    ("select character", EditorBenchmark.select_character),
+    ("click", EditorBenchmark.click),
+    ("erase", EditorBenchmark.erase),
+    ("drag", EditorBenchmark.drag),
+    ("rectangle", EditorBenchmark.rectangle),
+    ("ellipse outline", EditorBenchmark.ellipse_outline),
+    ("copy", EditorBenchmark.copy),
+    ("paste", EditorBenchmark.paste),
+    ("undo", EditorBenchmark.undo),
+    ("redo", EditorBenchmark.redo),
+    ("pan", EditorBenchmark.pan),
+    ("zoom in", EditorBenchmark.zoom_in),
+    ("zoom out", EditorBenchmark.zoom_out),
+    ("load", EditorBenchmark.load),
+    ("flood fill", EditorBenchmark.flood_fill),
+)
+
+
+def summarise_times(times: list) -> dict:
+    # In milliseconds
+    ordered = sorted(times)
+    return {
+        "mean": statistics.fmean(ordered) * 1000,
+        "median": statistics.median(ordered) * 1000,
+        "p95": ordered[min(len(ordered) - 1, round(len(ordered) * 0.95))] * 1000,
+        "max": ordered[-1] * 1000,
+    }
+
+
+def benchmark_canvas(canvas_height: int, canvas_width: int, repeat: int, warmup: int,
+                     display_size: tuple = (DISPLAY_WIDTH, DISPLAY_HEIGHT), seed: int = 0) -> dict:
+    editor = EditorBenchmark(canvas_height, canvas_width, *display_size, seed=seed)
+    # The first passes fill the glyph and layer caches, as the first minutes in the editor would
+    for _ in range(warmup):
+        for _, step in SCRIPT:
+            editor.run_frame(step)
+    glyph_cache.reset_statistics()
+    frames = {name: [] for name, _ in SCRIPT}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name, step in SCRIPT:
+            frames[name].append(editor.run_frame(step))
+    total_time = time.perf_counter() - start
+    steps = {}
+    for name, results in frames.items():
+        frame_times, draw_times, updated_rects = zip(*results)
+        steps[name] = {
+            "frame_ms": summarise_times(frame_times),
+            "draw_ms": summarise_times(draw_times),
+            "updated_rects": statistics.fmean(updated_rects),
+        }
+    all_frames = [result for results in frames.values() for result in results]
+    return {
+        "canvas_height": canvas_height,
+        "canvas_width": canvas_width,
+        "frames": len(all_frames),
+        "total_s": total_time,
+        "frame_ms": summarise_times([result[0] for result in all_frames]),
+        "draw_ms": summarise_times([result[1] for result in all_frames]),
+        "glyph_cache_hit_rate": glyph_cache.hit_rate,
+        "steps": steps,
+    }
+
+
+def parse_size(value: str) -> tuple:
+    # Two sizes separated by an x, e.g. "40x120"
+    try:
+        first, second = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected a size such as 40x120")
+    if first < 1 or second < 1:
+        raise argparse.ArgumentTypeError("sizes must be at least 1x1")
+    return first, second
+
+
+def write_report(report: dict, file: TextIO):
+    json.dump(report, file, indent=4)
+    file.write("\n")
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Time the editor's drawing over a matrix of canvas sizes, "
+                                                 "without a window.")
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=DEFAULT_CANVAS_SIZES, metavar="HEIGHTxWIDTH",
+                        help="canvas sizes in cells")
+    parser.add_argument("--display", type=parse_size, default=(DISPLAY_WIDTH, DISPLAY_HEIGHT), metavar="WIDTHxHEIGHT",
+                        help="display size in pixels")
+    parser.add_argument("--repeat", type=int, default=5, help="times the script is timed for each size")
+    parser.add_argument("--warmup", type=int, default=1, help="times the script is run first without timing")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the cells the script edits")
+    parser.add_argument("--output", help="JSON file to write the results to; standard output if omitted")
+    arguments = parser.parse_args(argv)
+
+    pygame.init()
+    display_width, display_height = arguments.display
+    results = []
+    for canvas_height, canvas_width in arguments.sizes:
+        print(f"Benchmarking a {canvas_height}x{canvas_width} canvas...", file=sys.stderr)
+        results.append(benchmark_canvas(canvas_height, canvas_width, arguments.repeat, arguments.warmup,
+                                        (display_width, display_height), arguments.seed))
+    report = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "sdl": ".".join(map(str, pygame.get_sdl_version())),
+        "video_driver": pygame.display.get_driver(),
+        "platform": platform.platform(),
+        "display_width": display_width,
+        "display_height": display_height,
+        "repeat": arguments.repeat,
+        "warmup": arguments.warmup,
+        "seed": arguments.seed,
+        "script": [name for name, _ in SCRIPT],
+        "results": results,
+    }
+    pygame.quit()
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            write_report(report, file)
+    else:
+        write_report(report, sys.stdout)
+    for result in results:
+        print(f"{result['canvas_height']}x{result['canvas_width']}: {result['frame_ms']['mean']:.2f}ms per frame, "
+              f"{result['draw_ms']['mean']:.2f}ms drawing", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
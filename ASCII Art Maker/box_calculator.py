@@ -6,12 +6,16 @@ w = (3.3 - 7 / 5) / 8
 # 13h = 2
 h = 2 / 13
 
+# The number of characters wide which span the same distance as one character tall
+CELL_ASPECT_RATIO = (w + s) / h
+
 
 def get_height_ratio(y: int) -> float:
     x = (w * y + (y - 1) * s) / h
     return int(x + (int(x) != x))
 
 
-height = 25
-print("Character height: {}\nCharacter width: {}".format(h, w))
-print("{} characters tall, {} characters wide".format(height, get_height_ratio(height)))
+if __name__ == "__main__":
+    height = 25
+    print("Character height: {}\nCharacter width: {}".format(h, w))
+    print("{} characters tall, {} characters wide".format(height, get_height_ratio(height)))
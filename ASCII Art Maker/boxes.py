@@ -1,52 +1,104 @@
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
 
 import pygame
 
 from constants import *
+from canvas import ChunkedCanvas, find_runs
+from glyphs import glyph_cache
+from profiler import profiler
 
 
-class _CoordinateGenerator:
+class _CoordinateCursor:
+
+    """
+    A position in the row-major order of a grid's cells, which wraps around at either end.
+    Coordinates are (y, x), or (x, y) if reversed, and are worked out from the position.
+    """
 
     def __init__(self, *, max_y: int, max_x: int, reverse: bool = False):
-        self.coordinates = [(x, y) if reverse else (y, x) for y in range(max_y) for x in range(max_x)]
+        self.max_y = max_y
+        self.max_x = max_x
+        self.reverse = reverse
         self.position = 0
-        self.length = len(self.coordinates)
+        self.length = max_y * max_x
+
+    def get_coordinate(self, position: int) -> tuple:
+        y, x = divmod(position, self.max_x)
+        return (x, y) if self.reverse else (y, x)
+
+    def index(self, coordinate: tuple) -> int:
+        x, y = coordinate if self.reverse else reversed(coordinate)
+        return y * self.max_x + x
+
+    def move_to(self, coordinate: tuple):
+        self.position = self.index(coordinate)
 
     def next(self, return_old: bool = True):
-        if return_old:
-            old_position = self.position
-            self.position = (self.position + 1) % self.length
-            return self.coordinates[old_position]
-        else:
-            self.position = (self.position + 1) % self.length
-            return self.coordinates[self.position]
+        old_position = self.position
+        self.position = (self.position + 1) % self.length
+        return self.get_coordinate(old_position if return_old else self.position)
 
     def previous(self, return_old: bool = True):
-        if return_old:
-            old_position = self.position
-            self.position = (self.position - 1) % self.length
-            return self.coordinates[old_position]
-        else:
-            self.position = (self.position - 1) % self.length
-            return self.coordinates[self.position]
+        old_position = self.position
+        self.position = (self.position - 1) % self.length
+        return self.get_coordinate(old_position if return_old else self.position)
 
 
 def draw_text(screen: pygame.Surface, text: str, position: tuple, size: int = DEFAULT_TEXT_SIZE):
     if not text.isprintable():
         text = ""
-    font = pygame.font.Font(pygame.font.get_default_font(), size)
-    text_surface = font.render(text, True, TEXT_COLOUR)
+    text_surface = glyph_cache.render(text, size, TEXT_COLOUR)
     text_rect = text_surface.get_rect()
     text_rect.center = position
     screen.blit(text_surface, text_rect)
 
 
+class LayerCache:
+
+    """
+    A least recently used cache of box backgrounds, i.e. the cell rectangles and grid lines, keyed by
+    the geometry they were drawn for. Boxes with the same geometry share a background, and going
+    back to a zoom level blits the one already drawn for it. The backgrounds for a window size are
+    discarded once the window is resized away from it.
+    """
+
+    def __init__(self, capacity: int = LAYER_CACHE_SIZE):
+        self.capacity = capacity
+        self.layers = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.layers)
+
+    def get(self, box: "Box") -> pygame.Surface:
+        key = box.get_geometry()
+        if (layer := self.layers.get(key)) is not None:
+            self.layers.move_to_end(key)
+            return layer
+        layer = self.layers[key] = box.draw_layer()
+        if len(self.layers) > self.capacity:
+            self.layers.popitem(last=False)
+        return layer
+
+    def discard_display_size(self, display_width: int, display_height: int):
+        # Every geometry starts with the size of the display it was drawn for
+        for key in [key for key in self.layers if key[:2] == (display_width, display_height)]:
+            del self.layers[key]
+
+    def clear(self):
+        self.layers.clear()
+
+
+layer_cache = LayerCache()
+
+
 class Box:
 
     def __init__(self, name: str, left_side_margin: int, right_side_margin: int, upper_margin: int,
                  lower_margin: int, list_height: int, list_width: int, display_width: int,
                  display_height: int, line_colour: tuple, line_thickness: int = DEFAULT_BOX_LINE_THICKNESS,
-                 character_list: Optional[list] = None):
+                 character_list: Optional[list] = None, view_height: Optional[int] = None,
+                 view_width: Optional[int] = None):
         self.name = name
         self.left_side_margin = left_side_margin
         self.right_side_margin = right_side_margin
@@ -54,20 +106,27 @@ class Box:
         self.lower_margin = lower_margin
         self.list_height = list_height
         self.list_width = list_width
-        self.list_display_width = display_width - left_side_margin - right_side_margin
-        self.list_display_height = display_height - lower_margin - upper_margin
-        self.display_width = display_width
-        self.display_height = display_height
         self.line_color = line_colour
         self.line_thickness = line_thickness
         self.character_list = character_list or [[NO_DATA] * list_width for _ in range(list_height)]
-        self.coordinate_generator = _CoordinateGenerator(max_y=self.list_height, max_x=self.list_width)
-        self.box_top = upper_margin
-        self.box_bottom = display_height - lower_margin
-        self.box_left = left_side_margin
-        self.box_right = display_width - left_side_margin
-        self.cell_width = self.list_display_width / list_width
-        self.cell_height = self.list_display_height / list_height
+        self.coordinate_generator = _CoordinateCursor(max_y=self.list_height, max_x=self.list_width)
+        # The cells shown in the box, which is the whole list unless it is panned or zoomed
+        self.view_y = 0
+        self.view_x = 0
+        self.view_height = view_height or list_height
+        self.view_width = view_width or list_width
+        # Zoom levels scale the view the box starts with
+        self.base_view_height = self.view_height
+        self.base_view_width = self.view_width
+        self.zoom_level = ZOOM_LEVELS.index(1.0)
+        # Cells which have changed since the box was last drawn; a new box is drawn in full
+        self.dirty_cells = set()
+        self.redraw_all = True
+        self.resize(display_width, display_height, upper_margin, lower_margin)
+        # Notified of every change to a cell, see Boxes.add_listener
+        self.listeners = []
+        # Hidden boxes are neither drawn nor clicked on, e.g. while the palette covers the character box
+        self.visible = True
 
     def __getitem__(self, index: int) -> list:
         return self.character_list[index]
@@ -75,48 +134,220 @@ class Box:
     def __len__(self) -> int:
         return self.list_height
 
-    def draw_lines(self, screen: pygame.Surface):
-        for y in range(1, self.list_height + 1):
-            for x in range(self.list_width + 1):
-                start_pos = x * (
-                    self.list_display_width) // self.list_width + self.left_side_margin, self.upper_margin
-                end_pos = x * (
-                    self.list_display_width) // self.list_width + self.left_side_margin, self.display_height - self.lower_margin
-                pygame.draw.line(screen, self.line_color, start_pos, end_pos, self.line_thickness)
-        for y in range(self.list_height + 1):
-            for x in range(1, self.list_width + 1):
-                start_pos = self.left_side_margin, y * self.cell_height + self.upper_margin
-                end_pos = self.display_width - self.right_side_margin, y * self.cell_height + self.upper_margin
-                pygame.draw.line(screen, self.line_color, start_pos, end_pos, self.line_thickness)
+    def resize(self, display_width: int, display_height: int, upper_margin: int, lower_margin: int):
+        # Keeps the characters and view of the box, only changing where it is drawn
+        self.upper_margin = upper_margin
+        self.lower_margin = lower_margin
+        self.display_width = display_width
+        self.display_height = display_height
+        self.list_display_width = display_width - self.left_side_margin - self.right_side_margin
+        self.list_display_height = display_height - lower_margin - upper_margin
+        self.box_top = upper_margin
+        self.box_bottom = display_height - lower_margin
+        self.box_left = self.left_side_margin
+        self.box_right = display_width - self.left_side_margin
+        self.update_cell_size()
+        self.mark_all_dirty()
+
+    def update_cell_size(self):
+        self.cell_width = self.list_display_width / self.view_width
+        self.cell_height = self.list_display_height / self.view_height
+        # Glyphs grow with the zoom level, but not past the height of a cell
+        self.text_size = max(MIN_TEXT_SIZE, min(round(DEFAULT_TEXT_SIZE * ZOOM_LEVELS[self.zoom_level]),
+                                                int(self.cell_height * 0.8)))
+
+    def set_view(self, view_y: int, view_x: int, view_height: int, view_width: int):
+        self.view_height = max(1, min(view_height, self.list_height))
+        self.view_width = max(1, min(view_width, self.list_width))
+        self.view_y = max(0, min(view_y, self.list_height - self.view_height))
+        self.view_x = max(0, min(view_x, self.list_width - self.view_width))
+        self.update_cell_size()
+        self.mark_all_dirty()
+
+    def pan(self, delta_y: int, delta_x: int):
+        self.set_view(self.view_y + delta_y, self.view_x + delta_x, self.view_height, self.view_width)
+
+    def zoom(self, steps: int, centre: Optional[tuple] = None) -> bool:
+        # Positive steps show fewer, larger cells, keeping the centre cell where it is
+        level = max(0, min(self.zoom_level + steps, len(ZOOM_LEVELS) - 1))
+        view_height = max(1, min(round(self.base_view_height / ZOOM_LEVELS[level]), self.list_height))
+        view_width = max(1, min(round(self.base_view_width / ZOOM_LEVELS[level]), self.list_width))
+        if (view_height, view_width) == (self.view_height, self.view_width):
+            # Zooming out of a canvas which is already all in view
+            return False
+        centre_x, centre_y = centre or (self.view_x + self.view_width // 2, self.view_y + self.view_height // 2)
+        view_y = centre_y - (centre_y - self.view_y) * view_height // self.view_height
+        view_x = centre_x - (centre_x - self.view_x) * view_width // self.view_width
+        self.zoom_level = level
+        self.set_view(view_y, view_x, view_height, view_width)
+        return True
+
+    def contains(self, x: int, y: int) -> bool:
+        return 0 <= x < self.list_width and 0 <= y < self.list_height
+
+    def in_view(self, x: int, y: int) -> bool:
+        return self.view_x <= x < self.view_x + self.view_width and self.view_y <= y < self.view_y + self.view_height
+
+    def get_character_list(self) -> list:
+        if isinstance(self.character_list, ChunkedCanvas):
+            return self.character_list.to_list()
+        return self.character_list
+
+    def get_cell(self, x: int, y: int) -> str:
+        return self.character_list[y][x]
+
+    def set_cell(self, x: int, y: int, character: str):
+        if (old_character := self.character_list[y][x]) != character:
+            self.character_list[y][x] = character
+            self.mark_dirty(x, y)
+            for listener in self.listeners:
+                listener.cell_changed(self, x, y, old_character, character)
+
+    def get_span(self, y: int, left: int, right: int) -> list:
+        if isinstance(self.character_list, ChunkedCanvas):
+            return self.character_list.get_span(y, left, right)
+        return self.character_list[y][left:right]
+
+    def get_runs(self, y: int, character: str) -> List[Tuple[int, int]]:
+        if isinstance(self.character_list, ChunkedCanvas):
+            return self.character_list.get_runs(y, character)
+        return find_runs(self.character_list[y], character)
+
+    def set_span(self, y: int, left: int, values: list):
+        # Changes a run of cells in one row at once, notifying listeners once for the run
+        if isinstance(self.character_list, ChunkedCanvas):
+            old_values = self.character_list.replace_span(y, left, values)
+        else:
+            row = self.character_list[y]
+            old_values = row[left:left + len(values)]
+            row[left:left + len(values)] = values
+        self.span_written(y, left, old_values, values)
+
+    def span_written(self, y: int, left: int, old_values: list, values: list):
+        if old_values == values:
+            return
+        if self.view_y <= y < self.view_y + self.view_height:
+            for x in range(max(left, self.view_x), min(left + len(values), self.view_x + self.view_width)):
+                self.dirty_cells.add((x, y))
+        for listener in self.listeners:
+            listener.span_changed(self, y, left, old_values, values)
+
+    def fill_spans(self, spans: Iterable[Tuple[int, int, int]], character: str):
+        # Each span is a row with the column it starts at and the column it ends before
+        for y, left, right in spans:
+            left, right = max(left, 0), min(right, self.list_width)
+            if not (0 <= y < self.list_height and left < right):
+                continue
+            if isinstance(self.character_list, ChunkedCanvas):
+                old_values = self.character_list.fill_span(y, left, right, character)
+            else:
+                row = self.character_list[y]
+                old_values = row[left:right]
+                row[left:right] = [character] * (right - left)
+            self.span_written(y, left, old_values, [character] * (right - left))
+
+    def clear(self):
+        # A row at a time, covering only the chunks which were written to, so that listeners get
+        # one span for each row rather than a change for every cell
+        if isinstance(self.character_list, ChunkedCanvas):
+            spans = list(self.character_list.iter_spans())
+        else:
+            spans = [(y, 0, self.list_width) for y in range(self.list_height)]
+        self.fill_spans(spans, NO_DATA)
+
+    def mark_dirty(self, x: int, y: int):
+        if self.in_view(x, y):
+            self.dirty_cells.add((x, y))
+
+    def mark_all_dirty(self):
+        self.redraw_all = True
+
+    def get_cell_rect(self, x: int, y: int) -> pygame.Rect:
+        top = self.upper_margin + (y - self.view_y) * self.cell_height
+        left = self.left_side_margin + (x - self.view_x) * self.cell_width
+        return pygame.rect.Rect(left, top, self.cell_width, self.cell_height)
+
+    def get_box_rect(self) -> pygame.Rect:
+        # Inflated so that lines and highlights on the edges of the box are included
+        return pygame.rect.Rect(self.left_side_margin, self.upper_margin, self.list_display_width,
+                                self.list_display_height).inflate(self.line_thickness * 4, self.line_thickness * 4)
+
+    def draw_lines(self, screen: pygame.Surface, origin: tuple = (0, 0)):
+        origin_x, origin_y = origin
+        for x in range(self.view_width + 1):
+            line_x = x * self.list_display_width // self.view_width + self.left_side_margin - origin_x
+            start_pos = line_x, self.upper_margin - origin_y
+            end_pos = line_x, self.display_height - self.lower_margin - origin_y
+            pygame.draw.line(screen, self.line_color, start_pos, end_pos, self.line_thickness)
+        for y in range(self.view_height + 1):
+            line_y = y * self.cell_height + self.upper_margin - origin_y
+            start_pos = self.left_side_margin - origin_x, line_y
+            end_pos = self.display_width - self.right_side_margin - origin_x, line_y
+            pygame.draw.line(screen, self.line_color, start_pos, end_pos, self.line_thickness)
+
+    def draw_character(self, screen: pygame.Surface, x: int, y: int):
+        if (character := self.get_cell(x, y)) != NO_DATA:
+            draw_text(screen, character, self.convert_coordinates_to_mouse_position((x, y)), self.text_size)
+
+    def iter_characters(self, top: int = 0, left: int = 0, height: Optional[int] = None,
+                        width: Optional[int] = None) -> Iterator[Tuple[int, int, str]]:
+        height = self.list_height if height is None else height
+        width = self.list_width if width is None else width
+        if isinstance(self.character_list, ChunkedCanvas):
+            return self.character_list.iter_region(top, left, height, width)
+        return ((y, x, self.character_list[y][x])
+                for y in range(top, top + height)
+                for x in range(left, left + width)
+                if self.character_list[y][x] != NO_DATA)
+
+    def get_visible_characters(self) -> Iterator[Tuple[int, int, str]]:
+        return self.iter_characters(self.view_y, self.view_x, self.view_height, self.view_width)
 
     def draw_characters(self, screen: pygame.Surface):
-        characters = set(((y, x), self.character_list[y][x])
-                         for y in range(self.list_height) for x in range(self.list_width)
-                         if self.character_list[y][x] != NO_DATA
-                         )
-        for (y, x), character in characters:
-            draw_text(screen, character, self.convert_coordinates_to_mouse_position((x, y)))
-
-    def draw_rectangles(self, screen: pygame.Surface):
-        for y in range(self.list_height):
-            for x in range(self.list_width):
-                top = self.upper_margin + y * self.cell_height
-                left = self.left_side_margin + x * self.cell_width
+        for y, x, character in self.get_visible_characters():
+            draw_text(screen, character, self.convert_coordinates_to_mouse_position((x, y)), self.text_size)
+
+    def draw_rectangles(self, screen: pygame.Surface, origin: tuple = (0, 0)):
+        origin_x, origin_y = origin
+        for y in range(self.view_height):
+            for x in range(self.view_width):
+                top = self.upper_margin + y * self.cell_height - origin_y
+                left = self.left_side_margin + x * self.cell_width - origin_x
                 rect = pygame.rect.Rect(left, top, self.cell_width, self.cell_height)
                 pygame.draw.rect(screen, CELL_COLOUR, rect)
 
+    def get_geometry(self) -> tuple:
+        return (self.display_width, self.display_height, self.left_side_margin, self.right_side_margin,
+                self.upper_margin, self.lower_margin, self.view_height, self.view_width, self.line_color,
+                self.line_thickness)
+
+    def draw_layer(self) -> pygame.Surface:
+        box_rect = self.get_box_rect()
+        layer = pygame.Surface(box_rect.size)
+        layer.fill(BACKGROUND_COLOUR)
+        with profiler.stage("rectangles"):
+            self.draw_rectangles(layer, box_rect.topleft)
+        with profiler.stage("lines"):
+            self.draw_lines(layer, box_rect.topleft)
+        return layer
+
+    def get_layer(self) -> pygame.Surface:
+        # The cell backgrounds and grid lines only change with the geometry of the box,
+        # so they are drawn once off-screen and blitted
+        return layer_cache.get(self)
+
     def convert_mouse_position_to_coordinates(self, mouse_position: tuple) -> tuple:
         mouse_x, mouse_y = mouse_position
         # Position relative to the top/bottom divided by the length/width of the box,
         # that division is how many boxes long/wide the cursor's position is and hence its position
-        x = (mouse_x - self.left_side_margin) // (self.list_display_width // self.list_width)
-        y = (mouse_y - self.upper_margin) // (self.list_display_height // self.list_height)
-        return x, y
+        x = (mouse_x - self.left_side_margin) // self.cell_width
+        y = (mouse_y - self.upper_margin) // self.cell_height
+        return int(x) + self.view_x, int(y) + self.view_y
 
     def convert_coordinates_to_mouse_position(self, coordinates: tuple) -> tuple:
         x, y = coordinates
-        mouse_x = self.left_side_margin + x * self.cell_width + self.cell_width // 2
-        mouse_y = self.upper_margin + y * self.cell_height + self.cell_height // 2
+        mouse_x = self.left_side_margin + (x - self.view_x) * self.cell_width + self.cell_width // 2
+        mouse_y = self.upper_margin + (y - self.view_y) * self.cell_height + self.cell_height // 2
         return mouse_x, mouse_y
 
     def position_in_box(self, mouse_position: tuple) -> tuple:
@@ -127,9 +358,51 @@ class Box:
                      character: Optional[str] = None):
         pass
 
-    def draw_features(self, screen: pygame.Surface):
+    def update_overlays(self):
+        pass
+
+    def draw_overlays(self, screen: pygame.Surface):
         pass
 
+    def draw_cell(self, screen: pygame.Surface, x: int, y: int) -> pygame.Rect:
+        # Lines, highlights and glyphs spill over the edges of a cell,
+        # so its neighbours are redrawn too, clipped to the region around the cell
+        region = self.get_cell_rect(x, y).inflate(self.line_thickness * 4, self.line_thickness * 4)
+        box_rect = self.get_box_rect()
+        # Drawing a missing layer is timed in its own stages
+        layer = self.get_layer()
+        previous_clip = screen.get_clip()
+        screen.set_clip(region)
+        with profiler.stage("layer"):
+            screen.blit(layer, region, region.move(-box_rect.left, -box_rect.top))
+        rows = range(max(y - 1, self.view_y), min(y + 2, self.view_y + self.view_height))
+        columns = range(max(x - 1, self.view_x), min(x + 2, self.view_x + self.view_width))
+        with profiler.stage("characters"):
+            for row in rows:
+                for column in columns:
+                    self.draw_character(screen, column, row)
+        self.draw_overlays(screen)
+        screen.set_clip(previous_clip)
+        return region
+
+    def draw_features(self, screen: pygame.Surface) -> List[pygame.Rect]:
+        self.update_overlays()
+        # Past a certain number of cells, one full redraw is cheaper than many overlapping regions
+        if self.redraw_all or len(self.dirty_cells) * 9 >= self.view_height * self.view_width:
+            box_rect = self.get_box_rect()
+            layer = self.get_layer()
+            with profiler.stage("layer"):
+                screen.blit(layer, box_rect)
+            with profiler.stage("characters"):
+                self.draw_characters(screen)
+            self.draw_overlays(screen)
+            updated_rects = [box_rect]
+        else:
+            updated_rects = [self.draw_cell(screen, x, y) for x, y in self.dirty_cells]
+        self.dirty_cells.clear()
+        self.redraw_all = False
+        return updated_rects
+
 
 class CharacterBox(Box):
 
@@ -139,18 +412,25 @@ class CharacterBox(Box):
                  character_list: Optional[list] = None):
         super().__init__(name, left_side_margin, right_side_margin, upper_margin, lower_margin, list_height, list_width,
                          display_width, display_height, line_colour, line_thickness, character_list)
-        self.selected_position = (0, 0)
-        self.highlight_coordinates = _CoordinateGenerator(max_x=list_width, max_y=list_height, reverse=True)
+        self._selected_position = (0, 0)
+        self.highlight_coordinates = _CoordinateCursor(max_x=list_width, max_y=list_height, reverse=True)
+
+    @property
+    def selected_position(self) -> tuple:
+        return self._selected_position
+
+    @selected_position.setter
+    def selected_position(self, position: tuple):
+        self.mark_dirty(*self._selected_position)
+        self._selected_position = position
+        self.mark_dirty(*position)
 
     def on_intersect(self, screen: pygame.Surface, position: tuple, mouse_event: int,
                      character: Optional[str] = None):
-        self.highlight_coordinates.position = self.highlight_coordinates.coordinates.index(position)
+        self.highlight_coordinates.move_to(position)
         self.selected_position = position
 
-    def draw_features(self, screen: pygame.Surface):
-        self.draw_rectangles(screen)
-        self.draw_lines(screen)
-        self.draw_characters(screen)
+    def draw_overlays(self, screen: pygame.Surface):
         self.highlight_selected_position(screen)
 
     def highlight_selected_position(self, screen: pygame.Surface):
@@ -165,10 +445,10 @@ class CharacterBox(Box):
     def add_character(self, character: str, add_on_highlight: bool = False):
         if add_on_highlight:
             highlight_x, highlight_y = self.selected_position
-            self.character_list[highlight_y][highlight_x] = character
+            self.set_cell(highlight_x, highlight_y, character)
         else:
             list_y, list_x = self.coordinate_generator.next()
-            self.character_list[list_y][list_x] = character
+            self.set_cell(list_x, list_y, character)
 
     def get_selected_character(self) -> str:
         x, y = self.selected_position
@@ -182,15 +462,15 @@ class CharacterBox(Box):
 
     def move_highlight_down(self):
         x, y = self.selected_position
-        y = (y + 1) % len(self.character_list)
+        y = (y + 1) % self.list_height
         self.selected_position = (x, y)
-        self.highlight_coordinates.position = self.highlight_coordinates.coordinates.index((x, y))
+        self.highlight_coordinates.move_to((x, y))
 
     def move_highlight_up(self):
         x, y = self.selected_position
-        y = (y - 1) % len(self.character_list)
+        y = (y - 1) % self.list_height
         self.selected_position = (x, y)
-        self.highlight_coordinates.position = self.highlight_coordinates.coordinates.index((x, y))
+        self.highlight_coordinates.move_to((x, y))
 
 
 class ArtBox(Box):
@@ -198,56 +478,70 @@ class ArtBox(Box):
     def __init__(self, name: str, left_side_margin: int, right_side_margin: int, upper_margin: int,
                  lower_margin: int, list_height: int, list_width: int, display_width: int,
                  display_height: int, line_colour: tuple, line_thickness: int = DEFAULT_BOX_LINE_THICKNESS,
-                 character_list: Optional[list] = None):
+                 character_list: Optional[list | ChunkedCanvas] = None, view_height: Optional[int] = None,
+                 view_width: Optional[int] = None):
+        if not isinstance(character_list, ChunkedCanvas):
+            character_list = ChunkedCanvas.from_list(character_list) if character_list else \
+                ChunkedCanvas(list_height, list_width)
         super().__init__(name, left_side_margin, right_side_margin, upper_margin, lower_margin, list_height, list_width,
-                         display_width, display_height, line_colour, line_thickness, character_list)
+                         display_width, display_height, line_colour, line_thickness, character_list,
+                         view_height or min(list_height, MAX_VIEW_HEIGHT), view_width or min(list_width, MAX_VIEW_WIDTH))
         self.selected_position = (0, 0)
+        self.hover_position = None
+        self.hover_surface = None
 
     def on_intersect(self, screen: pygame.Surface, position: tuple, mouse_event: int,
                      character: Optional[str] = None):
         x, y = position
         if self.position_in_box(self.convert_coordinates_to_mouse_position(position)):
             if mouse_event == 1:
-                self.character_list[y][x] = character
+                self.set_cell(x, y, character)
             elif mouse_event == 3:
-                self.character_list[y][x] = NO_DATA
+                self.set_cell(x, y, NO_DATA)
 
     def fill_with_character(self, character: str, fill: str = "row"):
         mouse_pos = pygame.mouse.get_pos()
         x, y = self.convert_mouse_position_to_coordinates(mouse_pos)
         if self.position_in_box(self.convert_coordinates_to_mouse_position((x, y))):
             if fill == "row":
-                self.character_list[y] = [character] * self.list_width
+                self.fill_spans([(y, 0, self.list_width)], character)
             elif fill == "column":
                 for row in range(self.list_height):
-                    self.character_list[row][x] = character
+                    self.set_cell(x, row, character)
+
+    def update_overlays(self):
+        x, y = self.convert_mouse_position_to_coordinates(pygame.mouse.get_pos())
+        hover_position = (x, y) if self.in_view(x, y) else None
+        if hover_position != self.hover_position:
+            if self.hover_position is not None:
+                self.mark_dirty(*self.hover_position)
+            if hover_position is not None:
+                self.mark_dirty(*hover_position)
+            self.hover_position = hover_position
 
     def draw_hover(self, screen: pygame.Surface):
-        coordinate_in_box = self.position_in_box(self.convert_coordinates_to_mouse_position(
-            self.convert_mouse_position_to_coordinates(mouse_position := pygame.mouse.get_pos())
-        ))
-        if coordinate_in_box:
-            x, y = self.convert_mouse_position_to_coordinates(mouse_position)
-            top = self.upper_margin + y * self.cell_height
-            left = self.left_side_margin + x * self.cell_width
-            surface_region = left, top, self.cell_width, self.cell_height
-            hover_surface = pygame.Surface(pygame.Rect(surface_region).size, pygame.SRCALPHA)
-            pygame.draw.rect(hover_surface, (*HOVER_COLOUR, 128), hover_surface.get_rect())
-            screen.blit(hover_surface, surface_region)
-
-    def draw_features(self, screen: pygame.Surface):
-        if not ENABLE_PERFORMANCE_OPTIMIZATIONS:
-            self.draw_rectangles(screen)
-        self.draw_characters(screen)
+        with profiler.stage("hover"):
+            self._draw_hover(screen)
+
+    def _draw_hover(self, screen: pygame.Surface):
+        if self.hover_position is not None:
+            surface_region = self.get_cell_rect(*self.hover_position)
+            if self.hover_surface is None or self.hover_surface.get_size() != surface_region.size:
+                # Only made again when the cell size changes
+                self.hover_surface = pygame.Surface(surface_region.size, pygame.SRCALPHA)
+                self.hover_surface.fill((*HOVER_COLOUR, 128))
+            screen.blit(self.hover_surface, surface_region)
+
+    def draw_overlays(self, screen: pygame.Surface):
         if not ENABLE_PERFORMANCE_OPTIMIZATIONS:
             self.draw_hover(screen)
-            self.draw_lines(screen)
 
 
 class Boxes:
 
     def __init__(self, box_list: List[Box]):
         self.boxes = box_list
+        self.listeners = []
 
     def __getitem__(self, name: str) -> Box | CharacterBox | ArtBox:
         for box in self.boxes:
@@ -258,17 +552,35 @@ class Boxes:
         for i, box in enumerate(self.boxes):
             if box.name == name:
                 self.boxes[i] = value
+                value.listeners.extend(self.listeners)
+                for listener in self.listeners:
+                    listener.box_replaced(value)
+
+    def add_listener(self, listener: Any):
+        # Listeners implement cell_changed(box, x, y, old_character, new_character),
+        # span_changed(box, y, left, old_characters, new_characters) and box_replaced(box)
+        self.listeners.append(listener)
+        for box in self.boxes:
+            box.listeners.append(listener)
+            listener.box_replaced(box)
 
     def get_selected_character(self) -> str:
         return self["character"].get_selected_character()
 
-    def draw_box_features(self, screen: pygame.Surface):
+    def mark_all_dirty(self):
+        for box in self.boxes:
+            box.mark_all_dirty()
+
+    def draw_box_features(self, screen: pygame.Surface) -> List[pygame.Rect]:
+        updated_rects = []
         for box in self.boxes:
-            box.draw_features(screen)
+            if box.visible:
+                updated_rects.extend(box.draw_features(screen))
+        return updated_rects
 
     def check_box_intersect(self, screen: pygame.Surface, mouse_position: tuple, mouse_event: int):
         for box in self.boxes:
-            if box.position_in_box(mouse_position):
+            if box.visible and box.position_in_box(mouse_position):
                 box.on_intersect(screen,
                                  box.convert_mouse_position_to_coordinates(mouse_position),
                                  mouse_event,
@@ -1,17 +1,11 @@
 import pygame
 
 from constants import TEXT_COLOUR
+from glyphs import glyph_cache
 
 
 class Button:
 
-    _instances = []
-
-    def __new__(cls, *args, **kwargs):
-        self = object.__new__(cls)
-        cls._instances.append(self)
-        return self
-
     def __init__(self, colour: tuple, left: int, top: int, width: int, height: int, character: str = "",
                  font_size: int = 25):
         self.rect = pygame.rect.Rect(left, top, width, height)
@@ -21,8 +15,7 @@ class Button:
 
     def draw(self, screen: pygame.Surface):
         pygame.draw.rect(screen, self.colour, self.rect)
-        font = pygame.font.Font(pygame.font.get_default_font(), self.font_size)
-        text_surface = font.render(self.character, True, TEXT_COLOUR)
+        text_surface = glyph_cache.render(self.character, self.font_size, TEXT_COLOUR)
         text_rect = text_surface.get_rect()
         text_rect.center = self.rect.left + self.rect.width // 2, self.rect.top + self.rect.height // 2
         screen.blit(text_surface, text_rect)
@@ -35,8 +28,3 @@ class Button:
             if pressed[0] == 1:
                 return True
         return False
-
-    @classmethod
-    def draw_all_buttons(cls, screen: pygame.Surface):
-        for button in cls._instances:
-            button.draw(screen)
@@ -0,0 +1,222 @@
+from itertools import groupby
+from typing import Iterator, List, Tuple
+
+from constants import NO_DATA, CANVAS_CHUNK_SIZE
+
+
+def find_runs(row: list, character: str, offset: int = 0) -> List[Tuple[int, int]]:
+    # The column each run of character in the row starts at and the column it ends before, from offset
+    count = row.count(character)
+    if not count:
+        return []
+    if count == len(row):
+        return [(offset, offset + len(row))]
+    runs = []
+    x = offset
+    for run_character, run in groupby(row):
+        length = len(list(run))
+        if run_character == character:
+            runs.append((x, x + length))
+        x += length
+    return runs
+
+
+class _CanvasRow:
+
+    __slots__ = ("canvas", "y")
+
+    def __init__(self, canvas: "ChunkedCanvas", y: int):
+        self.canvas = canvas
+        self.y = y
+
+    def __getitem__(self, x: int) -> str:
+        return self.canvas.get(self.y, x)
+
+    def __setitem__(self, x: int, character: str):
+        self.canvas.set(self.y, x, character)
+
+    def __len__(self) -> int:
+        return self.canvas.width
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.canvas.get(self.y, x) for x in range(self.canvas.width))
+
+
+class ChunkedCanvas:
+
+    """
+    A sparse grid of characters, stored as square chunks which are only created once
+    something other than NO_DATA is written to them.
+
+    Rows can be indexed like a list of lists, i.e. canvas[y][x].
+    """
+
+    def __init__(self, height: int, width: int, chunk_size: int = CANVAS_CHUNK_SIZE):
+        self.height = height
+        self.width = width
+        self.chunk_size = chunk_size
+        self.chunks = {}
+
+    @classmethod
+    def from_list(cls, character_list: list, chunk_size: int = CANVAS_CHUNK_SIZE) -> "ChunkedCanvas":
+        # Each chunk is built from slices of the rows it covers, and only if some slice is not blank
+        canvas = cls(len(character_list), len(character_list[0]) if character_list else 0, chunk_size)
+        blank = [NO_DATA] * chunk_size
+        for top in range(0, canvas.height, chunk_size):
+            rows = character_list[top:top + chunk_size]
+            for left in range(0, canvas.width, chunk_size):
+                chunk = [row[left:left + chunk_size] for row in rows]
+                if all(row.count(NO_DATA) == len(row) for row in chunk):
+                    continue
+                # Chunks on the bottom and right edges are padded out to full size
+                if len(chunk[0]) < chunk_size:
+                    for row in chunk:
+                        row += blank[len(row):]
+                chunk += [blank.copy() for _ in range(chunk_size - len(chunk))]
+                canvas.chunks[top // chunk_size, left // chunk_size] = chunk
+        return canvas
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __getitem__(self, y: int) -> _CanvasRow:
+        if not 0 <= y < self.height:
+            raise IndexError("canvas row out of range")
+        return _CanvasRow(self, y)
+
+    def __iter__(self) -> Iterator[_CanvasRow]:
+        return (_CanvasRow(self, y) for y in range(self.height))
+
+    def get(self, y: int, x: int) -> str:
+        chunk = self.chunks.get((y // self.chunk_size, x // self.chunk_size))
+        if chunk is None:
+            return NO_DATA
+        return chunk[y % self.chunk_size][x % self.chunk_size]
+
+    def set(self, y: int, x: int, character: str):
+        key = y // self.chunk_size, x // self.chunk_size
+        if (chunk := self.chunks.get(key)) is None:
+            if character == NO_DATA:
+                return
+            chunk = self.chunks[key] = [[NO_DATA] * self.chunk_size for _ in range(self.chunk_size)]
+        chunk[y % self.chunk_size][x % self.chunk_size] = character
+
+    def clear(self):
+        self.chunks.clear()
+
+    def get_span(self, y: int, left: int, right: int) -> list:
+        # The characters of row y from left up to, but not including, right
+        values = []
+        chunk_y, offset_y = divmod(y, self.chunk_size)
+        for chunk_x in range(left // self.chunk_size, (right - 1) // self.chunk_size + 1):
+            chunk_left = chunk_x * self.chunk_size
+            start, end = max(left, chunk_left), min(right, chunk_left + self.chunk_size)
+            if (chunk := self.chunks.get((chunk_y, chunk_x))) is None:
+                values += [NO_DATA] * (end - start)
+            else:
+                values += chunk[offset_y][start - chunk_left:end - chunk_left]
+        return values
+
+    def get_runs(self, y: int, character: str) -> List[Tuple[int, int]]:
+        # As find_runs over row y, comparing a chunk's row slice at a time; missing chunks are one run of NO_DATA
+        runs = []
+        chunk_y, offset_y = divmod(y, self.chunk_size)
+        for left in range(0, self.width, self.chunk_size):
+            if (chunk := self.chunks.get((chunk_y, left // self.chunk_size))) is None:
+                chunk_runs = [(left, min(left + self.chunk_size, self.width))] if character == NO_DATA else []
+            else:
+                row = chunk[offset_y]
+                chunk_runs = find_runs(row if left + self.chunk_size <= self.width else row[:self.width - left],
+                                       character, left)
+            for run in chunk_runs:
+                # Runs which meet at the edge of a chunk are one run
+                if runs and runs[-1][1] == run[0]:
+                    runs[-1] = runs[-1][0], run[1]
+                else:
+                    runs.append(run)
+        return runs
+
+    def replace_span(self, y: int, left: int, values: list) -> list:
+        # Writes values from left in row y and returns the characters they replaced, a chunk's row
+        # slice at a time and without creating chunks for blank runs
+        old_values = []
+        chunk_y, offset_y = divmod(y, self.chunk_size)
+        start, right = left, left + len(values)
+        while start < right:
+            chunk_x, offset_x = divmod(start, self.chunk_size)
+            end = min(right, start - offset_x + self.chunk_size)
+            part = values[start - left:end - left]
+            if (chunk := self.chunks.get((chunk_y, chunk_x))) is None:
+                old_values += [NO_DATA] * (end - start)
+                if part.count(NO_DATA) != len(part):
+                    chunk = self.chunks[chunk_y, chunk_x] = [[NO_DATA] * self.chunk_size
+                                                             for _ in range(self.chunk_size)]
+                    chunk[offset_y][offset_x:offset_x + end - start] = part
+            else:
+                row = chunk[offset_y]
+                old_values += row[offset_x:offset_x + end - start]
+                row[offset_x:offset_x + end - start] = part
+            start = end
+        return old_values
+
+    def fill_span(self, y: int, left: int, right: int, character: str) -> list:
+        # As replace_span with every value the same, writing whole chunk rows from one list
+        old_values = []
+        fill = [character] * self.chunk_size
+        chunk_y, offset_y = divmod(y, self.chunk_size)
+        chunk_x, offset_x = divmod(left, self.chunk_size)
+        start = left
+        while start < right:
+            end = min(right, start - offset_x + self.chunk_size)
+            length = end - start
+            if (chunk := self.chunks.get((chunk_y, chunk_x))) is None:
+                old_values += [NO_DATA] * length
+                if character != NO_DATA:
+                    chunk = self.chunks[chunk_y, chunk_x] = [[NO_DATA] * self.chunk_size
+                                                             for _ in range(self.chunk_size)]
+                    chunk[offset_y][offset_x:offset_x + length] = fill if length == self.chunk_size else fill[:length]
+            else:
+                row = chunk[offset_y]
+                old_values += row[offset_x:offset_x + length]
+                row[offset_x:offset_x + length] = fill if length == self.chunk_size else fill[:length]
+            start = end
+            chunk_x += 1
+            offset_x = 0
+        return old_values
+
+    def iter_spans(self) -> Iterator[Tuple[int, int, int]]:
+        # For each row with chunks, the columns its first chunk starts at and its last chunk ends before
+        extents = {}
+        for chunk_y, chunk_x in self.chunks:
+            first, last = extents.get(chunk_y, (chunk_x, chunk_x))
+            extents[chunk_y] = min(first, chunk_x), max(last, chunk_x)
+        for chunk_y, (first, last) in sorted(extents.items()):
+            for y in range(chunk_y * self.chunk_size, min((chunk_y + 1) * self.chunk_size, self.height)):
+                yield y, first * self.chunk_size, min((last + 1) * self.chunk_size, self.width)
+
+    def iter_chunks(self) -> Iterator[Tuple[int, int, list]]:
+        # The top and left of each chunk on the canvas, with its rows
+        for (chunk_y, chunk_x), chunk in self.chunks.items():
+            yield chunk_y * self.chunk_size, chunk_x * self.chunk_size, chunk
+
+    def iter_region(self, top: int, left: int, height: int, width: int) -> Iterator[Tuple[int, int, str]]:
+        # Every character in the region which is not NO_DATA, visiting only the chunks the region overlaps
+        bottom, right = min(top + height, self.height), min(left + width, self.width)
+        for chunk_y in range(top // self.chunk_size, (bottom - 1) // self.chunk_size + 1):
+            for chunk_x in range(left // self.chunk_size, (right - 1) // self.chunk_size + 1):
+                if (chunk := self.chunks.get((chunk_y, chunk_x))) is None:
+                    continue
+                chunk_top, chunk_left = chunk_y * self.chunk_size, chunk_x * self.chunk_size
+                for y in range(max(top, chunk_top), min(bottom, chunk_top + self.chunk_size)):
+                    row = chunk[y - chunk_top]
+                    for x in range(max(left, chunk_left), min(right, chunk_left + self.chunk_size)):
+                        if (character := row[x - chunk_left]) != NO_DATA:
+                            yield y, x, character
+
+    def to_list(self) -> List[list]:
+        character_list = [[NO_DATA] * self.width for _ in range(self.height)]
+        for top, left, chunk in self.iter_chunks():
+            right = min(left + self.chunk_size, self.width)
+            for y in range(top, min(top + self.chunk_size, self.height)):
+                character_list[y][left:right] = chunk[y - top][:right - left]
+        return character_list
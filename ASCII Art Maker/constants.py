@@ -2,7 +2,14 @@ import os
 
 PERMITTED_CHARACTER_UNICODES = list(range(32, 127))  # from "!" to "~"
 JSON_FILE = True
+# Save in the compact grid format (see text/compact.py) rather than JSON or text
+COMPACT_FILE = False
 ENABLE_PERFORMANCE_OPTIMIZATIONS = False
+# Redraw the whole display every frame instead of only the cells which have changed, e.g. for profiling;
+# otherwise the editor sleeps until there is an event
+CONTINUOUS_REDRAW = False
+# The longest the editor sleeps without an event, in milliseconds, before updating the frame counter
+IDLE_TIMEOUT = 1000
 
 DISPLAY_WIDTH = 1080
 DISPLAY_HEIGHT = 720
@@ -36,9 +43,43 @@ if ENABLE_PERFORMANCE_OPTIMIZATIONS:
 else:
     DEFAULT_TEXT_SIZE = 24
 DEFAULT_BOX_LINE_THICKNESS = 3
+GLYPH_CACHE_SIZE = 4096
+CANVAS_CHUNK_SIZE = 64
+# The most cells of an art box shown at once; larger canvases are panned and zoomed
+MAX_VIEW_HEIGHT = 40
+MAX_VIEW_WIDTH = 120
+# The size in cells of the canvas the editor starts with, unless given with --canvas, e.g. --canvas 2000x2000
+ART_BOX_HEIGHT = 10
+ART_BOX_WIDTH = 30
+# The scales the art box can be zoomed to, relative to the cells first shown; glyphs scale with them
+ZOOM_LEVELS = (0.25, 0.35, 0.5, 0.7, 1.0, 1.4, 2.0, 2.8, 4.0)
+MIN_TEXT_SIZE = 6
+# Box backgrounds kept for recent zoom levels and window sizes
+LAYER_CACHE_SIZE = 12
 
 SAVE_FILE_NAME = "data"
 SAVED_FILES_DIRECTORY = os.path.join(os.path.dirname(os.path.realpath(__file__)), "saved")
+MANIFEST_FILE_NAME = "manifest.json"
+# Edits are journalled in the background and recovered when the editor next starts
+AUTOSAVE = True
+AUTOSAVE_DIRECTORY = os.path.join(SAVED_FILES_DIRECTORY, "autosave")
+AUTOSAVE_INTERVAL = 0.3
+AUTOSAVE_COMPACTION_THRESHOLD = 5000
+# The most cell changes kept for undoing before the oldest are forgotten
+HISTORY_MAX_CELLS = 1_000_000
+# The Unicode palette, shown in place of the character box, and its index of character names
+PALETTE_ROWS = 4
+PALETTE_COLUMNS = 32
+PALETTE_STATUS_HEIGHT = 22
+PALETTE_STATUS_TEXT_SIZE = 18
+UNICODE_INDEX_PATH = os.path.join(SAVED_FILES_DIRECTORY, "cache", "unicode_index.json")
+# Frames averaged over by the profiler overlay (F3), and where its recordings (F4) are written
+PROFILER_HISTORY = 120
+PROFILE_DIRECTORY = os.path.join(SAVED_FILES_DIRECTORY, "profiles")
+LOAD_FILE_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "load_file.txt")
+# The editor shares file formats with the game, which lives in the parent directory; the editor's
+# entry points add it to the import path
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 NO_DATA = '\x1f'
 ADD_ON_HIGHLIGHT = True
 ART_BOX_ONLY = True
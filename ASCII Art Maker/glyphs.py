@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from typing import Optional
+
+import pygame
+
+from constants import GLYPH_CACHE_SIZE
+
+
+class FontRegistry:
+
+    """Loads each font size once; constructing a font reads the font file from disk."""
+
+    def __init__(self, font_path: Optional[str] = None):
+        self.font_path = font_path
+        self.fonts = {}
+
+    def get_font(self, size: int) -> pygame.font.Font:
+        if (font := self.fonts.get(size)) is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = pygame.font.Font(self.font_path or pygame.font.get_default_font(), size)
+            self.fonts[size] = font
+        return font
+
+
+class GlyphCache:
+
+    """A least recently used cache of rendered text surfaces, keyed by text, size and colour."""
+
+    def __init__(self, font_registry: FontRegistry, capacity: int = GLYPH_CACHE_SIZE):
+        self.font_registry = font_registry
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.surfaces)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def render(self, text: str, size: int, colour: tuple) -> pygame.Surface:
+        key = (text, size, colour)
+        if (surface := self.surfaces.get(key)) is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.font_registry.get_font(size).render(text, True, colour)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def reset_statistics(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.surfaces.clear()
+        self.reset_statistics()
+
+
+# Shared by every drawing path in the editor
+glyph_cache = GlyphCache(FontRegistry())
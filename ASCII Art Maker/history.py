@@ -0,0 +1,147 @@
+from collections import deque
+from typing import Any
+
+from constants import *
+
+
+class EditHistory:
+
+    """
+    Undo and redo stacks of cell diffs, recorded as a listener of the boxes.
+
+    Changes are collected into a group until the group is committed, and a cell changed
+    more than once in a row keeps only its first old and last new character. Spans of
+    cells changed at once, e.g. by a fill, are stored as one diff of their old characters
+    and their new ones, kept as a single character when the span was filled with it, so
+    clearing a box is a diff for each row rather than for each cell. The
+    main loop commits once per frame, so a click or a fill is one step; a drag can
+    span frames by beginning and ending a group around it. The oldest groups are
+    dropped once more than max_cells diffs are stored.
+    """
+
+    def __init__(self, max_cells: int = HISTORY_MAX_CELLS):
+        self.max_cells = max_cells
+        self.boxes = None
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.stored_cells = 0
+        # Cell diffs, as dictionaries of (box name, x, y) to [old character, new character],
+        # and span diffs, in the order they were made
+        self.current_group = []
+        self.group_depth = 0
+        self.applying = False
+        self.character_lists = {}
+
+    def attach(self, boxes: Any):
+        self.boxes = boxes
+        boxes.add_listener(self)
+
+    def cell_changed(self, box: Any, x: int, y: int, old_character: str, new_character: str):
+        if self.applying:
+            return
+        if not self.current_group or not isinstance(cells := self.current_group[-1], dict):
+            cells = {}
+            self.current_group.append(cells)
+        if (diff := cells.get((box.name, x, y))) is None:
+            cells[box.name, x, y] = [old_character, new_character]
+        else:
+            diff[1] = new_character
+
+    def span_changed(self, box: Any, y: int, left: int, old_characters: list, new_characters: list):
+        if self.applying:
+            return
+        if new_characters.count(new_characters[0]) == len(new_characters):
+            new_characters = new_characters[0]
+        self.current_group.append((box.name, y, left, old_characters, new_characters))
+
+    def box_replaced(self, box: Any):
+        # Resizing the window keeps a box's characters, while loading a file replaces them
+        # and makes the stored diffs meaningless
+        if self.character_lists.get(box.name, box.character_list) is not box.character_list:
+            self.clear()
+        self.character_lists[box.name] = box.character_list
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.current_group.clear()
+        self.stored_cells = 0
+
+    def begin_group(self):
+        self.group_depth += 1
+
+    def end_group(self):
+        self.group_depth = max(self.group_depth - 1, 0)
+        self.commit()
+
+    def commit(self):
+        if self.group_depth or not self.current_group:
+            return
+        group = []
+        for change in self.current_group:
+            if isinstance(change, dict):
+                diffs = tuple((name, x, y, old_character, new_character)
+                              for (name, x, y), (old_character, new_character) in change.items()
+                              if old_character != new_character)
+                if diffs:
+                    group.append(diffs)
+            else:
+                group.append(change)
+        self.current_group.clear()
+        if not group:
+            return
+        self.undo_stack.append(group)
+        self.stored_cells += self.count_cells(group)
+        for redo_group in self.redo_stack:
+            self.stored_cells -= self.count_cells(redo_group)
+        self.redo_stack.clear()
+        while self.stored_cells > self.max_cells and len(self.undo_stack) > 1:
+            self.stored_cells -= self.count_cells(self.undo_stack.popleft())
+
+    @staticmethod
+    def count_cells(group: list) -> int:
+        # Cell diffs are tuples of tuples, span diffs are tuples starting with the box name
+        return sum(len(change[3]) if isinstance(change[0], str) else len(change) for change in group)
+
+    def apply(self, group: list, undo: bool):
+        self.applying = True
+        try:
+            for change in reversed(group) if undo else group:
+                if isinstance(change[0], str):
+                    name, y, left, old_characters, new_characters = change
+                    if undo:
+                        self.boxes[name].set_span(y, left, old_characters)
+                    elif isinstance(new_characters, list):
+                        self.boxes[name].set_span(y, left, new_characters)
+                    else:
+                        self.boxes[name].set_span(y, left, [new_characters] * len(old_characters))
+                else:
+                    for name, x, y, old_character, new_character in change:
+                        self.boxes[name].set_cell(x, y, old_character if undo else new_character)
+        finally:
+            self.applying = False
+
+    def undo(self) -> bool:
+        self.commit()
+        if not self.undo_stack or self.boxes is None:
+            return False
+        group = self.undo_stack.pop()
+        self.apply(group, undo=True)
+        self.redo_stack.append(group)
+        return True
+
+    def redo(self) -> bool:
+        if not self.redo_stack or self.boxes is None:
+            return False
+        group = self.redo_stack.pop()
+        self.apply(group, undo=False)
+        self.undo_stack.append(group)
+        return True
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
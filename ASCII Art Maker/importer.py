@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import argparse
+from typing import Optional, Tuple
+
+import numpy
+import pygame
+
+from constants import *
+
+# The editor shares file formats with the game in the parent directory, so that must be importable
+# before the modules which use them
+if PROJECT_DIRECTORY not in sys.path:
+    sys.path.append(PROJECT_DIRECTORY)
+
+from box_calculator import CELL_ASPECT_RATIO
+from manifest import get_save_manifest
+from text.compact import COMPACT_EXTENSION, write_grids
+from text.colours import COLOUR_RGB_VALUES
+from mechanics.constants import SPRITE_DIR, TERRAIN_DIR
+
+"""
+Converts images to character grids which load straight into the art box, a terrain or a sprite.
+
+Every step works on whole NumPy arrays: the image is averaged down to one colour per cell,
+the brightness of each cell picks a glyph from a ramp, cells on a sharp edge get a line glyph
+along the edge, and colours are optionally matched to the terminal palette.
+"""
+
+# From darkest to brightest; a space becomes an empty cell
+GLYPH_RAMP = " .:-=+*#%@"
+# Indexed by the direction of the brightness gradient across an edge, in steps of 45 degrees
+EDGE_GLYPHS = ("|", "/", "-", "\\")
+EDGE_THRESHOLD = 0.25
+# Pixels more transparent than this, on average over a cell, leave the cell empty
+ALPHA_THRESHOLD = 128
+LUMINANCE_WEIGHTS = numpy.array([0.2126, 0.7152, 0.0722], dtype=numpy.float32)
+
+
+def load_image(path: str) -> numpy.ndarray:
+    # Rows of RGBA pixels; surfarray indexes surfaces by x first
+    surface = pygame.image.load(path)
+    pixels = numpy.empty((surface.get_height(), surface.get_width(), 4), dtype=numpy.uint8)
+    pixels[..., :3] = pygame.surfarray.array3d(surface).swapaxes(0, 1)
+    pixels[..., 3] = pygame.surfarray.array_alpha(surface).swapaxes(0, 1)
+    return pixels
+
+
+def get_grid_size(image_height: int, image_width: int, width: int, height: Optional[int] = None,
+                  aspect_ratio: float = CELL_ASPECT_RATIO) -> Tuple[int, int]:
+    # Cells are taller than they are wide, so fewer rows than columns cover a square
+    width = max(1, min(width, image_width))
+    if height is None:
+        height = round(width * image_height / image_width / aspect_ratio)
+    return max(1, min(height, image_height)), width
+
+
+def block_mean(pixels: numpy.ndarray, height: int, width: int) -> numpy.ndarray:
+    # The mean of each channel over the block of pixels covered by each cell
+    row_edges = numpy.linspace(0, pixels.shape[0], height + 1).astype(numpy.intp)
+    column_edges = numpy.linspace(0, pixels.shape[1], width + 1).astype(numpy.intp)
+    # Summing along rows first is about twice as fast, as each row of pixels is contiguous
+    sums = numpy.add.reduceat(pixels, column_edges[:-1], axis=1, dtype=numpy.uint32)
+    sums = numpy.add.reduceat(sums, row_edges[:-1], axis=0)
+    counts = numpy.outer(numpy.diff(row_edges), numpy.diff(column_edges))
+    return sums / counts[..., None].astype(numpy.float32)
+
+
+def quantise_colours(colours: numpy.ndarray) -> Tuple[numpy.ndarray, list]:
+    # The index of the nearest terminal colour to each cell, and the names of the colours
+    names = list(COLOUR_RGB_VALUES)
+    palette = numpy.array([COLOUR_RGB_VALUES[name] for name in names], dtype=numpy.float32)
+    distances = ((colours[..., None, :] - palette) ** 2).sum(axis=-1)
+    return distances.argmin(axis=-1), names
+
+
+def get_paint_mapping(glyph_indices: numpy.ndarray, glyphs: list, colour_indices: numpy.ndarray,
+                      colour_names: list) -> dict:
+    # Terrains and sprites are painted by character, so each glyph gets the colour most of its cells have
+    counts = numpy.bincount((glyph_indices * len(colour_names) + colour_indices).ravel(),
+                            minlength=len(glyphs) * len(colour_names)).reshape(len(glyphs), len(colour_names))
+    mapping = {}
+    for glyph_index in numpy.flatnonzero(counts.sum(axis=1)):
+        if (glyph := glyphs[glyph_index]) != NO_DATA:
+            mapping.setdefault(colour_names[counts[glyph_index].argmax()].lower(), []).append(glyph)
+    return {"fore": mapping}
+
+
+def image_to_grid(pixels: numpy.ndarray, width: int, height: Optional[int] = None, ramp: str = GLYPH_RAMP,
+                  invert: bool = False, edge_threshold: Optional[float] = EDGE_THRESHOLD,
+                  aspect_ratio: float = CELL_ASPECT_RATIO, colours: bool = False) -> Tuple[list, Optional[dict]]:
+    """
+    The character grid for an array of RGBA pixels, and a paint mapping of the terminal colours
+    nearest to the image if colours is set. Edge glyphs are skipped if edge_threshold is None.
+    """
+    height, width = get_grid_size(pixels.shape[0], pixels.shape[1], width, height, aspect_ratio)
+    cells = block_mean(pixels, height, width)
+    luminance = cells[..., :3] @ LUMINANCE_WEIGHTS / 255
+    if invert:
+        luminance = 1 - luminance
+    glyphs = [NO_DATA if glyph == " " else glyph for glyph in ramp] + list(EDGE_GLYPHS) + [NO_DATA]
+    glyph_indices = numpy.rint(luminance * (len(ramp) - 1)).astype(numpy.intp)
+    if edge_threshold is not None and height > 1 and width > 1:
+        # A step of one row covers more distance than a step of one column
+        gradient_y, gradient_x = numpy.gradient(luminance)
+        gradient_y /= aspect_ratio
+        directions = numpy.rint(numpy.arctan2(gradient_y, gradient_x) / (numpy.pi / 4)).astype(numpy.intp) % 4
+        edges = numpy.hypot(gradient_x, gradient_y) > edge_threshold
+        glyph_indices[edges] = len(ramp) + directions[edges]
+    glyph_indices[cells[..., 3] < ALPHA_THRESHOLD] = len(glyphs) - 1
+    grid = numpy.array(glyphs, dtype=object)[glyph_indices].tolist()
+    if not colours:
+        return grid, None
+    colour_indices, colour_names = quantise_colours(cells[..., :3])
+    return grid, get_paint_mapping(glyph_indices, glyphs, colour_indices, colour_names)
+
+
+def write_grid(path: str, grid: list, paint_mapping: Optional[dict] = None):
+    # Any paint mapping is written next to the grid, e.g. court.json and court.paint.json
+    if path.endswith(COMPACT_EXTENSION):
+        write_grids(path, [grid])
+    else:
+        with open(path, "w") as file:
+            json.dump(grid, file)
+    if paint_mapping is not None:
+        with open(os.path.splitext(path)[0] + ".paint.json", "w") as file:
+            json.dump(paint_mapping, file, ensure_ascii=False, indent=4)
+
+
+def save_to_editor(grid: list, paint_mapping: Optional[dict] = None) -> str:
+    # Saved like an art box only export, so it is loaded by the load buttons
+    filename = get_save_manifest().allocate_filename(COMPACT_EXTENSION if COMPACT_FILE else "json")
+    write_grid(os.path.join(SAVED_FILES_DIRECTORY, filename), grid, paint_mapping)
+    get_save_manifest().record(filename, grid)
+    return filename
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Convert an image to a character grid.")
+    parser.add_argument("image")
+    parser.add_argument("--width", type=int, default=MAX_VIEW_WIDTH, help="number of columns")
+    parser.add_argument("--height", type=int, help="number of rows; follows the image's aspect ratio if omitted")
+    parser.add_argument("--ramp", default=GLYPH_RAMP, help="glyphs from darkest to brightest")
+    parser.add_argument("--invert", action="store_true", help="use the ramp from brightest to darkest")
+    parser.add_argument("--edge-threshold", type=float, default=EDGE_THRESHOLD,
+                        help="gradient above which cells get line glyphs")
+    parser.add_argument("--no-edges", action="store_true", help="only use the glyph ramp")
+    parser.add_argument("--colours", action="store_true",
+                        help="write a paint mapping of the nearest terminal colours next to the grid")
+    destination = parser.add_mutually_exclusive_group()
+    destination.add_argument("--terrain", help="name of a terrain to write")
+    destination.add_argument("--sprite", help="name of a sprite to write")
+    destination.add_argument("--output", help="path to write; a new editor save if no destination is given")
+    arguments = parser.parse_args(argv)
+    try:
+        pixels = load_image(arguments.image)
+    except (pygame.error, OSError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        sys.exit(1)
+    grid, paint_mapping = image_to_grid(pixels, arguments.width, arguments.height, arguments.ramp, arguments.invert,
+                                        None if arguments.no_edges else arguments.edge_threshold,
+                                        colours=arguments.colours)
+    if arguments.terrain or arguments.sprite:
+        directory, name = (TERRAIN_DIR, arguments.terrain) if arguments.terrain else (SPRITE_DIR, arguments.sprite)
+        path = os.path.join(directory, name if os.path.splitext(name)[1] else name + ".json")
+        write_grid(path, grid, paint_mapping)
+    elif arguments.output:
+        path = arguments.output
+        write_grid(path, grid, paint_mapping)
+    else:
+        path = os.path.join(SAVED_FILES_DIRECTORY, save_to_editor(grid, paint_mapping))
+    print(f"Wrote {len(grid)} rows of {len(grid[0])} characters to {path!r}.")
+
+
+if __name__ == "__main__":
+    main()
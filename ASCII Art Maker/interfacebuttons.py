@@ -1,31 +1,27 @@
 import json
-from typing import Tuple
+from typing import Optional, Tuple
 
 import pygame
 
 from constants import *
+from text.compact import COMPACT_EXTENSION, read_grids, write_grids
+from manifest import get_save_manifest
 from button import Button
+from glyphs import glyph_cache
 from boxes import Boxes, ArtBox, CharacterBox
 
 
 def name_save_file(extension: str):
-    filename = SAVE_FILE_NAME
-    count = 0
-    while filename + "." + extension in os.listdir(SAVED_FILES_DIRECTORY):
-        if count != 0:
-            filename = filename[:-1]
-        count += 1
-        filename += str(count)
-    return filename + "." + extension
+    return get_save_manifest().allocate_filename(extension)
 
 
 def load_json_file(filename: str) -> Tuple[list, list]:
-    file_data = open(os.path.join(SAVED_FILES_DIRECTORY, filename)).read().split("\n")
-    if len(file_data) == 1:
-        art_box_data, character_box_data = json.loads(file_data[0]), None
+    # Reads either a JSON save, with one list per line, or a compact save
+    grids = read_grids(os.path.join(SAVED_FILES_DIRECTORY, filename))
+    if len(grids) == 1:
+        art_box_data, character_box_data = grids[0], None
     else:
-        art_box_json_data, character_box_json_data = file_data
-        art_box_data, character_box_data = json.loads(art_box_json_data), json.loads(character_box_json_data)
+        art_box_data, character_box_data = grids
     return art_box_data, character_box_data
 
 
@@ -43,25 +39,34 @@ class SaveButton(Button):
         super().__init__(colour, left, top, width, height, character, font_size)
 
     @staticmethod
-    def export(boxes: Boxes, json_file: bool = False, art_box_only: bool = False):
-        if json_file:
-            file = open(os.path.join(SAVED_FILES_DIRECTORY, name_save_file("json")), "w")
-            export_boxes = [boxes["art"]]
-            if not art_box_only:
-                export_boxes.append(boxes["character"])
+    def export(boxes: Boxes, json_file: bool = False, art_box_only: bool = False,
+               compact_file: bool = False) -> str:
+        art_character_list = boxes["art"].get_character_list()
+        character_lists = [art_character_list]
+        if not art_box_only:
+            character_lists.append(boxes["character"].get_character_list())
+        if compact_file:
+            filename = name_save_file(COMPACT_EXTENSION)
+            write_grids(os.path.join(SAVED_FILES_DIRECTORY, filename), character_lists)
+        elif json_file:
+            filename = name_save_file("json")
+            file = open(os.path.join(SAVED_FILES_DIRECTORY, filename), "w")
             string_data = ""
-            for box in export_boxes:
-                string_data += json.dumps(box.character_list) + "\n"
+            for character_list in character_lists:
+                string_data += json.dumps(character_list) + "\n"
             file.write(string_data.rstrip("\n"))
             file.close()
         else:
-            ascii_art = format_character_list(boxes["art"].character_list)
-            file = open(os.path.join(SAVED_FILES_DIRECTORY, name_save_file("txt")), "w")
+            filename = name_save_file("txt")
+            ascii_art = format_character_list(art_character_list)
+            file = open(os.path.join(SAVED_FILES_DIRECTORY, filename), "w")
             file.write(ascii_art)
             if not art_box_only:
                 characters = format_character_list(boxes["character"].character_list)
                 file.write(characters)
             file.close()
+        get_save_manifest().record(filename, art_character_list)
+        return filename
 
 
 class ClearButton(Button):
@@ -72,64 +77,95 @@ class ClearButton(Button):
 
     @staticmethod
     def clear_data(art_box: ArtBox, character_box: CharacterBox):
-        art_box.character_list = [[NO_DATA] * art_box.list_width for _ in range(art_box.list_height)]
-        character_box.character_list = [[NO_DATA] * character_box.list_width for _ in range(character_box.list_height)]
+        # Cleared through the boxes, so that listeners such as the autosave journal see the change
+        art_box.clear()
+        character_box.clear()
         character_box.selected_position = (0, 0)
+        character_box.highlight_coordinates.position = 0
         character_box.coordinate_generator.position = 0
 
 
 class LoadButton(Button):
 
+    # The save last loaded by cycling through the manifest
+    selected_filename = None
+
     def __init__(self, colour: tuple, left: int, top: int, width: int, height: int, character: str = "",
                  font_size: int = 25):
         super().__init__(colour, left, top, width, height, character, font_size)
 
     @staticmethod
     def load_last_file(boxes: Boxes) -> str | None:
-        number_index = len(SAVE_FILE_NAME) + 1
-        file_number_groupings = [
-            (int(filename[number_index]) if filename[number_index].isdigit() else 0, filename)
-            for filename in os.listdir(SAVED_FILES_DIRECTORY)
-            if filename.endswith("json")
-        ]
-        file_number_groupings.sort(reverse=True)
-        if last_created_file := file_number_groupings[:1]:
-            chosen_filename = last_created_file[0][1]
-            return LoadButton.load_file(chosen_filename, boxes)
+        return LoadButton.load_manifest_entry(None, boxes)
+
+    @staticmethod
+    def load_selected_file(boxes: Boxes) -> str | None:
+        # The file named in load_file.txt, otherwise the save before the one last selected
+        if os.path.exists(LOAD_FILE_PATH) and (filename := open(LOAD_FILE_PATH).read().strip()):
+            return LoadButton.load_file(filename, boxes)
+        loaded_file = LoadButton.load_manifest_entry(LoadButton.selected_filename, boxes)
+        LoadButton.selected_filename = loaded_file
+        return loaded_file
+
+    @staticmethod
+    def load_manifest_entry(after_filename: str | None, boxes: Boxes) -> str | None:
+        save_manifest = get_save_manifest()
+        while (entry := save_manifest.previous(after_filename)) is not None:
+            try:
+                return LoadButton.load_file(entry["filename"], boxes)
+            except FileNotFoundError:
+                # Deleted outside of the editor
+                save_manifest.remove(entry["filename"])
+            except ValueError as error:
+                print(f"Skipped {entry['filename']!r}, which could not be read: {error}")
+                after_filename = entry["filename"]
+        return None
 
     @staticmethod
     def load_file(filename: str, boxes: Boxes) -> str | None:
         if filename:
             art_box_data, character_box_data = load_json_file(filename)
-            old_art_box, old_character_box = boxes["art"], boxes["character"]
-            boxes["art"] = ArtBox(old_art_box.name, old_art_box.left_side_margin, old_art_box.right_side_margin,
-                                  old_art_box.upper_margin, old_art_box.lower_margin, len(art_box_data or old_art_box),
-                                  len((art_box_data or old_art_box)[0]), old_art_box.display_width,
-                                  old_art_box.display_height,
-                                  old_art_box.line_color, character_list=art_box_data)
-            boxes["character"] = CharacterBox(old_character_box.name, old_character_box.left_side_margin,
-                                              old_character_box.right_side_margin,
-                                              old_character_box.upper_margin, old_character_box.lower_margin,
-                                              len(character_box_data or old_character_box),
-                                              len((character_box_data or old_character_box)[0]),
-                                              old_character_box.display_width,
-                                              old_character_box.display_height,
-                                              old_character_box.line_color, character_list=character_box_data)
-
+            LoadButton.load_character_lists(art_box_data, character_box_data, boxes)
             return filename
 
+    @staticmethod
+    def load_character_lists(art_box_data: Optional[list], character_box_data: Optional[list], boxes: Boxes):
+        old_art_box, old_character_box = boxes["art"], boxes["character"]
+        boxes["art"] = ArtBox(old_art_box.name, old_art_box.left_side_margin, old_art_box.right_side_margin,
+                              old_art_box.upper_margin, old_art_box.lower_margin, len(art_box_data or old_art_box),
+                              len((art_box_data or old_art_box)[0]), old_art_box.display_width,
+                              old_art_box.display_height,
+                              old_art_box.line_color, character_list=art_box_data)
+        boxes["character"] = CharacterBox(old_character_box.name, old_character_box.left_side_margin,
+                                          old_character_box.right_side_margin,
+                                          old_character_box.upper_margin, old_character_box.lower_margin,
+                                          len(character_box_data or old_character_box),
+                                          len((character_box_data or old_character_box)[0]),
+                                          old_character_box.display_width,
+                                          old_character_box.display_height,
+                                          old_character_box.line_color, character_list=character_box_data)
+        # The palette may be covering the character box, which is then kept hidden
+        boxes["character"].visible = old_character_box.visible
+
 
 class FPSCount(Button):
 
     def __init__(self, left: int, top: int, width: int, height: int, font_size: int):
         super().__init__((), left, top, width, height, font_size=font_size)
+        self.frames = None
 
     def draw(self, screen: pygame.Surface):
         pygame.draw.rect(screen, BACKGROUND_COLOUR, self.rect)
-
-    def draw_frames(self, screen: pygame.Surface, frames: float):
-        font = pygame.font.Font(pygame.font.get_default_font(), self.font_size)
-        text_surface = font.render(str(int(frames)), True, TEXT_COLOUR)
+        self.frames = None
+
+    def draw_frames(self, screen: pygame.Surface, frames: float) -> pygame.Rect | None:
+        # Only redrawn when the displayed number changes
+        if int(frames) == self.frames:
+            return None
+        self.draw(screen)
+        self.frames = int(frames)
+        text_surface = glyph_cache.render(str(int(frames)), self.font_size, TEXT_COLOUR)
         text_rect = text_surface.get_rect()
         text_rect.center = self.rect.left + self.rect.width // 2, self.rect.top + self.rect.height // 2
         screen.blit(text_surface, text_rect)
+        return self.rect
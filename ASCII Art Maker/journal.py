@@ -0,0 +1,194 @@
+import os
+import json
+import atexit
+import threading
+from typing import Any, Optional
+
+from constants import *
+
+
+class EditJournal:
+
+    """
+    Autosaves the boxes by appending their cell changes to a journal on a background thread.
+
+    Changes are queued by the UI thread and written in batches every flush interval. The
+    journal thread keeps a sparse copy of every box, which it periodically writes out as
+    a snapshot before truncating the journal. On startup the snapshot is read and the
+    journal replayed over it to recover the last session, unless that session ended cleanly.
+
+    A session ends cleanly when the editor is quit, or when everything journalled has been
+    saved and nothing is edited afterwards. A marker file is written then, and removed again
+    as soon as another change is journalled.
+    """
+
+    def __init__(self, directory: str = AUTOSAVE_DIRECTORY, flush_interval: float = AUTOSAVE_INTERVAL,
+                 compaction_threshold: int = AUTOSAVE_COMPACTION_THRESHOLD):
+        self.directory = directory
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.clean_path = os.path.join(directory, "clean")
+        self.flush_interval = flush_interval
+        self.compaction_threshold = compaction_threshold
+        self.pending = []
+        # How many changes were pending when the boxes were last saved, or None if they have not been since
+        self.saved_records: Optional[int] = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        # Box name to its height, width and non-empty cells; only touched by the journal thread once started
+        self.shadow = {}
+        self.journal_records = 0
+        self.clean = False
+        os.makedirs(directory, exist_ok=True)
+
+    def cell_changed(self, box: Any, x: int, y: int, old_character: str, new_character: str):
+        with self.lock:
+            self.pending.append(["set", box.name, y, x, new_character])
+
+    def span_changed(self, box: Any, y: int, left: int, old_characters: list, new_characters: list):
+        if new_characters.count(new_characters[0]) == len(new_characters):
+            record = ["fill", box.name, y, left, len(new_characters), new_characters[0]]
+        else:
+            record = ["span", box.name, y, left, new_characters]
+        with self.lock:
+            self.pending.append(record)
+
+    def box_replaced(self, box: Any):
+        cells = [[y, x, character] for y, x, character in box.iter_characters()]
+        with self.lock:
+            self.pending.append(["reset", box.name, box.list_height, box.list_width, cells])
+
+    def apply_record(self, record: list):
+        kind, name = record[:2]
+        if kind == "reset":
+            height, width, cells = record[2:]
+            self.shadow[name] = {"height": height, "width": width,
+                                 "cells": {(y, x): character for y, x, character in cells}}
+        elif name in self.shadow:
+            cells = self.shadow[name]["cells"]
+            if kind == "set":
+                y, x, character = record[2:]
+                changes = [(x, character)]
+            elif kind == "fill":
+                y, left, length, character = record[2:]
+                changes = [(x, character) for x in range(left, left + length)]
+            else:
+                y, left, characters = record[2:]
+                changes = enumerate(characters, left)
+            for x, character in changes:
+                if character == NO_DATA:
+                    cells.pop((y, x), None)
+                else:
+                    cells[y, x] = character
+
+    def recover(self) -> Optional[dict]:
+        # Every recovered box, as a list of lists, by name; None if the last session ended cleanly
+        if os.path.exists(self.clean_path):
+            self.discard()
+            return None
+        try:
+            with open(self.snapshot_path) as file:
+                for name, state in json.load(file).items():
+                    self.apply_record(["reset", name, state["height"], state["width"], state["cells"]])
+        except (OSError, ValueError, KeyError):
+            self.shadow.clear()
+        try:
+            with open(self.journal_path) as file:
+                for line in file:
+                    try:
+                        self.apply_record(json.loads(line))
+                    except ValueError:
+                        # A record cut short when the editor was killed
+                        break
+        except OSError:
+            pass
+        if not self.shadow:
+            return None
+        character_lists = {}
+        for name, state in self.shadow.items():
+            character_list = [[NO_DATA] * state["width"] for _ in range(state["height"])]
+            for (y, x), character in state["cells"].items():
+                character_list[y][x] = character
+            character_lists[name] = character_list
+        return character_lists
+
+    def discard(self):
+        # The next session journals its boxes from the start, so nothing from the last one is needed
+        for path in (self.snapshot_path, self.journal_path, self.clean_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.shadow.clear()
+        self.journal_records = 0
+
+    def mark_saved(self):
+        # Called by the UI thread once the boxes are saved; the changes already queued were saved with them
+        with self.lock:
+            self.saved_records = len(self.pending)
+
+    def set_clean(self, clean: bool):
+        if clean == self.clean:
+            return
+        if clean:
+            open(self.clean_path, "w").close()
+        else:
+            os.remove(self.clean_path)
+        self.clean = clean
+
+    def attach(self, boxes: Any):
+        boxes.add_listener(self)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="EditJournal", daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+
+    def run(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            records, self.pending = self.pending, []
+            saved_records, self.saved_records = self.saved_records, None
+        if records:
+            self.set_clean(False)
+            self.write_records(records)
+        # Anything queued after the save is not saved
+        if saved_records is not None and saved_records == len(records):
+            self.set_clean(True)
+
+    def write_records(self, records: list):
+        with open(self.journal_path, "a") as file:
+            file.write("".join(json.dumps(record) + "\n" for record in records))
+        for record in records:
+            self.apply_record(record)
+        self.journal_records += len(records)
+        if self.journal_records >= self.compaction_threshold:
+            self.compact()
+
+    def compact(self):
+        snapshot = {
+            name: {"height": state["height"], "width": state["width"],
+                   "cells": [[y, x, character] for (y, x), character in state["cells"].items()]}
+            for name, state in self.shadow.items()
+        }
+        temporary_path = self.snapshot_path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(snapshot, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.snapshot_path)
+        # Replaying the journal over the new snapshot would be harmless, so a crash here loses nothing
+        open(self.journal_path, "w").close()
+        self.journal_records = 0
+
+    def close(self, clean: bool = False):
+        # Also run at exit, where the editor may have crashed, so only quitting passes clean
+        if self.thread is not None and self.thread.is_alive():
+            self.stop_event.set()
+            self.thread.join()
+        if clean:
+            self.set_clean(True)
@@ -0,0 +1,77 @@
+from typing import Iterable, List, Optional
+
+import pygame
+
+from button import Button
+from boxes import Box, layer_cache
+from interfacebuttons import FPSCount
+
+BUTTON_SPACING = 10
+BUTTON_STRIDE = 50
+BUTTON_SIZE = 40
+FRAME_COUNTER_FONT_SIZE = 25
+BOX_SIDE_MARGIN = 70
+
+
+class EditorLayout:
+
+    """
+    Places the editor's widgets for a display size: the buttons stacked down the left side, the
+    frame counter in the bottom left corner and each box between margins worked out from the
+    display height.
+
+    Widgets are made once and moved in place when the display changes size, so nothing is built
+    again. Of everything cached, only the backgrounds of the boxes depend on their geometry.
+    """
+
+    def __init__(self, display_width: int, display_height: int):
+        self.display_width = display_width
+        self.display_height = display_height
+        self.buttons: List[Button] = []
+        self.frame_counter: Optional[FPSCount] = None
+
+    @property
+    def display_size(self) -> tuple:
+        return self.display_width, self.display_height
+
+    def get_box_margins(self, name: str) -> tuple:
+        # The left, right, upper and lower margins; the palette takes the place of the character box
+        if name == "art":
+            return BOX_SIDE_MARGIN, BOX_SIDE_MARGIN, self.display_height // 4, self.display_height // 20
+        return BOX_SIDE_MARGIN, BOX_SIDE_MARGIN, BUTTON_SPACING, self.display_height // 5 * 4
+
+    def get_button_rect(self, index: int) -> pygame.Rect:
+        return pygame.rect.Rect(BUTTON_SPACING, BUTTON_SPACING + BUTTON_STRIDE * index, BUTTON_SIZE, BUTTON_SIZE)
+
+    def get_frame_counter_rect(self) -> pygame.Rect:
+        return pygame.rect.Rect(BUTTON_SPACING, self.display_height - BUTTON_SPACING * 4, BUTTON_SIZE, BUTTON_SIZE)
+
+    def add_button(self, button_class: type, colour: tuple, character: str) -> Button:
+        button = button_class(colour, *self.get_button_rect(len(self.buttons)), character=character)
+        self.buttons.append(button)
+        return button
+
+    def add_frame_counter(self) -> FPSCount:
+        self.frame_counter = FPSCount(*self.get_frame_counter_rect(), FRAME_COUNTER_FONT_SIZE)
+        return self.frame_counter
+
+    def resize(self, display_width: int, display_height: int, boxes: Iterable[Box]) -> bool:
+        # Returns whether anything moved; a scaled display keeps its size when the window is resized
+        if (display_width, display_height) == self.display_size:
+            return False
+        # The backgrounds drawn for the old size will not be shown again; those for other zoom levels are kept
+        layer_cache.discard_display_size(*self.display_size)
+        self.display_width, self.display_height = display_width, display_height
+        for index, button in enumerate(self.buttons):
+            button.rect = self.get_button_rect(index)
+        if self.frame_counter is not None:
+            self.frame_counter.rect = self.get_frame_counter_rect()
+        for box in boxes:
+            box.resize(display_width, display_height, *self.get_box_margins(box.name)[2:])
+        return True
+
+    def draw_buttons(self, screen: pygame.Surface):
+        for button in self.buttons:
+            button.draw(screen)
+        if self.frame_counter is not None:
+            self.frame_counter.draw(screen)
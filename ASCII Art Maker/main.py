@@ -1,12 +1,26 @@
+import sys
+import argparse
 from typing import Optional
 
 import pygame
 
 from button import Button
 from constants import *
+
+# The editor shares file formats with the game in the parent directory, so that must be importable
+# before the modules which use them
+if PROJECT_DIRECTORY not in sys.path:
+    sys.path.append(PROJECT_DIRECTORY)
+
 from keymods import shift_key, alt_key, shift_alt_key
 from boxes import ArtBox, CharacterBox, Boxes
-from interfacebuttons import SaveButton, ClearButton, LoadButton, FPSCount
+from interfacebuttons import SaveButton, ClearButton, LoadButton
+from layout import EditorLayout
+from journal import EditJournal
+from history import EditHistory
+from palette import PaletteBox
+from profiler import profiler
+from tools import TOOLS, DragStroke, ShapeDrag, flood_fill_spans, paste_region
 
 os.chdir(os.path.dirname(__file__))
 
@@ -15,24 +29,51 @@ pygame.display.set_caption('ASCII Art Maker', 'ASCIIAM')
 pygame.display.set_icon(pygame.image.load("icon.png"))
 clock = pygame.time.Clock()
 
-pygame.event.set_allowed([pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.QUIT, pygame.WINDOWRESIZED])
+pygame.event.set_allowed([pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION,
+                          pygame.MOUSEWHEEL, pygame.QUIT, pygame.WINDOWRESIZED])
 
 FULLSCREEN = (pygame.display.Info().current_w, pygame.display.Info().current_h)
 
-ART_BOX_HEIGHT = 10
-ART_BOX_WIDTH = 30
 CHARACTER_BOX_WIDTH = 5
 CHARACTER_BOX_HEIGHT = 2
 
+journal = EditJournal() if AUTOSAVE else None
+history = EditHistory()
+
+
+def quit_editor():
+    # Quitting ends the session cleanly, so the next launch starts afresh rather than recovering it
+    if journal is not None:
+        journal.close(clean=True)
+    pygame.quit()
+    quit()
+
+
+def wait_for_events(timeout: int) -> list:
+    # Blocks until an event arrives or the timeout passes, instead of polling every frame
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
 
-def main(display_width: int, display_height: int, character_box: Optional[CharacterBox] = None,
-         art_box: Optional[ArtBox] = None, add_on_highlight: bool = True):
+
+def parse_canvas_size(value: str) -> tuple:
+    # A height and width separated by an x, e.g. "2000x2000"
+    try:
+        height, width = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected a size such as 2000x2000")
+    if height < 1 or width < 1:
+        raise argparse.ArgumentTypeError("the canvas must be at least 1x1")
+    return height, width
+
+
+def main(display_width: int, display_height: int, add_on_highlight: bool = True,
+         canvas_size: tuple = (ART_BOX_HEIGHT, ART_BOX_WIDTH), recovered_boxes: Optional[dict] = None):
     display = pygame.display.set_mode((display_width, display_height),
                                       pygame.RESIZABLE | pygame.SCALED | pygame.DOUBLEBUF,
                                       32, vsync=1)
-    UPPER_SPACING = 10
-    SPACING = 50
-    DIMENSION = 40
+    layout = EditorLayout(display_width, display_height)
 
     SAVE_BUTTON_COLOUR = (213, 43, 43)
     CLEAR_BUTTON_COLOUR = (160, 96, 96)
@@ -40,38 +81,18 @@ def main(display_width: int, display_height: int, character_box: Optional[Charac
     LOAD_PREVIOUS_BUTTON_COLOUR = (202, 54, 54)
     LOAD_SELECTED_BUTTON_COLOUR = (223, 33, 33)
 
-    save_button = SaveButton(SAVE_BUTTON_COLOUR, UPPER_SPACING, UPPER_SPACING, DIMENSION, DIMENSION, character="S")
-    clear_button = ClearButton(
-        CLEAR_BUTTON_COLOUR, UPPER_SPACING, UPPER_SPACING + SPACING, DIMENSION, DIMENSION, character="C"
-    )
-    quit_button = Button(
-        QUIT_BUTTON_COLOUR, UPPER_SPACING, UPPER_SPACING + SPACING * 2, DIMENSION, DIMENSION, character="Q"
-    )
-    load_previous_button = LoadButton(
-        LOAD_PREVIOUS_BUTTON_COLOUR, UPPER_SPACING, UPPER_SPACING + SPACING * 3, DIMENSION, DIMENSION, character="P"
-    )
-    load_selected_button = LoadButton(
-        LOAD_SELECTED_BUTTON_COLOUR, UPPER_SPACING, UPPER_SPACING + SPACING * 4, DIMENSION, DIMENSION, character="L"
-    )
-    frame_count = FPSCount(
-        UPPER_SPACING, display_height - UPPER_SPACING * 4, DIMENSION, DIMENSION, 25
-    )
-
-    if character_box is None:
-        character_box = CharacterBox("character", 70, 70, 10, display_height // 5 * 4, CHARACTER_BOX_HEIGHT,
-                                     CHARACTER_BOX_WIDTH, display_width, display_height, CHARACTER_BOX_COLOUR)
-    else:
-        character_box = CharacterBox("character", 70, 70, 10, display_height // 5 * 4, character_box.list_height,
-                                     character_box.list_width, display_width, display_height, CHARACTER_BOX_COLOUR,
-                                     character_list=character_box.character_list)
-
-    if art_box is None:
-        art_box = ArtBox("art", 70, 70, display_height // 4, display_height // 20, ART_BOX_HEIGHT, ART_BOX_WIDTH,
-                         display_width, display_height, ART_BOX_COLOUR)
-    else:
-        art_box = ArtBox("art", 70, 70, display_height // 4, display_height // 20,
-                         art_box.list_height, art_box.list_width, display_width, display_height, ART_BOX_COLOUR,
-                         character_list=art_box.character_list)
+    # Stacked down the left side in this order
+    save_button = layout.add_button(SaveButton, SAVE_BUTTON_COLOUR, "S")
+    clear_button = layout.add_button(ClearButton, CLEAR_BUTTON_COLOUR, "C")
+    quit_button = layout.add_button(Button, QUIT_BUTTON_COLOUR, "Q")
+    load_previous_button = layout.add_button(LoadButton, LOAD_PREVIOUS_BUTTON_COLOUR, "P")
+    load_selected_button = layout.add_button(LoadButton, LOAD_SELECTED_BUTTON_COLOUR, "L")
+    frame_count = layout.add_frame_counter()
+
+    character_box = CharacterBox("character", *layout.get_box_margins("character"), CHARACTER_BOX_HEIGHT,
+                                 CHARACTER_BOX_WIDTH, display_width, display_height, CHARACTER_BOX_COLOUR)
+    art_box = ArtBox("art", *layout.get_box_margins("art"), *canvas_size,
+                     display_width, display_height, ART_BOX_COLOUR)
     boxes = Boxes([
         character_box,
         art_box,
@@ -79,19 +100,67 @@ def main(display_width: int, display_height: int, character_box: Optional[Charac
 
     boxes["character"].add_character("│")
 
-    if ENABLE_PERFORMANCE_OPTIMIZATIONS:
-        display.fill(BACKGROUND_COLOUR)
-        boxes["art"].draw_rectangles(display)
-        boxes["art"].draw_lines(display)
+    if recovered_boxes:
+        LoadButton.load_character_lists(recovered_boxes.get("art"), recovered_boxes.get("character"), boxes)
+    if journal is not None:
+        journal.attach(boxes)
+    history.attach(boxes)
+
+    display.fill(BACKGROUND_COLOUR)
+    layout.draw_buttons(display)
+    boxes.draw_box_features(display)
+    pygame.display.update()
 
+    stroke: Optional[DragStroke] = None
+    shape_drag: Optional[ShapeDrag] = None
+    tool = TOOLS[0]
+    clipboard = None
+    # Shown in place of the character box, and built the first time it is opened
+    palette: Optional[PaletteBox] = None
     while 1:
         character_box = boxes["character"]
         art_box = boxes["art"]
-        for event in pygame.event.get():
+        # Only the last mouse position of the frame is painted to, with the cells in between interpolated
+        motion_position = None
+        cleared_rects = []
+        events = pygame.event.get() if CONTINUOUS_REDRAW else wait_for_events(IDLE_TIMEOUT)
+        # Time asleep waiting for events is not part of the frame
+        profiler.begin_frame()
+        for event in events:
             match event.type:
                 case pygame.QUIT:
-                    pygame.quit()
-                    quit()
+                    quit_editor()
+                case pygame.KEYDOWN if event.key == pygame.K_F3:
+                    if profiler.visible:
+                        # Uncovers whatever was drawn under the overlay
+                        display.fill(BACKGROUND_COLOUR, overlay_rect := profiler.get_overlay_rect(display))
+                        cleared_rects.append(overlay_rect)
+                        boxes.mark_all_dirty()
+                        if palette is not None:
+                            palette.mark_all_dirty()
+                    profiler.toggle_overlay()
+                case pygame.KEYDOWN if event.key == pygame.K_F4:
+                    if (recording_path := profiler.toggle_recording()) is not None:
+                        print(f"Recording frame times to {recording_path!r}.")
+                    else:
+                        print(f"Stopped recording frame times to {profiler.recording_path!r}.")
+                case pygame.KEYDOWN if palette is not None and palette.visible:
+                    # Typing searches the palette until it is closed
+                    mods = pygame.key.get_mods()
+                    if event.key == pygame.K_ESCAPE or event.key == pygame.K_u and mods & pygame.KMOD_META:
+                        palette.visible = False
+                        character_box.visible = True
+                        character_box.mark_all_dirty()
+                        display.fill(BACKGROUND_COLOUR, status_rect := palette.get_status_rect())
+                        cleared_rects.append(status_rect)
+                    elif event.key in (pygame.K_UP, pygame.K_DOWN):
+                        palette.pan(1 if event.key == pygame.K_DOWN else -1, 0)
+                    elif event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                        palette.jump_to_block(1 if event.key == pygame.K_PAGEDOWN else -1)
+                    elif event.key == pygame.K_BACKSPACE:
+                        palette.search(palette.query[:-1])
+                    elif event.unicode and event.unicode.isprintable() and not mods & pygame.KMOD_META:
+                        palette.search(palette.query + event.unicode)
                 case pygame.KEYDOWN:
                     match event.key:
                         case pygame.K_LEFT:
@@ -106,10 +175,34 @@ def main(display_width: int, display_height: int, character_box: Optional[Charac
                             # Special commands
                             mods = pygame.key.get_mods()
                             if event.key == pygame.K_q and mods & pygame.KMOD_META:
-                                quit()
+                                quit_editor()
                             elif event.key == pygame.K_p and mods & pygame.KMOD_META:
-                                for row in art_box.character_list:
+                                for row in art_box.get_character_list():
                                     print("".join(character if character != NO_DATA else " " for character in row))
+                            elif event.key == pygame.K_z and mods & pygame.KMOD_META and mods & pygame.KMOD_SHIFT:
+                                history.redo()
+                            elif event.key == pygame.K_z and mods & pygame.KMOD_META:
+                                history.undo()
+                            elif event.key == pygame.K_u and mods & pygame.KMOD_META:
+                                if palette is None:
+                                    palette = PaletteBox("palette", *layout.get_box_margins("palette"), PALETTE_ROWS,
+                                                         PALETTE_COLUMNS, *layout.display_size, CHARACTER_BOX_COLOUR)
+                                palette.visible = True
+                                palette.mark_all_dirty()
+                                character_box.visible = False
+                            elif event.key == pygame.K_t and mods & pygame.KMOD_META:
+                                tool = TOOLS[(TOOLS.index(tool) + 1) % len(TOOLS)]
+                                print(f"Selected the {tool} tool.")
+                            elif event.key == pygame.K_f and mods & pygame.KMOD_META:
+                                x, y = art_box.convert_mouse_position_to_coordinates(pygame.mouse.get_pos())
+                                character = character_box.get_selected_character()
+                                if art_box.in_view(x, y) and art_box.get_cell(x, y) != character:
+                                    art_box.fill_spans(flood_fill_spans(art_box, x, y), character)
+                            elif event.key == pygame.K_v and mods & pygame.KMOD_META:
+                                x, y = art_box.convert_mouse_position_to_coordinates(pygame.mouse.get_pos())
+                                if clipboard is not None and art_box.in_view(x, y):
+                                    # Blank cells are stamped over the art too when shift is held
+                                    paste_region(art_box, clipboard, (x, y), transparent=not mods & pygame.KMOD_SHIFT)
                             elif event.key == pygame.K_m and mods & pygame.KMOD_META:
                                 add_on_highlight = not add_on_highlight
                             elif event.key == pygame.K_r and mods & pygame.KMOD_META:
@@ -128,41 +221,115 @@ def main(display_width: int, display_height: int, character_box: Optional[Charac
                                     key = character
                                 if ord(key) in PERMITTED_CHARACTER_UNICODES:
                                     character_box.add_character(key, add_on_highlight=add_on_highlight)
+                case pygame.MOUSEWHEEL:
+                    mods = pygame.key.get_mods()
+                    if palette is not None and palette.visible and palette.position_in_box(pygame.mouse.get_pos()):
+                        palette.pan(-event.y, 0)
+                    elif mods & (pygame.KMOD_META | pygame.KMOD_CTRL):
+                        art_box.zoom(1 if event.y > 0 else -1, art_box.hover_position)
+                    elif mods & pygame.KMOD_SHIFT:
+                        art_box.pan(0, -event.y * max(1, art_box.view_width // 8))
+                    else:
+                        art_box.pan(-event.y * max(1, art_box.view_height // 8),
+                                    event.x * max(1, art_box.view_width // 8))
+                case pygame.MOUSEMOTION:
+                    if stroke is not None:
+                        motion_position = event.pos
+                case pygame.MOUSEBUTTONUP:
+                    if stroke is not None and event.button == stroke.button:
+                        stroke.move_to(motion_position or event.pos)
+                        motion_position = stroke = None
+                        history.end_group()
+                    elif shape_drag is not None and event.button == shape_drag.button:
+                        if (region := shape_drag.finish(event.pos)) is not None:
+                            clipboard = region
+                            print(f"Copied a region of {region.width} by {region.height} characters.")
+                        shape_drag = None
                 case pygame.MOUSEBUTTONDOWN:
-                    boxes.check_box_intersect(display, pygame.mouse.get_pos(), event.button)
+                    if palette is not None and palette.visible and palette.position_in_box(event.pos):
+                        # Picking a character from the palette adds it to the character box, as typing it would
+                        if event.button == 1 and (character := palette.pick(
+                                palette.convert_mouse_position_to_coordinates(event.pos))) is not None:
+                            character_box.add_character(character, add_on_highlight=add_on_highlight)
+                    elif tool != "brush" and event.button in (1, 3) and art_box.position_in_box(event.pos):
+                        shape_drag = ShapeDrag(art_box, tool, event.button, character_box.get_selected_character(),
+                                               art_box.convert_mouse_position_to_coordinates(event.pos))
+                    else:
+                        boxes.check_box_intersect(display, pygame.mouse.get_pos(), event.button)
+                    if tool == "brush" and stroke is None and event.button in (1, 3) and \
+                            art_box.position_in_box(event.pos):
+                        # The whole stroke is undone in one step
+                        history.begin_group()
+                        stroke = DragStroke(art_box, event.button, character_box.get_selected_character(),
+                                            art_box.convert_mouse_position_to_coordinates(event.pos))
                     if save_button.clicked():
-                        SaveButton.export(boxes, json_file=JSON_FILE, art_box_only=ART_BOX_ONLY)
-                        print("Saved current data.")
+                        saved_file = SaveButton.export(boxes, json_file=JSON_FILE, art_box_only=ART_BOX_ONLY,
+                                                       compact_file=COMPACT_FILE)
+                        if journal is not None:
+                            journal.mark_saved()
+                        print(f"Saved current data to {saved_file!r}.")
                     elif clear_button.clicked():
                         ClearButton.clear_data(art_box, character_box)
                         print("Reset all characters.")
                     elif quit_button.clicked():
                         print("Qutting program.")
-                        quit()
+                        quit_editor()
                     elif load_previous_button.clicked():
                         if (loaded_file := LoadButton.load_last_file(boxes)) is not None:
                             print(f"Loaded data from the last file exported named {loaded_file!r}.")
                         else:
                             print("No existing file to load.")
                     elif load_selected_button.clicked():
-                        filename = open("load_file.txt").read().rstrip("\n")
-                        if (loaded_file := LoadButton.load_file(filename, boxes)) is not None:
+                        if (loaded_file := LoadButton.load_selected_file(boxes)) is not None:
                             print(f"Loaded data from the selected file named {loaded_file!r}.")
                         else:
                             print("No existing file to load.")
                 case pygame.WINDOWRESIZED:
-                    main(display.get_width(), display.get_height(), character_box,
-                         art_box, add_on_highlight=add_on_highlight)
-        if not ENABLE_PERFORMANCE_OPTIMIZATIONS:
+                    # The boxes keep their characters, views and drags; only where they are drawn changes.
+                    # A scaled display usually keeps its size, in which case this is just a full redraw
+                    resized_boxes = [character_box, art_box] + ([palette] if palette is not None else [])
+                    layout.resize(*display.get_size(), resized_boxes)
+                    display.fill(BACKGROUND_COLOUR)
+                    layout.draw_buttons(display)
+                    boxes.mark_all_dirty()
+                    if palette is not None:
+                        palette.mark_all_dirty()
+                    cleared_rects.append(display.get_rect())
+        if stroke is not None and motion_position is not None:
+            stroke.move_to(motion_position)
+        # Everything changed by this frame's events is undone in one step
+        history.commit()
+        profiler.lap("events")
+        if CONTINUOUS_REDRAW:
             display.fill(BACKGROUND_COLOUR)
-        boxes.draw_box_features(display)
-        Button.draw_all_buttons(display)
-        frame_count.draw_frames(display, clock.get_fps())
-        pygame.display.update((character_box.left_side_margin, character_box.upper_margin,
-                               art_box.list_display_width,
-                               art_box.list_display_height + character_box.list_display_height +
-                               character_box.upper_margin))
+            with profiler.stage("buttons"):
+                layout.draw_buttons(display)
+            boxes.mark_all_dirty()
+            if palette is not None:
+                palette.mark_all_dirty()
+        updated_rects = boxes.draw_box_features(display) + cleared_rects
+        if palette is not None and palette.visible:
+            updated_rects.extend(palette.draw_features(display))
+        with profiler.stage("buttons"):
+            if (frames_rect := frame_count.draw_frames(display, clock.get_fps())) is not None:
+                updated_rects.append(frames_rect)
+        if profiler.visible:
+            with profiler.stage("overlay"):
+                updated_rects.append(profiler.draw(display))
+        with profiler.stage("update"):
+            if CONTINUOUS_REDRAW:
+                pygame.display.update()
+            elif updated_rects:
+                pygame.display.update(updated_rects)
+        profiler.end_frame(len(updated_rects), art_box)
+        # Also limits how often a stream of events, such as a drag, is redrawn
         clock.tick(60)
 
 
-main(DISPLAY_WIDTH, DISPLAY_HEIGHT, add_on_highlight=ADD_ON_HIGHLIGHT)
+parser = argparse.ArgumentParser(description="Draw ASCII art for the game's terrains and sprites.")
+parser.add_argument("--canvas", type=parse_canvas_size, default=(ART_BOX_HEIGHT, ART_BOX_WIDTH),
+                    metavar="HEIGHTxWIDTH", help="size in cells of the canvas to start with")
+arguments = parser.parse_args()
+
+main(DISPLAY_WIDTH, DISPLAY_HEIGHT, add_on_highlight=ADD_ON_HIGHLIGHT, canvas_size=arguments.canvas,
+     recovered_boxes=journal.recover() if journal is not None else None)
@@ -0,0 +1,145 @@
+import os
+import re
+import json
+import time
+import hashlib
+from typing import Optional
+
+from constants import *
+from text.compact import COMPACT_EXTENSION, read_grids
+
+SAVE_EXTENSIONS = ("json", "txt", COMPACT_EXTENSION)
+LOADABLE_EXTENSIONS = ("json", COMPACT_EXTENSION)
+SAVE_FILE_PATTERN = re.compile(rf"^{re.escape(SAVE_FILE_NAME)}(\d*)\.(?:{'|'.join(SAVE_EXTENSIONS)})$")
+
+
+def hash_character_list(character_list: list) -> str:
+    digest = hashlib.sha1()
+    for row in character_list:
+        digest.update("".join(row).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()[:16]
+
+
+class SaveManifest:
+
+    """
+    An index of the saved files, kept in the saved files directory, which records the id,
+    timestamp, dimensions and a hash of the contents of every save.
+
+    Entries are kept in order of id, so the latest save and the next free name are found
+    without listing the directory. The index is rebuilt from the directory if it is missing.
+    """
+
+    def __init__(self, directory: str = SAVED_FILES_DIRECTORY, filename: str = MANIFEST_FILE_NAME):
+        self.directory = directory
+        self.path = os.path.join(directory, filename)
+        self.next_id = 0
+        self.entries = []
+        self.entry_indices = {}
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+            self.next_id = data["next_id"]
+            for entry in data["entries"]:
+                self.add_entry(entry)
+        except (OSError, ValueError, KeyError):
+            self.rebuild()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add_entry(self, entry: dict):
+        self.entry_indices[entry["filename"]] = len(self.entries)
+        self.entries.append(entry)
+
+    def rebuild(self):
+        self.entries.clear()
+        self.entry_indices.clear()
+        numbered_files, other_files = [], []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(SAVE_EXTENSIONS) and filename != os.path.basename(self.path):
+                if match := SAVE_FILE_PATTERN.match(filename):
+                    numbered_files.append((int(match.group(1) or 0), filename))
+                else:
+                    other_files.append(filename)
+        numbered_files.sort()
+        first_other_id = numbered_files[-1][0] + 1 if numbered_files else 0
+        numbered_files.extend(enumerate(sorted(other_files), first_other_id))
+        for save_id, filename in numbered_files:
+            path = os.path.join(self.directory, filename)
+            self.add_entry(self.create_entry(save_id, filename, os.path.getmtime(path), self.read_character_list(path)))
+        self.next_id = numbered_files[-1][0] + 1 if numbered_files else 0
+        self.write()
+
+    @staticmethod
+    def read_character_list(path: str) -> list:
+        if path.endswith("txt"):
+            return [list(line) for line in open(path).read().splitlines()]
+        try:
+            return read_grids(path)[0]
+        except (ValueError, IndexError):
+            return []
+
+    @staticmethod
+    def create_entry(save_id: int, filename: str, timestamp: float, character_list: list) -> dict:
+        return {
+            "id": save_id,
+            "filename": filename,
+            "timestamp": timestamp,
+            "height": len(character_list),
+            "width": len(character_list[0]) if character_list else 0,
+            "thumbnail": hash_character_list(character_list),
+        }
+
+    def write(self):
+        # Written to a temporary file first, so the index is never left half-written
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"next_id": self.next_id, "entries": self.entries}, file)
+        os.replace(temporary_path, self.path)
+
+    def allocate_filename(self, extension: str) -> str:
+        while True:
+            save_id, self.next_id = self.next_id, self.next_id + 1
+            filename = SAVE_FILE_NAME + (str(save_id) if save_id else "") + "." + extension
+            # Only files created outside the editor can collide with an allocated name
+            if filename not in self.entry_indices and not os.path.exists(os.path.join(self.directory, filename)):
+                return filename
+
+    def record(self, filename: str, character_list: list):
+        match = SAVE_FILE_PATTERN.match(filename)
+        save_id = int(match.group(1) or 0) if match else self.next_id - 1
+        if filename in self.entry_indices:
+            self.remove(filename)
+        self.add_entry(self.create_entry(save_id, filename, time.time(), character_list))
+        self.write()
+
+    def remove(self, filename: str):
+        if (index := self.entry_indices.pop(filename, None)) is not None:
+            del self.entries[index]
+            for entry in self.entries[index:]:
+                self.entry_indices[entry["filename"]] -= 1
+            self.write()
+
+    def latest(self, extensions: tuple = LOADABLE_EXTENSIONS) -> Optional[dict]:
+        return self.previous(None, extensions)
+
+    def previous(self, filename: Optional[str], extensions: tuple = LOADABLE_EXTENSIONS) -> Optional[dict]:
+        # The save before the given one with one of the extensions, wrapping around to the latest
+        index = self.entry_indices.get(filename, 0)
+        for _ in range(len(self.entries)):
+            index -= 1
+            if (entry := self.entries[index])["filename"].endswith(extensions):
+                return entry
+        return None
+
+
+_save_manifest: Optional[SaveManifest] = None
+
+
+def get_save_manifest() -> SaveManifest:
+    global _save_manifest
+    if _save_manifest is None:
+        _save_manifest = SaveManifest()
+    return _save_manifest
@@ -0,0 +1,260 @@
+import re
+import sys
+import json
+import bisect
+import itertools
+import unicodedata
+from typing import Iterator, List, Optional, Tuple
+
+import pygame
+
+from constants import *
+from boxes import Box, draw_text
+
+# Blocks which the palette can jump between, as (name, first code point, last code point)
+UNICODE_BLOCKS = (
+    ("Basic Latin", 0x20, 0x7E),
+    ("Latin-1 Supplement", 0xA0, 0xFF),
+    ("Greek and Coptic", 0x370, 0x3FF),
+    ("General Punctuation", 0x2000, 0x206F),
+    ("Arrows", 0x2190, 0x21FF),
+    ("Mathematical Operators", 0x2200, 0x22FF),
+    ("Miscellaneous Technical", 0x2300, 0x23FF),
+    ("Box Drawing", 0x2500, 0x257F),
+    ("Block Elements", 0x2580, 0x259F),
+    ("Geometric Shapes", 0x25A0, 0x25FF),
+    ("Miscellaneous Symbols", 0x2600, 0x26FF),
+    ("Dingbats", 0x2700, 0x27BF),
+    ("Braille Patterns", 0x2800, 0x28FF),
+)
+# Characters which separate the words of a name, or one name from the next
+WORD_SEPARATORS = " -\n"
+
+
+class UnicodeIndex:
+
+    """
+    The name of every printable, named code point, built from unicodedata the first time it is
+    needed and cached to disk for the next session.
+
+    The names are kept joined by newlines, so a search is one regular expression scan of the
+    text, with the offset of each match mapped back to its code point by bisection.
+    """
+
+    def __init__(self, path: str = UNICODE_INDEX_PATH):
+        self.path = path
+        self.code_points = None
+        self.names = None
+        self.names_text = None
+        self.line_offsets = None
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self.code_points)
+
+    def load(self):
+        if self.code_points is not None:
+            return
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+            if data["version"] != unicodedata.unidata_version:
+                raise ValueError("index built from a different version of the Unicode database")
+            self.code_points, self.names = data["code_points"], data["names"]
+        except (OSError, ValueError, KeyError):
+            self.build()
+        self.names_text = "\n".join(self.names)
+        # The offset in the text at which each name starts
+        self.line_offsets = list(itertools.accumulate((len(name) + 1 for name in self.names[:-1]), initial=0))
+
+    def build(self):
+        self.code_points, self.names = [], []
+        for code_point in range(sys.maxunicode + 1):
+            character = chr(code_point)
+            if (name := unicodedata.name(character, None)) is not None and character.isprintable():
+                self.code_points.append(code_point)
+                self.names.append(name)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"version": unicodedata.unidata_version, "code_points": self.code_points,
+                       "names": self.names}, file)
+        os.replace(temporary_path, self.path)
+
+    @property
+    def characters(self) -> str:
+        self.load()
+        return "".join(map(chr, self.code_points))
+
+    def get_position(self, code_point: int) -> int:
+        # The position of the first indexed code point at or after the given one
+        self.load()
+        return bisect.bisect_left(self.code_points, code_point)
+
+    def search(self, query: str) -> str:
+        """
+        The characters, in code point order, whose names contain a word starting with each
+        word of the query, e.g. "arr up" matches UPWARDS ARROW.
+        """
+        self.load()
+        words = query.upper().split()
+        if not words:
+            return self.characters
+        other_words = [re.compile(r"\b" + re.escape(word)) for word in words[1:]]
+        characters = []
+        last_line = -1
+        # Scanning for the plain first word is far faster than with a word boundary in the pattern,
+        # so the boundary is checked by hand
+        for match in re.finditer(re.escape(words[0]), self.names_text):
+            if (start := match.start()) and self.names_text[start - 1] not in WORD_SEPARATORS:
+                continue
+            line = bisect.bisect_right(self.line_offsets, start) - 1
+            if line != last_line and all(word.search(self.names[line]) for word in other_words):
+                characters.append(chr(self.code_points[line]))
+            last_line = line
+        return "".join(characters)
+
+
+unicode_index = UnicodeIndex()
+
+
+class _PaletteRows:
+
+    __slots__ = ("palette",)
+
+    def __init__(self, palette: "PaletteBox"):
+        self.palette = palette
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __len__(self) -> int:
+        return self.palette.list_height
+
+    def __getitem__(self, y: int) -> list:
+        return [self.palette.get_cell(x, y) for x in range(self.palette.list_width)]
+
+
+class PaletteBox(Box):
+
+    """
+    A scrollable palette of every named Unicode character, or of the results of a search.
+
+    The characters are kept as one string and laid out in rows on the fly, so only the
+    rows in view are ever drawn.
+    """
+
+    def __init__(self, name: str, left_side_margin: int, right_side_margin: int, upper_margin: int,
+                 lower_margin: int, view_height: int, list_width: int, display_width: int, display_height: int,
+                 line_colour: tuple, line_thickness: int = DEFAULT_BOX_LINE_THICKNESS,
+                 index: UnicodeIndex = unicode_index):
+        self.index = index
+        self.characters = index.characters
+        self.query = ""
+        self.rows_shown = view_height
+        super().__init__(name, left_side_margin, right_side_margin, upper_margin, lower_margin,
+                         self.count_rows(list_width), list_width, display_width, display_height, line_colour,
+                         line_thickness, _PaletteRows(self), view_height, list_width)
+        self.selected_position = None
+
+    def count_rows(self, list_width: int) -> int:
+        return max(1, -(-len(self.characters) // list_width))
+
+    def set_characters(self, characters: str):
+        self.characters = characters
+        self.list_height = self.count_rows(self.list_width)
+        self.selected_position = None
+        self.set_view(0, 0, self.rows_shown, self.list_width)
+
+    def search(self, query: str):
+        self.query = query
+        self.set_characters(self.index.search(query))
+
+    def get_cell(self, x: int, y: int) -> str:
+        position = y * self.list_width + x
+        return self.characters[position] if 0 <= x < self.list_width and position < len(self.characters) \
+            else NO_DATA
+
+    def iter_characters(self, top: int = 0, left: int = 0, height: Optional[int] = None,
+                        width: Optional[int] = None) -> Iterator[Tuple[int, int, str]]:
+        height = self.list_height if height is None else height
+        width = self.list_width if width is None else width
+        for y in range(top, top + height):
+            row = self.characters[y * self.list_width + left:y * self.list_width + left + width]
+            for x, character in enumerate(row, left):
+                yield y, x, character
+
+    def pick(self, position: tuple) -> Optional[str]:
+        # The character in the cell, which is then highlighted
+        if (character := self.get_cell(*position)) == NO_DATA:
+            return None
+        if self.selected_position is not None:
+            self.mark_dirty(*self.selected_position)
+        self.selected_position = position
+        self.mark_dirty(*position)
+        return character
+
+    def get_row_code_points(self, y: int) -> tuple:
+        row = self.characters[y * self.list_width:(y + 1) * self.list_width] or NO_DATA
+        return ord(row[0]), ord(row[-1])
+
+    def jump_to_block(self, step: int):
+        # Scrolls to the row holding the start of the next or previous block; only the whole palette is in blocks
+        if self.query:
+            self.pan(step * self.view_height, 0)
+            return
+        first_code_point, last_code_point = self.get_row_code_points(self.view_y)
+        starts = [start for _, start, _ in UNICODE_BLOCKS]
+        if step > 0:
+            block = bisect.bisect_right(starts, last_code_point)
+        else:
+            block = bisect.bisect_left(starts, first_code_point) - 1
+        if 0 <= block < len(starts):
+            self.pan(self.index.get_position(starts[block]) // self.list_width - self.view_y, 0)
+
+    def get_block_name(self) -> str:
+        # Blocks rarely start at the start of a row, so the row is named after its last character
+        code_point = self.get_row_code_points(self.view_y)[1]
+        for name, start, end in UNICODE_BLOCKS:
+            if start <= code_point <= end:
+                return name
+        return f"U+{code_point:04X}"
+
+    def get_status_rect(self) -> pygame.Rect:
+        # The line between the palette and the art box
+        top = self.display_height - self.lower_margin + self.line_thickness * 2
+        return pygame.rect.Rect(self.left_side_margin, top, self.list_display_width, PALETTE_STATUS_HEIGHT)
+
+    def draw_status(self, screen: pygame.Surface) -> pygame.Rect:
+        status_rect = self.get_status_rect()
+        screen.fill(BACKGROUND_COLOUR, status_rect)
+        if self.query:
+            status = f"Search: {self.query} ({len(self.characters)} characters)"
+        else:
+            status = f"{self.get_block_name()} (type to search)"
+        draw_text(screen, status, status_rect.center, PALETTE_STATUS_TEXT_SIZE)
+        return status_rect
+
+    def draw_overlays(self, screen: pygame.Surface):
+        if self.selected_position is not None and self.in_view(*self.selected_position):
+            pygame.draw.rect(screen, HIGHLIGHT_COLOUR, self.get_cell_rect(*self.selected_position),
+                             self.line_thickness + 3)
+
+    def draw_features(self, screen: pygame.Surface) -> List[pygame.Rect]:
+        redraw_status = self.redraw_all
+        updated_rects = super().draw_features(screen)
+        if redraw_status:
+            updated_rects.append(self.draw_status(screen))
+        return updated_rects
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    print(f"Indexed {len(unicode_index)} characters in {time.perf_counter() - start:.3f}s.")
+    for query in ("arrow", "box drawings light", "increment", "trigram"):
+        start = time.perf_counter()
+        results = unicode_index.search(query)
+        print(f"{query!r}: {len(results)} characters in {(time.perf_counter() - start) * 1000:.1f}ms, "
+              f"e.g. {results[:16]}")
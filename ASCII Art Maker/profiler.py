@@ -0,0 +1,214 @@
+import csv
+import time
+import atexit
+from collections import deque
+from contextlib import nullcontext
+from typing import Optional
+
+import pygame
+
+from constants import *
+from glyphs import glyph_cache
+
+"""
+Measures where the editor's frames go, shown as an overlay with F3 and recorded to a CSV file with F4.
+
+Each frame is timed from when its events arrive to when the display is updated, so time spent
+asleep waiting for events is not counted. Drawing is broken down into stages, which must not
+be nested in one another so that their times add up.
+"""
+
+# In the order they happen in a frame, which is also the order of the CSV columns
+STAGES = ("events", "layer", "rectangles", "lines", "characters", "hover", "buttons", "overlay", "update")
+# Upper bounds of the frame time histogram's buckets in milliseconds; slower frames go in a last bucket
+HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16, 33, 66)
+OVERLAY_WIDTH = 360
+OVERLAY_MARGIN = 10
+OVERLAY_TEXT_SIZE = 16
+OVERLAY_LINE_HEIGHT = 17
+HISTOGRAM_HEIGHT = 48
+OVERLAY_COLOUR = (15, 15, 15)
+HISTOGRAM_COLOUR = AQUAMARINE
+SLOW_FRAME_COLOUR = DARK_ORANGE
+
+
+class _Stage:
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "FrameProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exception_info):
+        self.profiler.add_time(self.name, time.perf_counter() - self.start)
+
+
+class FrameProfiler:
+
+    """
+    Times the stages of each frame while the overlay is shown or a recording is running, and does
+    nothing otherwise, so that it can be left in the drawing code.
+    """
+
+    def __init__(self, history: int = PROFILER_HISTORY):
+        self.visible = False
+        self.frames = deque(maxlen=history)
+        self.stage_times = {}
+        self.frame_start = None
+        self.lap_start = 0.0
+        self.glyph_lookups = (glyph_cache.hits, glyph_cache.misses)
+        self.recording_path = None
+        self.recording_file = None
+        self.csv_writer = None
+        self.frame_number = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.visible or self.recording_file is not None
+
+    def reset(self):
+        self.frames.clear()
+        self.stage_times = {}
+        self.glyph_lookups = (glyph_cache.hits, glyph_cache.misses)
+
+    def toggle_overlay(self):
+        if not self.enabled:
+            self.reset()
+        self.visible = not self.visible
+
+    def stage(self, name: str):
+        return _Stage(self, name) if self.enabled else nullcontext()
+
+    def add_time(self, name: str, seconds: float):
+        self.stage_times[name] = self.stage_times.get(name, 0.0) + seconds
+
+    def begin_frame(self):
+        # Anything timed since the last frame ended, e.g. after the overlay was turned on mid-frame, is dropped
+        self.stage_times = {}
+        self.frame_start = self.lap_start = time.perf_counter() if self.enabled else None
+
+    def lap(self, name: str):
+        # Times whatever has happened since the frame began or the last lap, for work not in one block
+        if self.frame_start is not None:
+            now = time.perf_counter()
+            self.add_time(name, now - self.lap_start)
+            self.lap_start = now
+
+    def end_frame(self, updated_rects: int, art_box):
+        if self.frame_start is None:
+            return
+        frame_time = time.perf_counter() - self.frame_start
+        hits, misses = glyph_cache.hits - self.glyph_lookups[0], glyph_cache.misses - self.glyph_lookups[1]
+        self.glyph_lookups = (glyph_cache.hits, glyph_cache.misses)
+        self.frames.append((frame_time, self.stage_times, hits, misses, updated_rects))
+        if self.csv_writer is not None:
+            self.csv_writer.writerow([
+                self.frame_number, f"{frame_time * 1000:.3f}",
+                *(f"{self.stage_times.get(stage, 0.0) * 1000:.3f}" for stage in STAGES),
+                hits, misses, updated_rects, art_box.list_height, art_box.list_width, art_box.view_height,
+                art_box.view_width, ZOOM_LEVELS[art_box.zoom_level],
+            ])
+        self.frame_number += 1
+        self.stage_times = {}
+        self.frame_start = None
+
+    def start_recording(self, directory: str = PROFILE_DIRECTORY) -> str:
+        if not self.enabled:
+            self.reset()
+        os.makedirs(directory, exist_ok=True)
+        self.recording_path = os.path.join(directory, time.strftime("profile-%Y%m%d-%H%M%S.csv"))
+        self.recording_file = open(self.recording_path, "w", newline="")
+        self.csv_writer = csv.writer(self.recording_file)
+        self.csv_writer.writerow(["frame", "frame_ms", *(f"{stage}_ms" for stage in STAGES), "glyph_hits",
+                                  "glyph_misses", "updated_rects", "canvas_height", "canvas_width", "view_height",
+                                  "view_width", "zoom"])
+        self.frame_number = 0
+        return self.recording_path
+
+    def stop_recording(self) -> Optional[str]:
+        if self.recording_file is None:
+            return None
+        self.recording_file.close()
+        self.recording_file = self.csv_writer = None
+        return self.recording_path
+
+    def toggle_recording(self) -> Optional[str]:
+        # The path of the file started, or None when a recording is stopped
+        if self.recording_file is not None:
+            self.stop_recording()
+            return None
+        return self.start_recording()
+
+    def get_histogram(self) -> list:
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for frame_time, *_ in self.frames:
+            milliseconds = frame_time * 1000
+            counts[next((index for index, bound in enumerate(HISTOGRAM_BUCKETS) if milliseconds < bound),
+                        len(HISTOGRAM_BUCKETS))] += 1
+        return counts
+
+    def get_summary(self) -> list:
+        # The lines of text shown in the overlay, averaged over the frames in the history
+        count = len(self.frames)
+        frame_times = sorted(frame[0] for frame in self.frames)
+        hits = sum(frame[2] for frame in self.frames)
+        lookups = hits + sum(frame[3] for frame in self.frames)
+        updated_rects = sum(frame[4] for frame in self.frames) / count
+        lines = [
+            f"frame ms: {sum(frame_times) / count * 1000:.2f} mean, {frame_times[count // 2] * 1000:.2f} median, "
+            f"{frame_times[-1] * 1000:.1f} max",
+        ]
+        for stage in STAGES:
+            stage_time = sum(frame[1].get(stage, 0.0) for frame in self.frames) / count
+            lines.append(f"  {stage}: {stage_time * 1000:.3f}ms")
+        lines.append(f"glyph cache: {hits / lookups if lookups else 0.0:.1%} hits, {len(glyph_cache)} kept")
+        lines.append(f"updated rects: {self.frames[-1][4]} last, {updated_rects:.1f} mean")
+        if self.recording_file is not None:
+            lines.append(f"recording frame {self.frame_number}")
+        return lines
+
+    def get_overlay_rect(self, screen: pygame.Surface) -> pygame.Rect:
+        height = (len(STAGES) + 5) * OVERLAY_LINE_HEIGHT + HISTOGRAM_HEIGHT + OVERLAY_MARGIN * 3
+        return pygame.rect.Rect(screen.get_width() - OVERLAY_WIDTH - OVERLAY_MARGIN, OVERLAY_MARGIN,
+                                OVERLAY_WIDTH, height)
+
+    def draw_histogram(self, screen: pygame.Surface, rect: pygame.Rect):
+        counts = self.get_histogram()
+        bar_width = rect.width // len(counts)
+        most = max(counts) or 1
+        font = glyph_cache.font_registry.get_font(OVERLAY_TEXT_SIZE - 4)
+        for index, count in enumerate(counts):
+            bar_height = round((rect.height - OVERLAY_LINE_HEIGHT) * count / most)
+            bar = pygame.rect.Rect(rect.left + index * bar_width, rect.bottom - OVERLAY_LINE_HEIGHT - bar_height,
+                                   bar_width - 2, bar_height)
+            # Frames over the 60 frames per second budget are highlighted
+            slow = index > 0 and HISTOGRAM_BUCKETS[index - 1] >= 16
+            pygame.draw.rect(screen, SLOW_FRAME_COLOUR if slow else HISTOGRAM_COLOUR, bar)
+            label = f"<{HISTOGRAM_BUCKETS[index]}" if index < len(HISTOGRAM_BUCKETS) else f"{HISTOGRAM_BUCKETS[-1]}+"
+            screen.blit(font.render(label, True, TEXT_COLOUR), (bar.left, rect.bottom - OVERLAY_LINE_HEIGHT + 2))
+
+    def draw(self, screen: pygame.Surface) -> pygame.Rect:
+        # The text changes every frame, so it is rendered with the font directly rather than through the
+        # glyph cache, which would fill the cache and skew its hit rate
+        rect = self.get_overlay_rect(screen)
+        screen.fill(OVERLAY_COLOUR, rect)
+        if not self.frames:
+            return rect
+        font = glyph_cache.font_registry.get_font(OVERLAY_TEXT_SIZE)
+        top = rect.top + OVERLAY_MARGIN
+        for line in self.get_summary():
+            screen.blit(font.render(line, True, TEXT_COLOUR), (rect.left + OVERLAY_MARGIN, top))
+            top += OVERLAY_LINE_HEIGHT
+        self.draw_histogram(screen, pygame.rect.Rect(rect.left + OVERLAY_MARGIN, top + OVERLAY_MARGIN,
+                                                     rect.width - OVERLAY_MARGIN * 2, HISTOGRAM_HEIGHT))
+        return rect
+
+
+# Shared by the drawing code of every box and the editor's main loop
+profiler = FrameProfiler()
+atexit.register(profiler.stop_recording)
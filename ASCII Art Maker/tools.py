@@ -0,0 +1,193 @@
+import math
+from bisect import bisect_right
+from operator import itemgetter
+from typing import Iterator, List, Optional, Tuple
+
+from constants import *
+
+# The tools which the left and right mouse buttons use in the art box, cycled through with meta+t
+TOOLS = ("brush", "rectangle", "rectangle outline", "ellipse", "ellipse outline", "copy")
+
+# A row, the column a run of cells in it starts at and the column the run ends before
+Span = Tuple[int, int, int]
+
+
+def bresenham_line(start: tuple, end: tuple) -> Iterator[tuple]:
+    # Every cell on the line from start to end, inclusive, with no gaps
+    x, y = start
+    end_x, end_y = end
+    delta_x, delta_y = abs(end_x - x), -abs(end_y - y)
+    step_x, step_y = 1 if x < end_x else -1, 1 if y < end_y else -1
+    error = delta_x + delta_y
+    while True:
+        yield x, y
+        if x == end_x and y == end_y:
+            return
+        doubled_error = 2 * error
+        if doubled_error >= delta_y:
+            error += delta_y
+            x += step_x
+        if doubled_error <= delta_x:
+            error += delta_x
+            y += step_y
+
+
+class DragStroke:
+
+    """Paints every cell the mouse is dragged over while a button is held in a box."""
+
+    def __init__(self, box, button: int, character: str, start: tuple):
+        self.box = box
+        self.button = button
+        # As with clicking, the left button paints the character and the right button erases
+        self.character = character if button == 1 else NO_DATA
+        self.last_cell = start
+
+    def move_to(self, mouse_position: tuple):
+        # Called with only the latest mouse position of a frame, so the cells in between are interpolated
+        cell = self.box.convert_mouse_position_to_coordinates(mouse_position)
+        if cell == self.last_cell:
+            return
+        for x, y in bresenham_line(self.last_cell, cell):
+            if self.box.contains(x, y):
+                self.box.set_cell(x, y, self.character)
+        self.last_cell = cell
+
+
+def get_corners(start: tuple, end: tuple) -> tuple:
+    (start_x, start_y), (end_x, end_y) = start, end
+    return min(start_x, end_x), min(start_y, end_y), max(start_x, end_x), max(start_y, end_y)
+
+
+def rectangle_spans(start: tuple, end: tuple) -> List[Span]:
+    left, top, right, bottom = get_corners(start, end)
+    return [(y, left, right + 1) for y in range(top, bottom + 1)]
+
+
+def ellipse_spans(start: tuple, end: tuple) -> List[Span]:
+    # The ellipse inscribed in the rectangle between the two cells
+    left, top, right, bottom = get_corners(start, end)
+    centre_x, centre_y = (left + right) / 2, (top + bottom) / 2
+    radius_x, radius_y = (right - left) / 2 + 0.5, (bottom - top) / 2 + 0.5
+    spans = []
+    for y in range(top, bottom + 1):
+        half_width = radius_x * math.sqrt(max(0.0, 1 - ((y - centre_y) / radius_y) ** 2))
+        span_left, span_right = math.ceil(centre_x - half_width), math.floor(centre_x + half_width)
+        if span_left <= span_right:
+            spans.append((y, span_left, span_right + 1))
+    return spans
+
+
+def outline_spans(spans: List[Span]) -> List[Span]:
+    # The cells of a filled shape, given as one span per row from top to bottom,
+    # which are next to a cell outside the shape
+    rows = {y: (left, right) for y, left, right in spans}
+    outline = []
+    for y, left, right in spans:
+        above_left, above_right = rows.get(y - 1, (0, 0))
+        below_left, below_right = rows.get(y + 1, (0, 0))
+        inner_left = max(left + 1, above_left, below_left)
+        inner_right = min(right - 1, above_right, below_right)
+        if inner_left >= inner_right:
+            outline.append((y, left, right))
+        else:
+            outline.append((y, left, inner_left))
+            outline.append((y, inner_right, right))
+    return outline
+
+
+def flood_fill_spans(box, x: int, y: int) -> List[Span]:
+    """
+    The spans of cells connected to (x, y) with the same character. Each row is split into
+    its runs of that character once, a chunk row at a time, and the fill spreads from run to
+    run, so no cell is looked at on its own and nothing recurses.
+    """
+    target = box.get_span(y, x, x + 1)[0]
+    rows = {}
+
+    def get_row_runs(row_y: int) -> list:
+        if (runs := rows.get(row_y)) is None:
+            runs = rows[row_y] = box.get_runs(row_y, target)
+        return runs
+
+    # The run containing (x, y), which is the last to start at or before x
+    seed = (y, bisect_right(get_row_runs(y), x, key=itemgetter(0)) - 1)
+    visited = {seed}
+    seeds = [seed]
+    spans = []
+    while seeds:
+        seed_y, index = seeds.pop()
+        left, right = rows[seed_y][index]
+        spans.append((seed_y, left, right))
+        for next_y in (seed_y - 1, seed_y + 1):
+            if not 0 <= next_y < box.list_height:
+                continue
+            next_runs = get_row_runs(next_y)
+            # Every run which touches the span, starting with the first to end after its left
+            next_index = bisect_right(next_runs, left, key=itemgetter(1))
+            while next_index < len(next_runs) and next_runs[next_index][0] < right:
+                if (next_y, next_index) not in visited:
+                    visited.add((next_y, next_index))
+                    seeds.append((next_y, next_index))
+                next_index += 1
+    return spans
+
+
+class Region:
+
+    """A rectangle of characters copied from a box."""
+
+    def __init__(self, rows: List[list]):
+        self.rows = rows
+        self.height = len(rows)
+        self.width = len(rows[0]) if rows else 0
+
+
+def copy_region(box, start: tuple, end: tuple) -> Region:
+    left, top, right, bottom = get_corners(start, end)
+    left, top = max(left, 0), max(top, 0)
+    right, bottom = min(right, box.list_width - 1), min(bottom, box.list_height - 1)
+    return Region([box.get_span(y, left, right + 1) for y in range(top, bottom + 1)])
+
+
+def paste_region(box, region: Region, position: tuple, transparent: bool = True):
+    # Stamped with its top left at the position; blank cells of a transparent stamp are left alone
+    x, y = position
+    for row_y, row in enumerate(region.rows, y):
+        if not 0 <= row_y < box.list_height:
+            continue
+        start = 0
+        while start < len(row):
+            if transparent and row[start] == NO_DATA:
+                start += 1
+                continue
+            end = start + 1
+            while end < len(row) and not (transparent and row[end] == NO_DATA):
+                end += 1
+            left, right = max(x + start, 0), min(x + end, box.list_width)
+            if left < right:
+                box.set_span(row_y, left, row[left - x:right - x])
+            start = end
+
+
+class ShapeDrag:
+
+    """Applies a shape tool to the rectangle between where a mouse button is pressed and released."""
+
+    def __init__(self, box, tool: str, button: int, character: str, start: tuple):
+        self.box = box
+        self.tool = tool
+        self.button = button
+        self.character = character if button == 1 else NO_DATA
+        self.start = start
+
+    def finish(self, mouse_position: tuple) -> Optional[Region]:
+        # Returns the copied region when the tool is the copy tool
+        end = self.box.convert_mouse_position_to_coordinates(mouse_position)
+        if self.tool == "copy":
+            return copy_region(self.box, self.start, end)
+        spans = ellipse_spans(self.start, end) if self.tool.startswith("ellipse") else rectangle_spans(self.start, end)
+        if self.tool.endswith("outline"):
+            spans = outline_spans(spans)
+        self.box.fill_spans(spans, self.character)
+        return None
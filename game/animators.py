@@ -1,15 +1,13 @@
 import os
-import time
-import threading
-import random
-from typing import Callable
+from typing import Callable, Optional
 from functools import wraps
 
-from getkey import getkey, keys
+from getkey import keys
 
 from text.colours import FORE_COLOUR_MAPPING
 from mechanics.constants import BLANK_CHARACTER
 from mechanics.maths.algebra import ExponentialEquation
+from mechanics.types import Numeric
 from mechanics.movement.position import Position, RelativePosition
 from mechanics.movement.vectors import UnitVector, Vector
 from mechanics.sprites.gamesprites import (
@@ -18,13 +16,15 @@ from mechanics.sprites.gamesprites import (
     LoadingSprite
 )
 from mechanics.animation import Animator
+from game.scenes import Scene, SceneGraph
+from mechanics.simulation import perf_counter, sleep, get_random
 from mechanics.terrain import Terrain
 from text.character import ModifiedCharacter
 
 
 class BasketballGameAnimator(Animator):
 
-    def __init__(self):
+    def __init__(self, angle_limit: Numeric = 45, velocity_divisor: Numeric = 6):
         hoop_position = Position(11, 47)
         terrain = Terrain("court.json", PlayerSprite("shooter.json", Position(14, 0)),
                           ground_characters={"⎻"}, uncollidable_characters={"⎻"})
@@ -42,16 +42,23 @@ class BasketballGameAnimator(Animator):
             RelativePosition(0, 1).normalize_wrt_sprite(hoop_position),
             self.__in_hoop_position,
         }
+        self.__angle_limit = angle_limit
+        self.__velocity_divisor = velocity_divisor
+        self.__angle_start_time = float()
+        self.__shots_taken = 0
         super().__init__(terrain)
-        self.__running = True
         self.__initial_press = False
         self.__thrown_ball = False
         self.__ball_release = True
         self.__hoop_scored = None
 
     @property
-    def running(self) -> bool:
-        return self.__running
+    def hoop_scored(self) -> bool:
+        return bool(self.__hoop_scored)
+
+    @property
+    def shots_taken(self) -> int:
+        return self.__shots_taken
 
     def shoot_ball(self, start_time: float):
         while self.__pressed_key == "r":
@@ -64,30 +71,31 @@ class BasketballGameAnimator(Animator):
         # Position will move downwards because Q3 is measured from the bottom,
         # hence the adding of the up unit vector
         starting_position += self.__ball_position + UnitVector.UP * 2
-        angle = ExponentialEquation(limit=45).get_value_at_time(time.perf_counter() - start_time)
-        self.__ball_sprite = BasketballSprite([[self.__ball_character]], velocity=angle // 6, angle=angle,
+        angle = ExponentialEquation(limit=self.__angle_limit).get_value_at_time(perf_counter() - start_time)
+        self.__ball_sprite = BasketballSprite([[self.__ball_character]], velocity=angle // self.__velocity_divisor,
+                                              angle=angle,
                                               gravity=1, projection_quadrant=3,
                                               starting_position=starting_position)
         self.__ball_sprite.paint(fore_all="red")
         self.__thrown_ball = True
-        self._terrain.sprites.append(self.__ball_sprite)
-        self._terrain.player_sprite[y][x] = BLANK_CHARACTER
+        self.__shots_taken += 1
+        self._terrain.enqueue_spawn(self.__ball_sprite)
+        self._terrain.enqueue_set_cell(self._terrain.player_sprite, Position(y, x), BLANK_CHARACTER)
 
     def terrain_output(self):
         self.hide_cursor()
-        start_time = time.perf_counter()
-        while self.__running:
+        start_time = perf_counter()
+        while self._running:
             if self.__hoop_scored and self.__time_of_hoop_scoring is None:
-                self.__time_of_hoop_scoring = time.perf_counter()
-            if type(self.__time_of_hoop_scoring) is float and time.perf_counter() - self.__time_of_hoop_scoring >= 2:
-                time.sleep(2)
-                self.__running = False
+                self.__time_of_hoop_scoring = perf_counter()
+            if type(self.__time_of_hoop_scoring) is float and perf_counter() - self.__time_of_hoop_scoring >= 2:
+                sleep(2)
+                self._running = False
                 self.exit()
-            self._time_elapsed = time.perf_counter() - start_time
+            self._time_elapsed = perf_counter() - start_time
             self.update_terrain()
-            os.system("clear")
-            print(self._terrain)
-            self._vector_stream.reset()
+            self.present()
+            self._input_queue.record_display()
             self._terrain.reset()
             if isinstance(self.__ball_sprite, BasketballSprite):
                 if not self.__ball_sprite.alive:
@@ -104,33 +112,31 @@ class BasketballGameAnimator(Animator):
                     self._terrain.sprites.remove(self.__ball_sprite)
                     self.__hoop_scored = True
                     self.__ball_sprite = None
-            time.sleep(0.1)
+            sleep(0.1)
 
-    def player_movement_input(self):
-        angle_start_time = float()
-        while self.__running:
-            self.__ball_release = True
-            vector = Vector.ZERO
-            self.__pressed_key = getkey()
-            match self.__pressed_key:
-                case "r":
-                    self.__ball_release = False
-                    if not self.__initial_press:
-                        self.__initial_press = True
-                        angle_start_time = time.perf_counter()
-                case keys.RIGHT | "d":
-                    vector = UnitVector.RIGHT
-                case keys.LEFT | "a":
-                    vector = UnitVector.LEFT
-            if self.__ball_release and self.__initial_press and not self.__thrown_ball and not self.__hoop_scored:
-                ball_shoot_thread = threading.Thread(target=self.shoot_ball, args=(angle_start_time,))
-                ball_shoot_thread.start()
-            self._vector_stream.set_vector(vector)
+    def handle_key(self, key: str | None):
+        self.__ball_release = True
+        vector = Vector.ZERO
+        self.__pressed_key = key
+        match self.__pressed_key:
+            case "r":
+                self.__ball_release = False
+                if not self.__initial_press:
+                    self.__initial_press = True
+                    self.__angle_start_time = perf_counter()
+            case keys.RIGHT | "d":
+                vector = UnitVector.RIGHT
+            case keys.LEFT | "a":
+                vector = UnitVector.LEFT
+        if self.__ball_release and self.__initial_press and not self.__thrown_ball and not self.__hoop_scored:
+            self.start_task(self.shoot_ball, self.__angle_start_time)
+        self._input_queue.push(vector)
 
 
 class DodgerGameAnimator(Animator):
 
-    def __init__(self):
+    def __init__(self, spawn_interval: Numeric = 5, sprite_quantities: Optional[dict[int, int]] = None,
+                 spawn_distance_from_player: Numeric = 7):
         self.__starting_player_health = 6
         player_sprite = HealthPlayerSprite([["(", "Ο", ")"]], Position(11, 20), self.__starting_player_health)
         player_sprite.paint({"fore": {"cyan": ["(", ")"], "Ο": "red"}})
@@ -139,21 +145,23 @@ class DodgerGameAnimator(Animator):
         terrain.sprites.append(EllipsisLoadingSprite(Position(2, 17), length=5, update_interval=0.57))
         terrain.sprites.append(LoadingSprite(Position(2, 16), update_interval=0.35))
         terrain.sprites.append(LoadingSprite(Position(2, 22), update_interval=0.74))
-        self.__colours = list(set(FORE_COLOUR_MAPPING.keys()) - {"RESET", "LIGHTBLACK"})
+        self.__random = get_random()
+        # Sorted, as set ordering varies between runs and would make seeded games irreproducible
+        self.__colours = sorted(set(FORE_COLOUR_MAPPING.keys()) - {"RESET", "LIGHTBLACK"})
         self.__game_duration = 45
         self.__game_over_sprite: CharacterStreamSprite | None = None
         self.__last_ten_seconds = False
         self.__frozen = False
         self.__game_won = False
-        self.__running = True
+        self.__survival_time: float | None = None
         self.__timer_sprite = TimerSprite(Position(1, 33), seconds=self.__game_duration)
         self.__health_bar = HealthBarSprite(self.__starting_player_health, Position(1, 1), player_sprite)
-        self.__spawn_interval = 5
-        self.__spawn_distance_from_player = 7
+        self.__spawn_interval = spawn_interval
+        self.__spawn_distance_from_player = spawn_distance_from_player
         self.__starting_shields = 6
         self.__min_projectile_x, self.__max_projectile_x = 1, terrain.width - 2
         self.__min_projectile_y, self.__max_projectile_y = 5, terrain.height - 2
-        self.__sprite_quantities = {
+        self.__sprite_quantities = sprite_quantities.copy() if sprite_quantities is not None else {
             2: 3,
             4: 4,
             6: 5,
@@ -168,21 +176,33 @@ class DodgerGameAnimator(Animator):
         super().__init__(terrain)
 
     @property
-    def running(self) -> bool:
-        return self.__running
+    def game_won(self) -> bool:
+        return self.__game_won
+
+    @property
+    def starting_player_health(self) -> int:
+        return self.__starting_player_health
+
+    @property
+    def survival_time(self) -> float:
+        return self._time_elapsed if self.__survival_time is None else self.__survival_time
+
+    @property
+    def player_health(self) -> int:
+        return max(self._player_sprite.health, 0)
 
     def get_random_position(self) -> Position:
         unchoosable_coordinates = self._terrain.get_sprite_coverage()
         random_position = Position(
-            random.randint(self.__min_projectile_y, self.__max_projectile_y),
-            random.randint(self.__min_projectile_x, self.__max_projectile_x),
+            self.__random.randint(self.__min_projectile_y, self.__max_projectile_y),
+            self.__random.randint(self.__min_projectile_x, self.__max_projectile_x),
         )
         magnitude_from_player = abs(Vector(*(random_position - self._terrain.player_sprite.position)))
         outside_proximity = magnitude_from_player > self.__spawn_distance_from_player
         while random_position in unchoosable_coordinates and outside_proximity:
             random_position = Position(
-                random.randint(self.__min_projectile_y, self.__max_projectile_y),
-                random.randint(self.__min_projectile_x, self.__max_projectile_x),
+                self.__random.randint(self.__min_projectile_y, self.__max_projectile_y),
+                self.__random.randint(self.__min_projectile_x, self.__max_projectile_x),
             )
             magnitude_from_player = abs(Vector(*(random_position - self._terrain.player_sprite.position)))
             outside_proximity = magnitude_from_player > self.__spawn_distance_from_player
@@ -191,9 +211,9 @@ class DodgerGameAnimator(Animator):
     def spawn_random_projectiles(self, intervals_passed: int, num: int = 1):
         for _ in range(num):
             if self.__game_duration - self.__timer_sprite.get_seconds_passed() <= 10:
-                self._terrain.paint({"fore": {random.choice(self.__colours): ["∆", "•"]}})
-                self.__health_bar.paint({"back": {" ": random.choice(self.__colours)}})
-                colour = random.choice(self.__colours)
+                self._terrain.paint({"fore": {self.__random.choice(self.__colours): ["∆", "•"]}})
+                self.__health_bar.paint({"back": {" ": self.__random.choice(self.__colours)}})
+                colour = self.__random.choice(self.__colours)
                 if not self.__last_ten_seconds:
                     self.__sprite_quantities[2] += 2
                     self.__sprite_quantities[4] += 2
@@ -203,9 +223,9 @@ class DodgerGameAnimator(Animator):
                 colour = None
             match intervals_passed:
                 case 2:
-                    gradient = (random.randint(30, 50) if intervals_passed >= 4 else random.randint(10, 30)) / 10
-                    gradient *= random.choice((-1, 1))
-                    projection_quadrant = random.randint(1, 4)
+                    gradient = (self.__random.randint(30, 50) if intervals_passed >= 4 else self.__random.randint(10, 30)) / 10
+                    gradient *= self.__random.choice((-1, 1))
+                    projection_quadrant = self.__random.randint(1, 4)
                     projectile = DiagonalSprite(
                         [["✯"]], projection_quadrant, gradient, self.get_random_position(),  # type: ignore
                     )
@@ -213,14 +233,14 @@ class DodgerGameAnimator(Animator):
                     self._terrain.sprites.append(projectile)
                 case 4:
                     if intervals_passed >= 7:
-                        gradient = random.randint(600, 750) / 10
+                        gradient = self.__random.randint(600, 750) / 10
                     else:
-                        gradient = random.randint(500, 540) / 10
-                    projection_quadrant = random.randint(1, 2)
+                        gradient = self.__random.randint(500, 540) / 10
+                    projection_quadrant = self.__random.randint(1, 2)
                     sprite_array = [["⇉", "⇉"]] if projection_quadrant == 2 else [["⇇", "⇇"]]
                     starting_position = Position(
-                        random.randint(self.__min_projectile_y, self.__max_projectile_y),
-                        random.choice([self.__min_projectile_x, self.__max_projectile_x])
+                        self.__random.randint(self.__min_projectile_y, self.__max_projectile_y),
+                        self.__random.choice([self.__min_projectile_x, self.__max_projectile_x])
                     )
                     projectile = ArrowSprite(
                         sprite_array, projection_quadrant, gradient, starting_position  # type: ignore
@@ -229,32 +249,32 @@ class DodgerGameAnimator(Animator):
                     self._terrain.sprites.append(projectile)
                 case 6:
                     starting_position = Position(
-                        random.randint(self.__min_projectile_y, self.__max_projectile_y),
-                        random.choice([self.__min_projectile_x, self.__max_projectile_x])
+                        self.__random.randint(self.__min_projectile_y, self.__max_projectile_y),
+                        self.__random.choice([self.__min_projectile_x, self.__max_projectile_x])
                     )
                     projectile = BallSprite(
-                        [["●"]], random.randint(3, 10), random.randint(1, 45), random.randint(1, 3),
-                        random.randint(1, 2), starting_position  # type: ignore
+                        [["●"]], self.__random.randint(3, 10), self.__random.randint(1, 45), self.__random.randint(1, 3),
+                        self.__random.randint(1, 2), starting_position  # type: ignore
                     )
                     projectile.paint(fore_all=colour or "red")
                     self._terrain.sprites.append(projectile)
 
     def spawn_shields(self, quantity: int):
-        for sprite in self._terrain.sprites:
+        for sprite in self._terrain.sprites.copy():
             if type(sprite) is ShieldSprite:
                 self._terrain.sprites.remove(sprite)
         for _ in range(quantity if quantity > 0 else 0):
             position = self.get_random_position()
-            character = random.choice(["━", "║", "☲", "☷", "☵", "☰"])
+            character = self.__random.choice(["━", "║", "☲", "☷", "☵", "☰"])
             self._terrain.sprites.append(ShieldSprite(character, position))
 
     def terrain_output(self):
         self.hide_cursor()
-        start_time = time.perf_counter()
+        start_time = perf_counter()
         intervals = 1
         self.spawn_shields(self.__starting_shields - intervals + 1)
-        while self.__running:
-            self._time_elapsed = time.perf_counter() - start_time
+        while self._running:
+            self._time_elapsed = perf_counter() - start_time
             self.__health_bar.set_health()
             if not self.__frozen:
                 if self.__timer_sprite.get_seconds_passed() // (self.__spawn_interval * intervals) == 1:
@@ -275,49 +295,50 @@ class DodgerGameAnimator(Animator):
                         self.spawn_random_projectiles(sprite_num, num=max_amount - amount)
             self._player_sprite: HealthPlayerSprite
             if self._player_sprite.health <= 0 and not self.__frozen:
-                for terrain_sprite in self._terrain.sprites:
+                for terrain_sprite in self._terrain.sprites.copy():
                     if isinstance(terrain_sprite, (LoadingSprite, EllipsisLoadingSprite)):
                         self._terrain.remove_sprite(terrain_sprite)
                 self._terrain.remove_sprite(self.__timer_sprite)
                 self._terrain.paint({"fore": {"black": ["∆", "•"]}})
                 self.__game_over_sprite = CharacterStreamSprite("Game over!", Position(2, 15))
                 self._terrain.sprites.append(self.__game_over_sprite)
+                self.__survival_time = self._time_elapsed
                 self.__frozen = True
             if not self.__frozen:
                 self.update_terrain()
             else:
+                self._terrain.apply_commands()
                 self._terrain.update_sprites(self._time_elapsed)
                 self._terrain.draw_sprites()
-            os.system("clear")
-            print(self._terrain)
-            self._vector_stream.reset()
+            self.present()
+            self._input_queue.record_display()
             sprite_is_character_stream = type(self.__game_over_sprite) is CharacterStreamSprite
             if self.__frozen and sprite_is_character_stream and self.__game_over_sprite.exhausted:
-                time.sleep(4)
-                self.__running = False
+                sleep(4)
+                self._running = False
                 self.exit()
             if not self.__frozen:
                 self._terrain.reset()
             if self.__timer_sprite.get_seconds_passed() == self.__game_duration and not self.__frozen:
-                time.sleep(4)
-                self.__running = False
-            time.sleep(0.1)
-
-    def player_movement_input(self):
-        while self.__running:
-            vector = Vector.ZERO
-            match getkey():
-                case keys.UP | "w":
-                    vector = UnitVector.UP
-                case keys.DOWN | "s":
-                    vector = UnitVector.DOWN
-                case keys.RIGHT | "d":
-                    vector = UnitVector.RIGHT
-                case keys.LEFT | "a":
-                    vector = UnitVector.LEFT
-                case "c":
-                    self.__running = False
-            self._vector_stream.set_vector(vector)
+                self.__game_won = True
+                sleep(4)
+                self._running = False
+            sleep(0.1)
+
+    def handle_key(self, key: str | None):
+        vector = Vector.ZERO
+        match key:
+            case keys.UP | "w":
+                vector = UnitVector.UP
+            case keys.DOWN | "s":
+                vector = UnitVector.DOWN
+            case keys.RIGHT | "d":
+                vector = UnitVector.RIGHT
+            case keys.LEFT | "a":
+                vector = UnitVector.LEFT
+            case "c":
+                self._running = False
+        self._input_queue.push(vector)
 
 
 class PreDodgerGameAnimator(Animator):
@@ -343,18 +364,13 @@ The second game requires the R key.\nGood luck."""
         terrain.sprites.append(EllipsisLoadingSprite(Position(23, 66)))
         terrain.sprites.append(LoadingSprite(Position(23, 65)))
         super().__init__(terrain)
-        self.__running = True
         self.__start_second_message = False
 
-    @property
-    def running(self) -> bool:
-        return self.__running
-
     def terrain_output(self):
         self.hide_cursor()
-        start_time = time.perf_counter()
-        while self.__running:
-            self._time_elapsed = time.perf_counter() - start_time
+        start_time = perf_counter()
+        while self._running:
+            self._time_elapsed = perf_counter() - start_time
             if self.__starting_message.exhausted and not self.__start_second_message:
                 self._terrain.sprites.clear()
                 self._terrain.sprites.append(self.__second_message)
@@ -365,23 +381,25 @@ The second game requires the R key.\nGood luck."""
                     )
                     self._terrain.set_position_to(position, "∆")
                     self._terrain.paint({"fore": {"∆": "black"}})
-                time.sleep(2)
+                sleep(2)
                 self.__start_second_message = True
             if self.__second_message.exhausted:
-                time.sleep(3)
-                self.__running = False
+                sleep(3)
+                self._running = False
                 with open("played.txt", "w") as file:
                     file.write("True")
             self.update_terrain()
-            os.system("clear")
-            print(self._terrain)
+            self.present()
             self._terrain.reset()
-            time.sleep(0.01)
+            sleep(0.01)
 
-    def player_movement_input(self):
-        match getkey():
+    def handle_key(self, key: str | None):
+        match key:
             case "c" | "n":
-                self.__running = False
+                self._running = False
+
+    def player_movement_input(self):
+        self.handle_key(self.read_key())
 
 
 class PreBasketballGameAnimator(Animator):
@@ -398,30 +416,27 @@ class PreBasketballGameAnimator(Animator):
         terrain.sprites.append(self.__message)
         terrain.sprites.append(EllipsisLoadingSprite(Position(23, 66), update_interval=0.71))
         terrain.sprites.append(LoadingSprite(Position(23, 65), update_interval=0.67))
-        self.__running = True
         super().__init__(terrain)
 
-    @property
-    def running(self) -> bool:
-        return self.__running
-
     def terrain_output(self):
         self.hide_cursor()
-        start_time = time.perf_counter()
-        while self.__running:
-            self._time_elapsed = time.perf_counter() - start_time
+        start_time = perf_counter()
+        while self._running:
+            self._time_elapsed = perf_counter() - start_time
             if self.__message.exhausted:
-                self.__running = False
+                self._running = False
             self.update_terrain()
-            os.system("clear")
-            print(self._terrain)
+            self.present()
             self._terrain.reset()
-            time.sleep(0.01)
+            sleep(0.01)
 
-    def player_movement_input(self):
-        match getkey():
+    def handle_key(self, key: str | None):
+        match key:
             case "c" | "n":
-                self.__running = False
+                self._running = False
+
+    def player_movement_input(self):
+        self.handle_key(self.read_key())
 
 
 def terminal_output(function: Callable):
@@ -440,4 +455,9 @@ def terminal_output(function: Callable):
     return wrapper
 
 
-animators = iter((PreDodgerGameAnimator, DodgerGameAnimator, PreBasketballGameAnimator, BasketballGameAnimator))
+scene_graph = SceneGraph([
+    Scene("pre_dodger", PreDodgerGameAnimator, next_scene="dodger"),
+    Scene("dodger", DodgerGameAnimator, next_scene="pre_basketball"),
+    Scene("pre_basketball", PreBasketballGameAnimator, next_scene="basketball"),
+    Scene("basketball", BasketballGameAnimator),
+], start="pre_dodger")
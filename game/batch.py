@@ -0,0 +1,152 @@
+import os
+import csv
+import sys
+import json
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+# Run as a script, only this file's directory is importable, so the project it is part of is added
+# before the game's modules are imported
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+if PROJECT_DIRECTORY not in sys.path:
+    sys.path.append(PROJECT_DIRECTORY)
+
+from game.animators import DodgerGameAnimator, BasketballGameAnimator
+from game.headless import IdleKeyPolicy, RandomKeyPolicy, ScriptedKeyPolicy, KeyPolicy, run_headless
+
+"""
+Sweeps game tuning parameters across many seeded headless matches on a process pool.
+
+Every match is independent, so matches are fanned out over all cores and their results
+are streamed to a JSONL file in submission order as they complete. A CSV file is written
+once every match is done, as its header has a column for every field of any result.
+"""
+
+# Mixed into a match's seed to seed its random input, far from any seed a sweep would give a match
+INPUT_SEED_MASK = 0x5DEECE66D
+
+GAMES = {
+    "dodger": (DodgerGameAnimator, ("w", "a", "s", "d")),
+    "basketball": (BasketballGameAnimator, ("r", "a", "d")),
+}
+
+
+class MatchJob:
+
+    __slots__ = ("game", "seed", "parameters", "policy", "script", "max_time")
+
+    def __init__(self, game: str, seed: int, parameters: dict[str, Any], policy: str, script: str,
+                 max_time: float):
+        self.game = game
+        self.seed = seed
+        self.parameters = parameters
+        self.policy = policy
+        self.script = script
+        self.max_time = max_time
+
+    def create_key_policy(self) -> KeyPolicy:
+        match self.policy:
+            case "random":
+                # Scrambled rather than offset, as match seeds are consecutive and seed + 1 is the
+                # next match's game seed, which would correlate one match's input with the next's spawning
+                return RandomKeyPolicy(GAMES[self.game][1], seed=self.seed ^ INPUT_SEED_MASK)
+            case "scripted":
+                return ScriptedKeyPolicy(self.script)
+            case _:
+                return IdleKeyPolicy()
+
+
+def run_job(job: MatchJob) -> dict[str, Any]:
+    animator_class = GAMES[job.game][0]
+    result = run_headless(animator_class, seed=job.seed, key_policy=job.create_key_policy(),
+                          max_time=job.max_time, animator_kwargs=job.parameters)
+    result["policy"] = job.policy
+    for name, value in job.parameters.items():
+        result[name] = ",".join(map(str, value.values())) if isinstance(value, dict) else value
+    return result
+
+
+def parse_sprite_quantities(value: str) -> dict[int, int]:
+    # Quantities of diagonal, arrow and ball projectiles, e.g. "3,4,5"
+    quantities = list(map(int, value.split(",")))
+    if len(quantities) != 3:
+        raise argparse.ArgumentTypeError("expected three comma-separated quantities")
+    return dict(zip((2, 4, 6), quantities))
+
+
+def get_parameter_grid(arguments: argparse.Namespace) -> list[dict[str, Any]]:
+    if arguments.game == "dodger":
+        sweep = {
+            "spawn_interval": arguments.spawn_interval,
+            "sprite_quantities": arguments.sprite_quantities,
+            "spawn_distance_from_player": arguments.spawn_distance,
+        }
+    else:
+        sweep = {
+            "angle_limit": arguments.angle_limit,
+            "velocity_divisor": arguments.velocity_divisor,
+        }
+    sweep = {name: values for name, values in sweep.items() if values}
+    return [dict(zip(sweep, values)) for values in itertools.product(*sweep.values())]
+
+
+def create_jobs(arguments: argparse.Namespace) -> Iterator[MatchJob]:
+    for parameters in get_parameter_grid(arguments):
+        for seed in range(arguments.first_seed, arguments.first_seed + arguments.seeds):
+            yield MatchJob(arguments.game, seed, parameters, arguments.policy, arguments.script, arguments.max_time)
+
+
+def write_results(results: Iterable[dict[str, Any]], file: TextIO, file_format: str) -> int:
+    if file_format == "csv":
+        results = list(results)
+        # Fields in the order they first appear; a result without one of them leaves its cell empty
+        fieldnames = list(dict.fromkeys(name for result in results for name in result))
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(results)
+        file.flush()
+        return len(results)
+    count = 0
+    for result in results:
+        file.write(json.dumps(result) + "\n")
+        file.flush()
+        count += 1
+    return count
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Run seeded headless matches across a grid of game settings.")
+    parser.add_argument("game", choices=GAMES)
+    parser.add_argument("--seeds", type=int, default=100, help="matches per parameter combination")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--policy", choices=("idle", "random", "scripted"), default="random")
+    parser.add_argument("--script", default="rrrrrd", help="keys pressed one per tick by the scripted policy")
+    parser.add_argument("--max-time", type=float, default=120, help="simulated seconds before a match is stopped")
+    parser.add_argument("--spawn-interval", type=float, nargs="*")
+    parser.add_argument("--sprite-quantities", type=parse_sprite_quantities, nargs="*")
+    parser.add_argument("--spawn-distance", type=float, nargs="*")
+    parser.add_argument("--angle-limit", type=float, nargs="*")
+    parser.add_argument("--velocity-divisor", type=float, nargs="*")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="JSONL or CSV file to write to; standard output if omitted")
+    parser.add_argument("--format", choices=("jsonl", "csv"))
+    arguments = parser.parse_args(argv)
+
+    file_format = arguments.format or ("csv" if (arguments.output or "").endswith(".csv") else "jsonl")
+    jobs = list(create_jobs(arguments))
+    # Large chunks keep the per-match overhead of the pool small once there are thousands of matches
+    chunk_size = max(1, len(jobs) // (arguments.workers * 8))
+    file = open(arguments.output, "w", newline="") if arguments.output else sys.stdout
+    try:
+        with ProcessPoolExecutor(max_workers=arguments.workers) as executor:
+            count = write_results(executor.map(run_job, jobs, chunksize=chunk_size), file, file_format)
+    finally:
+        if file is not sys.stdout:
+            file.close()
+    print(f"Simulated {count} matches.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import io
+import time
+import random
+import itertools
+from contextlib import redirect_stdout
+from statistics import mean
+from typing import Any, Callable, Iterable, Optional
+
+from mechanics.animation import Animator
+from mechanics.simulation import ManualClock, SimulationContext, use_context
+from mechanics.terrain import Terrain
+from game.animators import DodgerGameAnimator, BasketballGameAnimator
+
+"""
+Runs games without a terminal against a manual clock and a seeded random number generator.
+
+Every sleep in the game loop advances the manual clock instead of waiting, so a match is
+fast-forwarded, and the same seed and key policy always reproduce the same match.
+"""
+
+KeyPolicy = Callable[[int], Optional[str]]
+
+
+class IdleKeyPolicy:
+
+    def __call__(self, tick: int) -> Optional[str]:
+        return None
+
+
+class RandomKeyPolicy:
+
+    def __init__(self, keys: Iterable[str] = ("w", "a", "s", "d"), seed: Optional[int] = None,
+                 press_probability: float = 0.5):
+        self._keys = list(keys)
+        self._random = random.Random(seed)
+        self._press_probability = press_probability
+
+    def __call__(self, tick: int) -> Optional[str]:
+        if self._random.random() < self._press_probability:
+            return self._random.choice(self._keys)
+        return None
+
+
+class ScriptedKeyPolicy:
+
+    """Presses the keys of a script one per tick, in order, repeating the script once it ends; '.' means no key."""
+
+    def __init__(self, script: Iterable[str], idle_key: str = "."):
+        self._keys = itertools.cycle(list(script) or [idle_key])
+        self._idle_key = idle_key
+
+    def __call__(self, tick: int) -> Optional[str]:
+        key = next(self._keys)
+        return None if key == self._idle_key else key
+
+
+class HeadlessRunner:
+
+    def __init__(self, animator: Animator, clock: ManualClock, key_policy: KeyPolicy, max_time: float):
+        self._animator = animator
+        self._clock = clock
+        self._key_policy = key_policy
+        self._max_time = max_time
+        self._start_time = clock.now()
+        self._last_frame_time: Optional[float] = None
+        self._frame_times: list[float] = []
+        self._ticks = 0
+        self._timed_out = False
+
+    @property
+    def ticks(self) -> int:
+        return self._ticks
+
+    @property
+    def timed_out(self) -> bool:
+        return self._timed_out
+
+    @property
+    def frame_times(self) -> list[float]:
+        return self._frame_times
+
+    def present(self, terrain: Terrain):
+        # Called once per tick by the game loop, in place of drawing to the terminal
+        frame_time = time.perf_counter()
+        if self._last_frame_time is not None:
+            self._frame_times.append(frame_time - self._last_frame_time)
+        self._last_frame_time = frame_time
+        self._animator.handle_key(self._key_policy(self._ticks))
+        self._ticks += 1
+        if self._clock.now() - self._start_time >= self._max_time:
+            self._timed_out = True
+            self._animator.stop()
+
+    def run(self):
+        self._animator.set_io(key_source=lambda: None, presenter=self.present,
+                              exit_handler=self._animator.stop, threaded_tasks=False)
+        self._animator.run_headless()
+
+    def get_frame_statistics(self) -> dict[str, float]:
+        if not self._frame_times:
+            return {}
+        frame_times = sorted(self._frame_times)
+        return {
+            "frame_time_mean": mean(frame_times),
+            "frame_time_p95": frame_times[int(len(frame_times) * 0.95)],
+            "frame_time_max": frame_times[-1],
+        }
+
+
+def run_headless(animator_class: type[Animator], seed: int = 0, key_policy: Optional[KeyPolicy] = None,
+                 max_time: float = 120, animator_kwargs: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+    clock = ManualClock()
+    with use_context(SimulationContext(clock, seed)), redirect_stdout(io.StringIO()):
+        real_start_time = time.perf_counter()
+        animator = animator_class(**(animator_kwargs or {}))
+        runner = HeadlessRunner(animator, clock, key_policy or IdleKeyPolicy(), max_time)
+        runner.run()
+        real_duration = time.perf_counter() - real_start_time
+    result = {
+        "game": animator_class.__name__,
+        "seed": seed,
+        "simulated_time": clock.now(),
+        "real_time": real_duration,
+        "ticks": runner.ticks,
+        "timed_out": runner.timed_out,
+    }
+    if isinstance(animator, DodgerGameAnimator):
+        result.update({
+            "won": animator.game_won,
+            "survival_time": animator.survival_time,
+            "damage_taken": animator.starting_player_health - animator.player_health,
+        })
+    elif isinstance(animator, BasketballGameAnimator):
+        result.update({
+            "won": animator.hoop_scored,
+            "score": int(animator.hoop_scored),
+            "shots_taken": animator.shots_taken,
+        })
+    result.update(runner.get_frame_statistics())
+    return result
+
+
+if __name__ == "__main__":
+    print(run_headless(DodgerGameAnimator, seed=1, key_policy=RandomKeyPolicy(seed=1)))
@@ -0,0 +1,103 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from getkey import getkey
+
+from mechanics.animation import Animator
+from mechanics.rendering import KeyForwarder, run_separated
+
+
+class Scene:
+
+    def __init__(self, name: str, animator_class: type[Animator], next_scene: Optional[str] = None):
+        self._name = name
+        self._animator_class = animator_class
+        self._next_scene = next_scene
+
+    def __repr__(self) -> str:
+        return f"Scene({self._name!r}, {self._animator_class.__name__}, next_scene={self._next_scene!r})"
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def next_scene(self) -> Optional[str]:
+        return self._next_scene
+
+    def create_animator(self) -> Animator:
+        animator = self._animator_class()
+        animator.warm()
+        return animator
+
+
+class SceneGraph:
+
+    def __init__(self, scenes: list[Scene], start: str):
+        self._scenes = {scene.name: scene for scene in scenes}
+        assert start in self._scenes, f"Unknown starting scene {start!r}"
+        for scene in scenes:
+            assert scene.next_scene is None or scene.next_scene in self._scenes, \
+                f"Scene {scene.name!r} leads to unknown scene {scene.next_scene!r}"
+        self._start = start
+
+    def __getitem__(self, name: str) -> Scene:
+        return self._scenes[name]
+
+    @property
+    def start(self) -> Scene:
+        return self._scenes[self._start]
+
+    def get_next(self, scene: Scene) -> Optional[Scene]:
+        return None if scene.next_scene is None else self._scenes[scene.next_scene]
+
+
+class SceneManager:
+
+    """
+    Runs the scenes of a scene graph one after another without recursion.
+
+    While a scene plays, the animator of the scene after it is constructed and warmed
+    on a worker thread, so that loading its terrain and sprites does not delay the transition.
+    With separate_processes, each scene is simulated and rendered in two processes of its own,
+    and the simulation process builds the scene's animator, so nothing is preloaded.
+    """
+
+    def __init__(self, scene_graph: SceneGraph, preload: bool = True, separate_processes: bool = False):
+        self._scene_graph = scene_graph
+        self._preload = preload
+        self._separate_processes = separate_processes
+        self._key_forwarder = KeyForwarder(getkey) if separate_processes else None
+        self._current_scene: Optional[Scene] = None
+
+    @property
+    def current_scene(self) -> Optional[Scene]:
+        return self._current_scene
+
+    def run(self):
+        if self._separate_processes:
+            self._run_separated()
+            return
+        scene = self._scene_graph.start
+        animator = scene.create_animator()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="scene-preload") as executor:
+            while scene is not None:
+                self._current_scene = scene
+                next_scene = self._scene_graph.get_next(scene)
+                preloaded_animator: Optional[Future] = None
+                if next_scene is not None and self._preload:
+                    preloaded_animator = executor.submit(next_scene.create_animator)
+                animator.run()
+                animator.wait()
+                if next_scene is not None:
+                    animator = preloaded_animator.result() if preloaded_animator else next_scene.create_animator()
+                scene = next_scene
+        self._current_scene = None
+
+    def _run_separated(self):
+        scene = self._scene_graph.start
+        while scene is not None:
+            self._current_scene = scene
+            run_separated(scene.create_animator, self._key_forwarder)
+            scene = self._scene_graph.get_next(scene)
+        self._current_scene = None
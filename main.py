@@ -1,6 +1,8 @@
 import os
+import argparse
 
-from game.animators import animators, terminal_output
+from game.animators import scene_graph, terminal_output
+from game.scenes import SceneManager
 
 
 os.chdir(os.path.realpath(os.path.dirname(__file__)))
@@ -8,11 +10,11 @@ os.chdir(os.path.realpath(os.path.dirname(__file__)))
 
 @terminal_output
 def main():
-    animator = next(animators)()
-    animator.run()
-    while animator.running:
-        pass
-    main()
+    parser = argparse.ArgumentParser(description="Play the ASCII animation games.")
+    parser.add_argument("--processes", action="store_true",
+                        help="simulate and render each game in separate processes")
+    arguments = parser.parse_args()
+    SceneManager(scene_graph, separate_processes=arguments.processes).run()
 
 
 if __name__ == "__main__":
@@ -1,29 +1,46 @@
 import os
 import signal
-import time
 import threading
 from typing import Callable, Optional
 
 from getkey import getkey, keys
 
 from mechanics.movement.position import Position
-from mechanics.movement.vectors import Vector, UnitVector, VectorStream
+from mechanics.movement.inputs import InputEventQueue, InputPolicy
+from mechanics.movement.vectors import Vector, UnitVector
+from mechanics.simulation import perf_counter, sleep
 from mechanics.sprites.gamesprites import PlayerSprite
 from mechanics.terrain import Terrain
 
 
 class Animator:
 
-    def __init__(self, terrain: Terrain):
-        self._vector_stream = VectorStream()
+    def __init__(self, terrain: Terrain, input_policy: InputPolicy = InputPolicy.APPLY_ALL):
+        self._input_queue = InputEventQueue(policy=input_policy)
         self._player_sprite = terrain.player_sprite
         self._terrain = terrain
         self._terrain_thread_function = self.terrain_output
         self._player_thread_function = self.player_movement_input
         self._terrain_thread = None
         self._player_thread = None
+        self._key_source: Callable[[], str | None] = getkey
+        self._presenter: Callable[[Terrain], None] = Animator.print_terrain
+        self._exit_handler: Callable[[], None] = Animator.terminate
+        self._threaded_tasks = True
+        self._running = True
         self._time_elapsed = float()
 
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def terrain(self) -> Terrain:
+        return self._terrain
+
+    def stop(self):
+        self._running = False
+
     @staticmethod
     def hide_cursor():
         print('\033[?25l')
@@ -33,56 +50,111 @@ class Animator:
         print("\033[?25h")
 
     @staticmethod
-    def exit():
+    def terminate():
         Animator.unhide_cursor()
         os.kill(os.getpid(), signal.SIGTERM)
 
+    def exit(self):
+        self._exit_handler()
+
+    @staticmethod
+    def print_terrain(terrain: Terrain):
+        os.system("clear")
+        print(terrain)
+
+    def present(self):
+        self._presenter(self._terrain)
+
+    def read_key(self) -> str | None:
+        # May return None when the key source has nothing to deliver; animators treat that as no key
+        return self._key_source()
+
+    def start_task(self, target: Callable, *args):
+        # Headless runs call tasks in place so that they happen at a deterministic point in the tick
+        if self._threaded_tasks:
+            threading.Thread(target=target, args=args).start()
+        else:
+            target(*args)
+
     def update_terrain(self):
+        self._terrain.apply_commands()
         self._terrain.update_sprites(self._time_elapsed)
-        self._terrain.move_timed_sprites(time.perf_counter())
+        self._terrain.move_timed_sprites(perf_counter())
         self._terrain.draw_sprites()
-        self._terrain.move_player_sprite(self._vector_stream.get_vector())
+        for vector in self._input_queue.drain_vectors():
+            self._terrain.move_player_sprite(vector)
         self._terrain.draw_player_sprite()
         self._terrain.sleep_updateable_sprites()
 
     def terrain_output(self):
         self.hide_cursor()
-        start_time = time.perf_counter()
-        while 1:
-            self._time_elapsed = time.perf_counter() - start_time
+        start_time = perf_counter()
+        while self._running:
+            self._time_elapsed = perf_counter() - start_time
             self.update_terrain()
-            os.system("clear")
-            print(self._terrain)
-            self._vector_stream.reset()
+            self.present()
+            self._input_queue.record_display()
             self._terrain.reset()
-            time.sleep(0.1)
+            sleep(0.1)
+
+    def handle_key(self, key: str | None):
+        match key:
+            case keys.UP | "w":
+                vector = UnitVector.UP
+            case keys.DOWN | "s":
+                vector = UnitVector.DOWN
+            case keys.RIGHT | "d":
+                vector = UnitVector.RIGHT * 2
+            case keys.LEFT | "a":
+                vector = UnitVector.LEFT * 2
+            case _:
+                vector = Vector.ZERO
+        self._input_queue.push(vector)
 
     def player_movement_input(self):
-        while 1:
-            match getkey():
-                case keys.UP | "w":
-                    vector = UnitVector.UP
-                case keys.DOWN | "s":
-                    vector = UnitVector.DOWN
-                case keys.RIGHT | "d":
-                    vector = UnitVector.RIGHT * 2
-                case keys.LEFT | "a":
-                    vector = UnitVector.LEFT * 2
-                case _:
-                    vector = Vector.ZERO
-            self._vector_stream.set_vector(vector)
+        while self._running:
+            self.handle_key(self.read_key())
+
+    def set_io(self, key_source: Optional[Callable[[], str | None]] = None,
+               presenter: Optional[Callable[[Terrain], None]] = None,
+               exit_handler: Optional[Callable[[], None]] = None,
+               threaded_tasks: Optional[bool] = None):
+        self._key_source = key_source or self._key_source
+        self._presenter = presenter or self._presenter
+        self._exit_handler = exit_handler or self._exit_handler
+        if threaded_tasks is not None:
+            self._threaded_tasks = threaded_tasks
 
     def set_threads(self, player_thread: Optional[Callable] = None, terrain_thread: Optional[Callable] = None):
         self._player_thread_function = player_thread or self._player_thread_function
         self._terrain_thread_function = terrain_thread or self._terrain_thread_function
 
+    def warm(self):
+        # Exercises drawing and serialisation once so the first frame is not the slowest
+        self._terrain.draw_sprites()
+        self._terrain.draw_player_sprite()
+        str(self._terrain)
+        self._terrain.reset()
+
     def run(self):
+        # The animator may have been constructed well before it runs (e.g. when preloaded)
+        self._terrain.reset_timers()
         self._terrain_thread = threading.Thread(target=self._terrain_thread_function)
         self._player_thread = threading.Thread(target=self._player_thread_function)
 
         self._terrain_thread.start()
         self._player_thread.start()
 
+    def run_headless(self):
+        # Runs the terrain loop on the calling thread; input comes from handle_key rather than the player thread
+        self._terrain.reset_timers()
+        self._terrain_thread_function()
+
+    def wait(self):
+        # Only the terrain thread is joined: the player thread may be blocked waiting for a key
+        if self._terrain_thread is not None:
+            self._terrain_thread.join()
+
 
 if __name__ == "__main__":
     ps = PlayerSprite([["/", "–", "\\"], ["|", "0", "|"], ["\\", "–", "/"]], Position(0, 12))
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+from enum import Enum
+from statistics import mean
+
+from mechanics.movement.vectors import Vector
+
+
+class InputPolicy(Enum):
+    APPLY_ALL = 1  # Every queued vector is applied as its own movement
+    COALESCE = 2  # Queued vectors are summed into one net movement
+    LATEST = 3  # Only the most recent vector is applied
+
+
+class InputEvent:
+
+    __slots__ = ("_vector", "_timestamp", "_drained_at")
+
+    def __init__(self, vector: Vector, timestamp: float):
+        self._vector = vector
+        self._timestamp = timestamp
+        self._drained_at = None
+
+    def __repr__(self) -> str:
+        return f"InputEvent({self._vector!r}, timestamp={self._timestamp})"
+
+    @property
+    def vector(self) -> Vector:
+        return self._vector
+
+    @property
+    def timestamp(self) -> float:
+        return self._timestamp
+
+    @property
+    def drained_at(self) -> float | None:
+        return self._drained_at
+
+    @drained_at.setter
+    def drained_at(self, value: float):
+        self._drained_at = value
+
+
+class InputEventQueue:
+
+    """
+    A bounded, thread-safe ring buffer of timestamped input events.
+
+    The input thread pushes events as keys are pressed, and the simulation drains
+    every queued event once per tick. Once the drained frame has been displayed,
+    ``record_display`` stores the input-to-display latency of each drained event.
+    When the buffer is full the oldest event is dropped.
+    """
+
+    def __init__(self, capacity: int = 64, policy: InputPolicy = InputPolicy.APPLY_ALL,
+                 latency_history: int = 256):
+        assert capacity > 0, "The queue must be able to hold at least one event"
+        self._events: deque[InputEvent] = deque(maxlen=capacity)
+        self._awaiting_display: list[InputEvent] = []
+        self._latencies: deque[float] = deque(maxlen=latency_history)
+        self._policy = policy
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    @property
+    def policy(self) -> InputPolicy:
+        return self._policy
+
+    @policy.setter
+    def policy(self, value: InputPolicy):
+        self._policy = value
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    @property
+    def latencies(self) -> list[float]:
+        return list(self._latencies)
+
+    def push(self, vector: Vector):
+        if vector == Vector.ZERO:
+            return
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self._dropped += 1
+            self._events.append(InputEvent(vector, time.perf_counter()))
+
+    def drain(self) -> list[InputEvent]:
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        drain_time = time.perf_counter()
+        for event in events:
+            event.drained_at = drain_time
+        self._awaiting_display.extend(events)
+        return events
+
+    def drain_vectors(self) -> list[Vector]:
+        vectors = [event.vector for event in self.drain()]
+        if not vectors:
+            return []
+        match self._policy:
+            case InputPolicy.APPLY_ALL:
+                return vectors
+            case InputPolicy.COALESCE:
+                net_vector = sum(vectors[1:], start=vectors[0])
+                return [] if net_vector == Vector.ZERO else [net_vector]
+            case InputPolicy.LATEST:
+                return vectors[-1:]
+
+    def record_display(self):
+        display_time = time.perf_counter()
+        for event in self._awaiting_display:
+            self._latencies.append(display_time - event.timestamp)
+        self._awaiting_display.clear()
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+        self._awaiting_display.clear()
+
+    def get_latency_statistics(self) -> dict[str, float]:
+        latencies = self.latencies
+        if not latencies:
+            return {}
+        return {"mean": mean(latencies), "min": min(latencies), "max": max(latencies)}
@@ -68,19 +68,4 @@ class UnitVector(Vector):
                 return cls.RIGHT
 
 
-class VectorStream:
-
-    def __init__(self):
-        self._state = Vector.ZERO
-
-    def get_vector(self):
-        return self._state
-
-    def set_vector(self, vector: Vector):
-        self._state = vector
-
-    def reset(self):
-        self._state = Vector.ZERO
-
-
 Vector.ZERO = Vector(0, 0)
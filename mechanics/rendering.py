@@ -0,0 +1,285 @@
+import sys
+import time
+import threading
+import multiprocessing
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.synchronize import Event
+from typing import Callable, Optional, TextIO
+
+from colorama import Style
+from getkey import getkey
+
+from mechanics.constants import BLANK_CHARACTERS, NO_DATA_REPLACEMENT
+from mechanics.animation import Animator
+from mechanics.terrain import Terrain
+from text.colours import FORE_COLOUR_CODES, BACK_COLOUR_CODES, FORE_COLOUR_INDICES, BACK_COLOUR_INDICES
+
+"""
+Process-separated simulation and rendering.
+
+The simulation process writes every finished frame into one half of a shared memory
+double buffer, and the renderer process diffs the other half against the last frame it
+drew. Frames are never pickled; only key presses cross the process boundary through a queue.
+
+The processes are started by a fork server rather than forked from the game, whose threads
+(preloading the next scene, reading keys) may hold locks which a forked child would inherit
+held. The simulation therefore builds its animator itself, from a picklable factory.
+"""
+
+Frame = tuple[int, memoryview, bytes, bytes]
+
+_HEADER_FIELDS = 4  # published frame number, sequence of buffer 0, sequence of buffer 1, finished
+_HEADER_SIZE = _HEADER_FIELDS * 8
+_PUBLISHED, _FINISHED = 0, 3
+_BLANK_GLYPHS = frozenset(map(ord, BLANK_CHARACTERS))
+
+
+class SharedFrameBuffer:
+
+    """
+    A double buffer of glyph and colour planes held in shared memory.
+
+    Frame n is written into buffer n % 2, so the buffer being written is never the one most
+    recently published. Each buffer also has a sequence number which is odd while it is being
+    written; readers retry if the sequence is odd or changes while they copy the planes.
+    """
+
+    def __init__(self, height: int, width: int, name: Optional[str] = None):
+        self._height, self._width = height, width
+        self._cells = height * width
+        self._buffer_size = self._cells * 6  # 4 bytes of glyph, 1 of foreground and 1 of background
+        self._owner = name is None
+        if self._owner:
+            self._memory = SharedMemory(create=True, size=_HEADER_SIZE + 2 * self._buffer_size)
+        else:
+            self._memory = SharedMemory(name=name)
+        # New shared memory is zero-filled, so no frame is published and both sequences are even
+        self._header = self._memory.buf[:_HEADER_SIZE].cast("q")
+        self._planes = [self._get_planes(buffer_index) for buffer_index in range(2)]
+
+    def _get_planes(self, buffer_index: int) -> tuple[memoryview, memoryview, memoryview]:
+        start = _HEADER_SIZE + buffer_index * self._buffer_size
+        glyph_end = start + self._cells * 4
+        fore_end = glyph_end + self._cells
+        return (self._memory.buf[start:glyph_end].cast("I"),
+                self._memory.buf[glyph_end:fore_end],
+                self._memory.buf[fore_end:fore_end + self._cells])
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def frame_number(self) -> int:
+        return self._header[_PUBLISHED]
+
+    @property
+    def finished(self) -> bool:
+        return bool(self._header[_FINISHED])
+
+    def finish(self):
+        self._header[_FINISHED] = 1
+
+    def write_terrain(self, terrain: Terrain):
+        frame_number = self._header[_PUBLISHED] + 1
+        buffer_index = frame_number % 2
+        glyphs, fores, backs = self._planes[buffer_index]
+        self._header[1 + buffer_index] += 1
+        cell = 0
+        for row in terrain.fragments:
+            for fragment in row:
+                modified_character = fragment.modified_character
+                glyphs[cell] = ord(modified_character.character[0])
+                fores[cell] = FORE_COLOUR_INDICES[modified_character.fore_colour]
+                backs[cell] = BACK_COLOUR_INDICES[modified_character.back_colour]
+                cell += 1
+        self._header[1 + buffer_index] += 1
+        self._header[_PUBLISHED] = frame_number
+
+    def read_frame(self) -> Optional[Frame]:
+        frame_number = self._header[_PUBLISHED]
+        if not frame_number:
+            return None
+        buffer_index = frame_number % 2
+        glyphs, fores, backs = self._planes[buffer_index]
+        while 1:
+            sequence = self._header[1 + buffer_index]
+            if sequence % 2 == 0:
+                frame = frame_number, memoryview(glyphs.tobytes()).cast("I"), bytes(fores), bytes(backs)
+                if self._header[1 + buffer_index] == sequence:
+                    return frame
+            # The writer has lapped the reader; take whichever frame is newest now
+            frame_number = self._header[_PUBLISHED]
+            buffer_index = frame_number % 2
+            glyphs, fores, backs = self._planes[buffer_index]
+
+    def close(self):
+        self._header.release()
+        for planes in self._planes:
+            for plane in planes:
+                plane.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+class TerminalFrameRenderer:
+
+    """
+    Writes frames to a terminal, redrawing only the cells which changed since the last frame.
+
+    Frames go to the output stream, or to whatever sys.stdout is at the time if there is none.
+    """
+
+    def __init__(self, height: int, width: int, output: Optional[TextIO] = None):
+        self._height, self._width = height, width
+        self._output = output
+        self._previous: Optional[Frame] = None
+
+    @staticmethod
+    def format_cell(glyph: int, fore: int, back: int) -> str:
+        if glyph in _BLANK_GLYPHS:
+            return NO_DATA_REPLACEMENT
+        return FORE_COLOUR_CODES[fore] + BACK_COLOUR_CODES[back] + chr(glyph) + Style.RESET_ALL
+
+    def render(self, frame: Frame):
+        _, glyphs, fores, backs = frame
+        output = []
+        if self._previous is None:
+            output.append("\033[2J")
+            changed = range(self._height * self._width)
+        else:
+            _, previous_glyphs, previous_fores, previous_backs = self._previous
+            changed = [cell for cell in range(self._height * self._width)
+                       if glyphs[cell] != previous_glyphs[cell] or fores[cell] != previous_fores[cell]
+                       or backs[cell] != previous_backs[cell]]
+        next_cell = None
+        for cell in changed:
+            if cell != next_cell:
+                y, x = divmod(cell, self._width)
+                output.append(f"\033[{y + 1};{x + 1}H")
+            output.append(self.format_cell(glyphs[cell], fores[cell], backs[cell]))
+            # The cursor has moved one cell right, unless it reached the end of the row
+            next_cell = cell + 1 if (cell + 1) % self._width else None
+        if output:
+            stream = self._output or sys.stdout
+            stream.write("".join(output))
+            stream.flush()
+        self._previous = frame
+
+
+def _render_frames(buffer_name: str, height: int, width: int, stop_event: Event, poll_interval: float):
+    frame_buffer = SharedFrameBuffer(height, width, buffer_name)
+    renderer = TerminalFrameRenderer(height, width)
+    last_frame_number = 0
+    try:
+        while not stop_event.is_set():
+            if frame_buffer.frame_number != last_frame_number and (frame := frame_buffer.read_frame()) is not None:
+                renderer.render(frame)
+                last_frame_number = frame[0]
+            else:
+                time.sleep(poll_interval)
+    finally:
+        frame_buffer.close()
+
+
+def _simulate(animator_factory: Callable[[], Animator], connection: Connection, key_queue: Queue):
+    animator = animator_factory()
+    terrain = animator.terrain
+    # The parent process sizes the shared frame buffer from the terrain and sends back its name
+    connection.send((terrain.height, terrain.width))
+    frame_buffer = SharedFrameBuffer(terrain.height, terrain.width, connection.recv())
+    animator.set_io(key_source=key_queue.get, presenter=frame_buffer.write_terrain)
+    animator.run()
+    animator.wait()
+    # The parent process then unblocks the player thread, which is waiting on the key queue
+    frame_buffer.finish()
+    frame_buffer.close()
+
+
+class KeyForwarder:
+
+    """
+    Reads keys on one daemon thread and forwards them to the queue of the current simulation.
+
+    A single forwarder is shared between consecutive simulations so that only one thread ever reads the terminal.
+    """
+
+    def __init__(self, key_source: Callable[[], str]):
+        self._key_source = key_source
+        self._key_queue: Optional[Queue] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def attach(self, key_queue: Optional[Queue]):
+        self._key_queue = key_queue
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._forward_keys, daemon=True)
+            self._thread.start()
+
+    def _forward_keys(self):
+        while 1:
+            key = self._key_source()
+            if (key_queue := self._key_queue) is not None:
+                key_queue.put(key)
+
+
+def _receive_terrain_size(connection: Connection, simulation: BaseProcess) -> Optional[tuple[int, int]]:
+    # None if the simulation ends before its animator is built
+    while not connection.poll(0.1):
+        if not simulation.is_alive():
+            return None
+    return connection.recv()
+
+
+def run_separated(animator_factory: Callable[[], Animator], key_forwarder: Optional[KeyForwarder] = None,
+                  poll_interval: float = 0.002):
+    """
+    Runs the simulation of the animator made by animator_factory, and its terminal rendering,
+    in two separate processes. The factory is pickled, e.g. Scene.create_animator.
+
+    Keys are read in this process and forwarded to the simulation. If the simulation process
+    ends the program through Animator.exit, this process exits as well.
+    """
+    context = multiprocessing.get_context("forkserver")
+    key_queue = context.Queue()
+    stop_event = context.Event()
+    connection, child_connection = context.Pipe()
+    simulation = context.Process(target=_simulate, args=(animator_factory, child_connection, key_queue),
+                                 name="simulation")
+    key_forwarder = key_forwarder or KeyForwarder(getkey)
+    simulation.start()
+    key_forwarder.attach(key_queue)
+    frame_buffer = renderer = None
+    unblocked = False
+    try:
+        if (terrain_size := _receive_terrain_size(connection, simulation)) is not None:
+            frame_buffer = SharedFrameBuffer(*terrain_size)
+            renderer = context.Process(target=_render_frames, name="renderer",
+                                       args=(frame_buffer.name, *terrain_size, stop_event, poll_interval))
+            renderer.start()
+            connection.send(frame_buffer.name)
+        while simulation.is_alive():
+            if frame_buffer is not None and frame_buffer.finished and not unblocked:
+                key_queue.put(None)
+                unblocked = True
+            simulation.join(timeout=0.1)
+    finally:
+        key_forwarder.attach(None)
+        stop_event.set()
+        if renderer is not None:
+            renderer.join()
+        if frame_buffer is not None:
+            frame_buffer.close()
+    if simulation.exitcode != 0:
+        Animator.terminate()
@@ -0,0 +1,116 @@
+import time
+import random
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+"""
+The clock and random number generator shared by the mechanics and the games.
+
+Everything which measures time or makes a random choice goes through the current
+simulation context, so a game can be run against a manual clock and a seeded
+generator: faster than real time, and reproducibly.
+"""
+
+
+class Clock(ABC):
+
+    @abstractmethod
+    def now(self) -> float:
+        pass
+
+    @abstractmethod
+    def sleep(self, seconds: float):
+        pass
+
+
+class RealTimeClock(Clock):
+
+    def now(self) -> float:
+        return time.perf_counter()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class ManualClock(Clock):
+
+    """
+    A clock whose time only moves forwards when it is advanced.
+
+    Sleeping on the driver thread (by default, the thread which created the clock) advances
+    the clock immediately. Sleeping on any other thread waits until the driver has advanced
+    the clock far enough.
+    """
+
+    def __init__(self, start: float = 0.0, driver: Optional[threading.Thread] = None):
+        self._time = start
+        self._driver = driver or threading.current_thread()
+        self._condition = threading.Condition()
+
+    def now(self) -> float:
+        return self._time
+
+    def advance(self, seconds: float):
+        with self._condition:
+            self._time += seconds
+            self._condition.notify_all()
+
+    def sleep(self, seconds: float):
+        if threading.current_thread() is self._driver:
+            self.advance(seconds)
+        else:
+            wake_time = self._time + seconds
+            with self._condition:
+                self._condition.wait_for(lambda: self._time >= wake_time)
+
+
+class SimulationContext:
+
+    def __init__(self, clock: Optional[Clock] = None, seed: Optional[int] = None):
+        self._clock = clock or RealTimeClock()
+        self._seed = seed
+        self._random = random.Random(seed)
+
+    @property
+    def clock(self) -> Clock:
+        return self._clock
+
+    @property
+    def seed(self) -> Optional[int]:
+        return self._seed
+
+    @property
+    def random(self) -> random.Random:
+        return self._random
+
+
+# The context is shared by every thread, as an animator's threads all belong to one simulation
+_context = SimulationContext()
+
+
+def get_context() -> SimulationContext:
+    return _context
+
+
+@contextmanager
+def use_context(context: SimulationContext) -> Iterator[SimulationContext]:
+    global _context
+    previous_context, _context = _context, context
+    try:
+        yield context
+    finally:
+        _context = previous_context
+
+
+def perf_counter() -> float:
+    return _context.clock.now()
+
+
+def sleep(seconds: float):
+    _context.clock.sleep(seconds)
+
+
+def get_random() -> random.Random:
+    return _context.random
@@ -1,6 +1,6 @@
-from time import perf_counter
 from typing import Any, Optional, Literal
 
+from mechanics.simulation import perf_counter
 from mechanics.types import CharacterList2D, Numeric
 from mechanics.movement.position import Position
 from mechanics.movement.vectors import Vector
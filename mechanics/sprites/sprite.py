@@ -1,10 +1,10 @@
 import os
-import json
 from typing import Optional
 
 from typing_extensions import Self
 
 from text.character import ModifiedCharacter
+from text.compact import read_grid
 from mechanics.constants import SPRITE_DIR, BLANK_CHARACTERS
 from mechanics.types import CharacterList2D
 from mechanics.movement.position import Position
@@ -21,7 +21,7 @@ class Sprite:
 
     def __init__(self, data: str | CharacterList2D, position: Position):
         if type(data) is str:
-            self._array = json.loads(open(os.path.join(SPRITE_DIR, data)).read())
+            self._array = read_grid(os.path.join(SPRITE_DIR, data))
         else:
             self._array = data
         self._array = [list(map(ModifiedCharacter, row)) for row in self._array]
@@ -1,5 +1,3 @@
-import time
-import threading
 import itertools
 from abc import abstractmethod, ABC
 from typing import Literal
@@ -7,6 +5,7 @@ from typing import Literal
 from mechanics.constants import BLANK_CHARACTER, SENTINEL_CHARACTER, PAUSE_UPDATE_CHARACTERS
 from mechanics.movement.vectors import Numeric
 from mechanics.movement.position import Position
+from mechanics.simulation import perf_counter
 from mechanics.structures.iterators import CoordinateIterator, ValueIteratorList
 from mechanics.sprites.sprite import CharacterList2D, Sprite
 
@@ -87,6 +86,7 @@ class SequentialTextUpdateSprite(UpdateableSprite):
         self._sleep_on_punctuation_character = sleep_at_punctuation_character
         self._sleep_to_do = 0
         self._sleeping = False
+        self._wake_time = 0.0
         self._exhausted = False
         self.set_array_blank()
         super().__init__(self._array, position)
@@ -102,18 +102,17 @@ class SequentialTextUpdateSprite(UpdateableSprite):
     def send_sleep(self, sleep_time: Numeric):
         self._sleep_to_do = sleep_time
 
-    def sleep_thread_function(self):
-        time.sleep(self._sleep_to_do)
-        self._sleep_to_do = 0
-        self._sleeping = False
-        if self._disappear_on_exhaust and self._array_iterator.exhausted:
-            self.set_array_blank()
-
     def do_sleep(self):
-        if self._sleep_to_do:
+        # Sleeping is measured against the simulation clock rather than done on a thread,
+        # so the array is only ever changed by the thread which draws it
+        if self._sleep_to_do and not self._sleeping:
             self._sleeping = True
-            sleep_thread = threading.Thread(target=self.sleep_thread_function)
-            sleep_thread.start()
+            self._wake_time = perf_counter() + self._sleep_to_do
+        elif self._sleeping and perf_counter() >= self._wake_time:
+            self._sleep_to_do = 0
+            self._sleeping = False
+            if self._disappear_on_exhaust and self._array_iterator.exhausted:
+                self.set_array_blank()
 
     def update_array(self):
         if not self._sleeping:
@@ -0,0 +1,89 @@
+import queue
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from mechanics.movement.position import Position
+
+"""
+Commands which mutate a terrain or its sprites from outside the render thread.
+
+Commands are enqueued from any thread and applied by the render thread at a single
+point in each tick, so rendering can iterate over the terrain's sprites without locks.
+"""
+
+
+class TerrainCommand(ABC):
+
+    @abstractmethod
+    def apply(self, terrain: Any):
+        pass
+
+
+class SpawnSpriteCommand(TerrainCommand):
+
+    def __init__(self, sprite: Any):
+        self._sprite = sprite
+
+    def apply(self, terrain: Any):
+        terrain.sprites.append(self._sprite)
+
+
+class RemoveSpriteCommand(TerrainCommand):
+
+    def __init__(self, sprite: Any):
+        self._sprite = sprite
+
+    def apply(self, terrain: Any):
+        if self._sprite in terrain.sprites:
+            terrain.remove_sprite(self._sprite)
+
+
+class SetCellCommand(TerrainCommand):
+
+    def __init__(self, sprite: Any, position: Position, value: Any):
+        self._sprite = sprite
+        self._position = position
+        self._value = value
+
+    def apply(self, terrain: Any):
+        y, x = self._position
+        self._sprite[y][x] = self._value
+
+
+class PaintCommand(TerrainCommand):
+
+    def __init__(self, mapping: Optional[dict] = None, fore_all: str = "", back_all: str = "",
+                 sprite: Optional[Any] = None):
+        self._mapping = mapping
+        self._fore_all = fore_all
+        self._back_all = back_all
+        self._sprite = sprite
+
+    def apply(self, terrain: Any):
+        target = terrain if self._sprite is None else self._sprite
+        target.paint(self._mapping, fore_all=self._fore_all, back_all=self._back_all)
+
+
+class CommandQueue:
+
+    def __init__(self):
+        self._commands: queue.SimpleQueue[TerrainCommand] = queue.SimpleQueue()
+
+    def __len__(self) -> int:
+        return self._commands.qsize()
+
+    def put(self, command: TerrainCommand):
+        self._commands.put(command)
+
+    def apply(self, terrain: Any) -> int:
+        # Only the commands queued before this call are applied,
+        # so a command that enqueues another cannot stall the tick
+        applied = 0
+        for _ in range(self._commands.qsize()):
+            try:
+                command = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            command.apply(terrain)
+            applied += 1
+        return applied
@@ -1,5 +1,4 @@
-import time
-
+from mechanics.simulation import perf_counter
 from mechanics.types import Numeric
 
 
@@ -8,7 +7,7 @@ class Timer:
     def __init__(self, minutes: Numeric = 0, seconds: Numeric = 0):
         assert seconds or minutes
         self.__seconds_to_count = minutes * 60 + seconds + 1
-        self.__start_time = time.perf_counter()
+        self.__start_time = perf_counter()
 
     def __call__(self) -> list[str, str]:
         minutes, seconds = self.get_current_time()
@@ -20,9 +19,9 @@ class Timer:
         return self.__seconds_to_count
 
     def get_current_time(self) -> tuple[int, int]:
-        difference = self.__seconds_to_count - (time.perf_counter() - self.__start_time)
+        difference = self.__seconds_to_count - (perf_counter() - self.__start_time)
         minutes, seconds = divmod(difference, 60)
         return int(minutes), int(seconds)
 
     def reset(self):
-        self.__start_time = time.perf_counter()
+        self.__start_time = perf_counter()
@@ -1,8 +1,8 @@
 import os
-import json
 from typing import Optional, Literal
 
 from text.character import ModifiedCharacter
+from text.compact import read_grid
 from mechanics.constants import BLANK_CHARACTER, NO_DATA_REPLACEMENT, TERRAIN_DIR, BLANK_CHARACTERS
 from mechanics.types import CharacterList2D, Numeric
 from mechanics.movement.vectors import Vector, UnitVectorEnum, UnitVector
@@ -14,7 +14,10 @@ from mechanics.sprites.mixins import (
     HealthMixin, PlayerDamagingSpriteMixin
 )
 from mechanics.sprites.updateablesprite import IntervalFrameUpdateMixin, UpdateableSprite
-from mechanics.sprites.gamesprites import PlayerSprite
+from mechanics.sprites.gamesprites import PlayerSprite, TimerSprite
+from mechanics.structures.commands import (
+    CommandQueue, TerrainCommand, SpawnSpriteCommand, RemoveSpriteCommand, SetCellCommand, PaintCommand
+)
 
 
 # TODO: add a "start" coordinate when entering a terrain; make player's coordinate that
@@ -36,6 +39,10 @@ class TerrainFragment:
         return NO_DATA_REPLACEMENT if str(self._modified_character) in BLANK_CHARACTERS \
             else self._modified_character.coloured()
 
+    @property
+    def modified_character(self) -> ModifiedCharacter:
+        return self._modified_character
+
     @property
     def character(self) -> str:
         return self._modified_character.character
@@ -50,17 +57,20 @@ class Terrain:
     def __init__(self, filename: str, player_sprite: PlayerSprite, uncollidable_characters: Optional[set[str]] = None,
                  ground_characters: Optional[set[str]] = None,
                  player_starting_position: Position = Position.ORIGIN, wall_passing: bool = False):
-        self._initial_array = json.loads(open(os.path.join(TERRAIN_DIR, filename)).read())
+        # Terrain files may be JSON or in the compact grid format
+        self._initial_array = read_grid(os.path.join(TERRAIN_DIR, filename))
         self._initial_array = [list(map(ModifiedCharacter, row)) for row in self._initial_array]
         self._uncollidable_characters = uncollidable_characters or set()
         self._ground_characters = ground_characters or set()
-        self._array = Terrain.parse_terrain(self._initial_array, self._uncollidable_characters)
+        self._parsed_initial_array = Terrain.parse_terrain(self._initial_array, self._uncollidable_characters)
+        self._array = [row.copy() for row in self._parsed_initial_array]
         self._height, self._width = len(self._array), len(self._array[0])
         self._player_sprite = player_sprite
         self._player_starting_position = player_starting_position
         self._wall_passing = wall_passing  # All objects can wall pass
         self._player_sprite_shown = True  # TODO: Make useful
         self._sprites: list[Sprite] = []
+        self._commands = CommandQueue()
 
     def __str__(self) -> str:
         return "\n".join("".join(map(str, row)) for row in self._array)
@@ -81,6 +91,14 @@ class Terrain:
     def sprites(self) -> list[Sprite]:
         return self._sprites
 
+    @property
+    def fragments(self) -> list[list[TerrainFragment]]:
+        return self._array
+
+    @property
+    def commands(self) -> CommandQueue:
+        return self._commands
+
     @staticmethod
     def parse_terrain(terrain: CharacterList2D, uncollidable_characters: set[str]) -> list[list[TerrainFragment]]:
         parsed_terrain = []
@@ -124,6 +142,26 @@ class Terrain:
         sprite.alive = False
         self._sprites.remove(sprite)
 
+    def enqueue(self, command: TerrainCommand):
+        # Thread-safe; the command is applied by the render thread in apply_commands
+        self._commands.put(command)
+
+    def enqueue_spawn(self, sprite: Sprite):
+        self.enqueue(SpawnSpriteCommand(sprite))
+
+    def enqueue_remove(self, sprite: Sprite):
+        self.enqueue(RemoveSpriteCommand(sprite))
+
+    def enqueue_set_cell(self, sprite: Sprite, position: Position, value: str | ModifiedCharacter):
+        self.enqueue(SetCellCommand(sprite, position, value))
+
+    def enqueue_paint(self, mapping: Optional[dict] = None, fore_all: str = "", back_all: str = "",
+                      sprite: Optional[Sprite] = None):
+        self.enqueue(PaintCommand(mapping, fore_all, back_all, sprite))
+
+    def apply_commands(self) -> int:
+        return self._commands.apply(self)
+
     def get_sprite_coverage(self, exclude_sprite: Optional[Sprite] = None) -> set[Position]:
         all_sprites = self._sprites + [self._player_sprite]
         if isinstance(exclude_sprite, Sprite):
@@ -133,7 +171,7 @@ class Terrain:
     def set_position_to(self, position: Position, value: str):
         y, x = position
         self._initial_array[y][x] = ModifiedCharacter(value)
-        self.reset()
+        self.reparse()
 
     def position_outside(self, position: Position) -> bool:
         y, x = position
@@ -220,7 +258,8 @@ class Terrain:
                     sprite.update_array()
 
     def move_timed_sprites(self, time: Numeric):
-        for sprite in self._sprites:
+        # Collisions remove sprites while moving, so iterate over a copy
+        for sprite in self._sprites.copy():
             if isinstance(sprite, TimedPositionMovementMixin):
                 position = sprite.get_position_at_time(time, self._height, self._width)
                 # Make the type-checker happy
@@ -231,6 +270,13 @@ class Terrain:
         for sprite in self._sprites:
             self.draw_sprite(sprite)
 
+    def reset_timers(self):
+        for sprite in self._sprites:
+            if isinstance(sprite, TimedPositionMovementMixin):
+                sprite.reset_start_time()
+            elif isinstance(sprite, TimerSprite):
+                sprite.timer.reset()
+
     def sleep_updateable_sprites(self):
         for sprite in self._sprites:
             if hasattr(sprite, "do_sleep"):
@@ -279,7 +325,12 @@ class Terrain:
             self.remove_sprite(sprite)
 
     def reset(self):
-        self._array = Terrain.parse_terrain(self._initial_array, self._uncollidable_characters)
+        # Fragments are never mutated, only replaced, so the parsed initial rows can be shared between frames
+        self._array = [row.copy() for row in self._parsed_initial_array]
+
+    def reparse(self):
+        self._parsed_initial_array = Terrain.parse_terrain(self._initial_array, self._uncollidable_characters)
+        self.reset()
 
     def paint(self, mapping: Optional[dict] = None, fore_all: str = "", back_all: str = ""):
         assert mapping or fore_all or back_all
@@ -307,7 +358,7 @@ class Terrain:
                                                                   fore_colour_name=foreground_colour.upper(),
                                                                   back_colour_name=background_colour.upper()
                                                                   )
-        self.reset()
+        self.reparse()
 
 
 if __name__ == "__main__":
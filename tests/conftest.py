@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The game's packages are imported from the project directory, and the editor's modules by
+# their own names from the editor's directory, as its entry points do
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+for directory in (PROJECT_DIRECTORY, os.path.join(PROJECT_DIRECTORY, "ASCII Art Maker")):
+    if directory not in sys.path:
+        sys.path.append(directory)
@@ -0,0 +1,66 @@
+import json
+import zlib
+
+import pytest
+
+from text.compact import MAGIC, VERSION, decode_grids, encode_grids, is_compact, parse_grids, read_grids, \
+    write_grids
+
+GRIDS = [
+    [list("/\\__/\\"), list("|o  o|"), list(" \x1f\x1f\x1f\x1f ")],
+    [["█"] * 40 for _ in range(3)],
+    [["a"]],
+]
+
+
+@pytest.mark.parametrize("compress", (True, False))
+def test_round_trip(compress):
+    data = encode_grids(GRIDS, compress=compress)
+    assert is_compact(data)
+    assert decode_grids(data) == GRIDS
+
+
+def test_round_trip_through_a_file(tmp_path):
+    path = tmp_path / "grids.acg"
+    write_grids(str(path), GRIDS)
+    assert read_grids(str(path)) == GRIDS
+
+
+def test_runs_are_smaller_than_json():
+    grid = [["#"] * 500 for _ in range(200)]
+    assert len(encode_grids([grid], compress=False)) < len(json.dumps(grid)) // 10
+
+
+def test_json_is_parsed_a_grid_per_line():
+    data = "\n".join(json.dumps(grid) for grid in GRIDS).encode()
+    assert not is_compact(data)
+    assert parse_grids(data) == GRIDS
+
+
+@pytest.mark.parametrize("length", (len(MAGIC), len(MAGIC) + 1, len(MAGIC) + 2, len(MAGIC) + 5))
+def test_truncated_data_raises_value_error(length):
+    data = encode_grids(GRIDS, compress=False)
+    with pytest.raises(ValueError, match="corrupt compact grid"):
+        decode_grids(data[:length])
+
+
+def test_corrupt_compressed_body_raises_value_error():
+    data = encode_grids(GRIDS, compress=True)
+    with pytest.raises(ValueError, match="corrupt compact grid"):
+        decode_grids(data[:-8])
+
+
+def test_out_of_range_palette_index_raises_value_error():
+    # One 1x1 grid with one character in its palette, but a run of palette index 5
+    body = bytes([1, 1, 1, 1]) + b"a" + bytes([5, 1])
+    data = MAGIC + bytes([VERSION, 0]) + body
+    with pytest.raises(ValueError, match="corrupt compact grid"):
+        decode_grids(data)
+
+
+def test_short_row_raises_value_error():
+    # One 1x2 grid whose only row has a single character
+    body = bytes([1, 1, 2, 1, 1]) + b"a" + bytes([1, 0, 1])
+    data = MAGIC + bytes([VERSION, 0]) + body
+    with pytest.raises(ValueError, match="corrupt compact grid"):
+        decode_grids(data)
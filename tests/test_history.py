@@ -0,0 +1,117 @@
+import pytest
+
+from constants import ART_BOX_COLOUR, CHARACTER_BOX_COLOUR, NO_DATA
+from boxes import ArtBox, Boxes, CharacterBox
+from history import EditHistory
+
+
+@pytest.fixture
+def boxes() -> Boxes:
+    character_box = CharacterBox("character", 70, 70, 10, 576, 2, 5, 1080, 720, CHARACTER_BOX_COLOUR)
+    art_box = ArtBox("art", 70, 70, 180, 36, 100, 150, 1080, 720, ART_BOX_COLOUR)
+    return Boxes([character_box, art_box])
+
+
+@pytest.fixture
+def history(boxes: Boxes) -> EditHistory:
+    history = EditHistory()
+    history.attach(boxes)
+    return history
+
+
+def get_cells(boxes: Boxes) -> dict:
+    return {box.name: sorted(box.iter_characters()) for box in boxes.boxes}
+
+
+def test_each_commit_is_undone_and_redone_in_one_step(boxes, history):
+    art_box = boxes["art"]
+    states = [get_cells(boxes)]
+    art_box.set_cell(3, 4, "a")
+    art_box.set_cell(5, 4, "b")
+    history.commit()
+    states.append(get_cells(boxes))
+    art_box.set_cell(3, 4, "c")
+    art_box.set_span(90, 140, list("xyz"))
+    history.commit()
+    states.append(get_cells(boxes))
+    assert history.undo() and get_cells(boxes) == states[1]
+    assert history.undo() and get_cells(boxes) == states[0]
+    assert not history.undo()
+    assert history.redo() and get_cells(boxes) == states[1]
+    assert history.redo() and get_cells(boxes) == states[2]
+    assert not history.redo()
+
+
+def test_a_cell_changed_twice_keeps_its_first_old_character(boxes, history):
+    art_box = boxes["art"]
+    art_box.set_cell(0, 0, "a")
+    art_box.set_cell(0, 0, "b")
+    art_box.set_cell(0, 0, "c")
+    history.undo()
+    assert art_box.get_span(0, 0, 1) == [NO_DATA]
+
+
+def test_an_edit_after_undoing_drops_the_redo_steps(boxes, history):
+    art_box = boxes["art"]
+    art_box.set_cell(0, 0, "a")
+    history.commit()
+    history.undo()
+    art_box.set_cell(1, 1, "b")
+    history.commit()
+    assert not history.can_redo
+    assert get_cells(boxes)["art"] == [(1, 1, "b")]
+
+
+def test_a_group_spans_commits(boxes, history):
+    art_box = boxes["art"]
+    history.begin_group()
+    art_box.set_cell(0, 0, "a")
+    history.commit()
+    art_box.set_cell(1, 0, "b")
+    history.end_group()
+    history.undo()
+    assert get_cells(boxes)["art"] == []
+
+
+def test_fills_and_clears_are_undone_and_redone(boxes, history):
+    art_box, character_box = boxes["art"], boxes["character"]
+    art_box.set_cell(10, 10, "a")
+    character_box.set_cell(1, 0, "#")
+    history.commit()
+    art_box.fill_spans([(y, 0, art_box.list_width) for y in range(art_box.list_height)], "~")
+    history.commit()
+    filled = get_cells(boxes)
+    assert len(filled["art"]) == art_box.list_height * art_box.list_width
+    art_box.clear()
+    character_box.clear()
+    history.commit()
+    assert get_cells(boxes) == {"art": [], "character": []}
+    history.undo()
+    assert get_cells(boxes) == filled
+    history.undo()
+    assert get_cells(boxes)["art"] == [(10, 10, "a")]
+    history.redo()
+    history.redo()
+    assert get_cells(boxes) == {"art": [], "character": []}
+
+
+def test_a_clear_is_stored_as_a_span_for_each_row(boxes, history):
+    art_box = boxes["art"]
+    art_box.fill_spans([(y, 0, art_box.list_width) for y in range(art_box.list_height)], "~")
+    history.commit()
+    art_box.clear()
+    history.commit()
+    assert len(history.undo_stack[-1]) == art_box.list_height
+
+
+def test_the_oldest_steps_are_dropped_past_the_limit(boxes):
+    history = EditHistory(max_cells=3)
+    history.attach(boxes)
+    art_box = boxes["art"]
+    for x in range(5):
+        art_box.set_cell(x, 0, "a")
+        history.commit()
+    assert len(history.undo_stack) == 3
+    while history.undo():
+        pass
+    assert get_cells(boxes)["art"] == [(0, 0, "a"), (0, 1, "a")]
@@ -0,0 +1,89 @@
+from constants import NO_DATA
+from journal import EditJournal
+
+
+class FakeBox:
+
+    def __init__(self, name: str, height: int, width: int):
+        self.name = name
+        self.list_height = height
+        self.list_width = width
+        self.rows = [[NO_DATA] * width for _ in range(height)]
+
+    def iter_characters(self):
+        return ((y, x, character) for y, row in enumerate(self.rows) for x, character in enumerate(row)
+                if character != NO_DATA)
+
+    def set_cell(self, journal: EditJournal, x: int, y: int, character: str):
+        journal.cell_changed(self, x, y, self.rows[y][x], character)
+        self.rows[y][x] = character
+
+    def set_span(self, journal: EditJournal, y: int, left: int, characters: list):
+        journal.span_changed(self, y, left, self.rows[y][left:left + len(characters)], characters)
+        self.rows[y][left:left + len(characters)] = characters
+
+
+def start_session(directory, box: FakeBox, **kwargs) -> EditJournal:
+    # As attaching to the boxes does, without the thread, so that flushes happen when the test says
+    journal = EditJournal(str(directory), **kwargs)
+    journal.box_replaced(box)
+    return journal
+
+
+def test_edits_are_recovered_after_a_crash(tmp_path):
+    box = FakeBox("art", 3, 4)
+    journal = start_session(tmp_path, box)
+    box.set_cell(journal, 1, 0, "a")
+    box.set_span(journal, 1, 0, list("bcd"))
+    box.set_span(journal, 2, 0, ["#"] * 4)
+    box.set_cell(journal, 1, 0, NO_DATA)
+    journal.flush()
+    # The editor is killed here, so nothing is closed
+    assert EditJournal(str(tmp_path)).recover() == {"art": box.rows}
+
+
+def test_a_record_cut_short_is_ignored(tmp_path):
+    box = FakeBox("art", 2, 2)
+    journal = start_session(tmp_path, box)
+    box.set_cell(journal, 0, 0, "a")
+    journal.flush()
+    with open(journal.journal_path, "a") as file:
+        file.write('["set", "art", 1, 1, ')
+    assert EditJournal(str(tmp_path)).recover() == {"art": [["a", NO_DATA], [NO_DATA, NO_DATA]]}
+
+
+def test_edits_are_recovered_across_a_compaction(tmp_path):
+    box = FakeBox("art", 2, 3)
+    journal = start_session(tmp_path, box, compaction_threshold=3)
+    for x in range(3):
+        box.set_cell(journal, x, 0, str(x))
+        journal.flush()
+    box.set_cell(journal, 2, 1, "z")
+    journal.flush()
+    assert EditJournal(str(tmp_path)).recover() == {"art": box.rows}
+
+
+def test_nothing_is_recovered_after_quitting(tmp_path):
+    box = FakeBox("art", 2, 2)
+    journal = start_session(tmp_path, box)
+    box.set_cell(journal, 0, 0, "a")
+    journal.close(clean=True)
+    recovering_journal = EditJournal(str(tmp_path))
+    assert recovering_journal.recover() is None
+    # The last session is discarded, so it is not recovered after the next one crashes either
+    assert recovering_journal.recover() is None
+
+
+def test_edits_after_a_save_are_recovered(tmp_path):
+    box = FakeBox("art", 2, 2)
+    journal = start_session(tmp_path, box)
+    box.set_cell(journal, 0, 0, "a")
+    journal.mark_saved()
+    journal.flush()
+    assert EditJournal(str(tmp_path)).recover() is None
+    journal = start_session(tmp_path, box)
+    box.set_cell(journal, 0, 0, "a")
+    journal.mark_saved()
+    box.set_cell(journal, 1, 1, "b")
+    journal.flush()
+    assert EditJournal(str(tmp_path)).recover() == {"art": [["a", NO_DATA], [NO_DATA, "b"]]}
@@ -0,0 +1,59 @@
+import random
+from collections import deque
+
+import pytest
+
+from constants import ART_BOX_COLOUR, NO_DATA
+from boxes import ArtBox
+from canvas import ChunkedCanvas
+from tools import flood_fill_spans
+
+
+def breadth_first_fill(rows: list, x: int, y: int) -> set:
+    # Every cell connected to (x, y) through its four neighbours with the same character
+    target = rows[y][x]
+    filled = {(x, y)}
+    queue = deque(filled)
+    while queue:
+        x, y = queue.popleft()
+        for next_x, next_y in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= next_y < len(rows) and 0 <= next_x < len(rows[0]) and (next_x, next_y) not in filled \
+                    and rows[next_y][next_x] == target:
+                filled.add((next_x, next_y))
+                queue.append((next_x, next_y))
+    return filled
+
+
+def make_art_box(rows: list, chunk_size: int) -> ArtBox:
+    return ArtBox("art", 70, 70, 180, 36, len(rows), len(rows[0]), 1080, 720, ART_BOX_COLOUR,
+                  character_list=ChunkedCanvas.from_list(rows, chunk_size))
+
+
+def get_filled_cells(spans: list) -> list:
+    return [(x, y) for y, left, right in spans for x in range(left, right)]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_flood_fill_matches_a_breadth_first_fill(seed):
+    generator = random.Random(seed)
+    height, width = generator.randint(1, 40), generator.randint(1, 40)
+    characters = generator.choice(((NO_DATA, "#"), (NO_DATA, NO_DATA, NO_DATA, "#"), ("a", "b", NO_DATA)))
+    rows = [[generator.choice(characters) for _ in range(width)] for _ in range(height)]
+    # Small chunks, so that runs cross the edges of chunks and some chunks are missing
+    box = make_art_box(rows, generator.randint(1, 8))
+    x, y = generator.randrange(width), generator.randrange(height)
+    cells = get_filled_cells(flood_fill_spans(box, x, y))
+    assert len(cells) == len(set(cells))
+    assert set(cells) == breadth_first_fill(rows, x, y)
+
+
+def test_flood_fill_of_an_empty_canvas_is_a_span_for_each_row():
+    box = make_art_box([[NO_DATA] * 300 for _ in range(200)], 64)
+    assert sorted(flood_fill_spans(box, 150, 100)) == [(y, 0, 300) for y in range(200)]
+
+
+def test_flood_fill_spans_fill_the_region():
+    rows = [list("..#.."), list(".#.#."), list("..#..")]
+    box = make_art_box(rows, 2)
+    box.fill_spans(flood_fill_spans(box, 0, 0), "~")
+    assert [box.get_span(y, 0, 5) for y in range(3)] == [list("~~#.."), list("~#.#."), list("~~#..")]
@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+from text.compact import COMPACT_EXTENSION, Grid, read_grids, write_grids
+from mechanics.constants import BLANK_CHARACTERS
+
+"""
+Processes many character grid files at once: editor saves, terrains and sprites, in JSON
+or the compact format, without pygame.
+
+Every file is validated and measured, and can also be trimmed of blank borders, have
+characters replaced and be written out in either format. Files are independent, so they
+are spread over a process pool and a JSON line is reported for each, in input order.
+"""
+
+GRID_EXTENSIONS = (".json", "." + COMPACT_EXTENSION)
+# Files kept alongside grids which are not grids themselves
+SKIPPED_FILE_SUFFIXES = (".paint.json", "manifest.json")
+TOP_GLYPH_COUNT = 10
+
+
+class AssetJob:
+
+    __slots__ = ("path", "output_path", "trim", "replacements", "compact", "compress")
+
+    def __init__(self, path: str, output_path: Optional[str], trim: bool, replacements: dict[str, str],
+                 compact: bool, compress: bool):
+        self.path = path
+        self.output_path = output_path
+        self.trim = trim
+        self.replacements = replacements
+        self.compact = compact
+        self.compress = compress
+
+
+def validate_grid(grid: Any) -> list[str]:
+    if not isinstance(grid, list) or not grid or not all(isinstance(row, list) for row in grid):
+        return ["not a non-empty list of rows"]
+    errors = []
+    if len(widths := {len(row) for row in grid}) > 1:
+        errors.append(f"rows have different widths: {sorted(widths)}")
+    if not grid[0]:
+        errors.append("rows are empty")
+    if invalid_cells := sum(not isinstance(cell, str) or len(cell) != 1 for row in grid for cell in row):
+        errors.append(f"{invalid_cells} cells are not single characters")
+    return errors
+
+
+def trim_grid(grid: Grid) -> Grid:
+    # A grid with nothing but blank cells is left as it is rather than emptied
+    filled_rows = [y for y, row in enumerate(grid) if any(cell not in BLANK_CHARACTERS for cell in row)]
+    if not filled_rows:
+        return grid
+    filled_columns = [x for x in range(len(grid[0])) if any(row[x] not in BLANK_CHARACTERS for row in grid)]
+    left, right = filled_columns[0], filled_columns[-1] + 1
+    return [row[left:right] for row in grid[filled_rows[0]:filled_rows[-1] + 1]]
+
+
+def replace_characters(grid: Grid, replacements: dict[str, str]) -> Grid:
+    return [[replacements.get(cell, cell) for cell in row] for row in grid]
+
+
+def get_grid_statistics(grid: Grid) -> dict[str, Any]:
+    glyphs = Counter(cell for row in grid for cell in row)
+    blank_cells = sum(glyphs.pop(character, 0) for character in BLANK_CHARACTERS)
+    return {
+        "height": len(grid),
+        "width": len(grid[0]),
+        "filled_cells": sum(glyphs.values()),
+        "blank_cells": blank_cells,
+        "distinct_glyphs": len(glyphs),
+        "top_glyphs": dict(glyphs.most_common(TOP_GLYPH_COUNT)),
+    }
+
+
+def write_asset(path: str, grids: list[Grid], compact: bool, compress: bool = True):
+    if compact:
+        write_grids(path, grids, compress)
+    else:
+        with open(path, "w") as file:
+            file.write("\n".join(json.dumps(grid) for grid in grids))
+
+
+def process_asset(job: AssetJob) -> dict[str, Any]:
+    result = {"path": job.path, "valid": False}
+    # Corrupt files of either format raise ValueError, and are reported rather than ending the batch
+    try:
+        grids = read_grids(job.path)
+    except (OSError, ValueError) as error:
+        result["errors"] = [str(error)]
+        return result
+    errors = [f"grid {index}: {error}" for index, grid in enumerate(grids) for error in validate_grid(grid)]
+    if not grids:
+        errors.append("no grids")
+    result["valid"] = not errors
+    if errors:
+        result["errors"] = errors
+        return result
+    if job.trim:
+        # The second grid of an editor save is its character box, which keeps its size
+        grids[0] = trim_grid(grids[0])
+    if job.replacements:
+        grids = [replace_characters(grid, job.replacements) for grid in grids]
+    result["grids"] = [get_grid_statistics(grid) for grid in grids]
+    if job.output_path is not None:
+        try:
+            write_asset(job.output_path, grids, job.compact, job.compress)
+        except OSError as error:
+            result["valid"] = False
+            result["errors"] = [f"could not write {job.output_path!r}: {error}"]
+            return result
+        result["output"] = job.output_path
+        result["input_size"], result["output_size"] = os.path.getsize(job.path), os.path.getsize(job.output_path)
+    return result
+
+
+def find_assets(paths: Iterable[str]) -> Iterator[str]:
+    # Directories are expanded to the grid files directly inside them
+    for path in paths:
+        if os.path.isdir(path):
+            for filename in sorted(os.listdir(path)):
+                if filename.endswith(GRID_EXTENSIONS) and not filename.endswith(SKIPPED_FILE_SUFFIXES):
+                    yield os.path.join(path, filename)
+        else:
+            yield path
+
+
+def get_output_path(path: str, output_directory: Optional[str], output_format: str) -> str:
+    name, extension = os.path.splitext(os.path.basename(path))
+    if output_format == "compact":
+        extension = "." + COMPACT_EXTENSION
+    elif output_format == "json":
+        extension = ".json"
+    return os.path.join(output_directory or os.path.dirname(path), name + extension)
+
+
+def create_jobs(arguments: argparse.Namespace) -> Iterator[AssetJob]:
+    replacements = dict(arguments.replace or ())
+    modifying = arguments.trim or replacements or arguments.format != "keep"
+    for path in find_assets(arguments.paths):
+        output_path = None
+        if modifying:
+            output_path = get_output_path(path, arguments.output_dir, arguments.format)
+            if os.path.realpath(output_path) == os.path.realpath(path) and not arguments.in_place:
+                raise ValueError(f"processing {path!r} would overwrite it; pass --in-place or --output-dir")
+        compact = arguments.format == "compact" or arguments.format == "keep" and path.endswith(COMPACT_EXTENSION)
+        yield AssetJob(path, output_path, arguments.trim, replacements, compact, not arguments.no_compress)
+
+
+def write_results(results: Iterable[dict[str, Any]], file: TextIO) -> tuple[int, int]:
+    count = invalid = 0
+    for result in results:
+        file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        count += 1
+        invalid += not result["valid"]
+    file.flush()
+    return count, invalid
+
+
+def parse_replacement(value: str) -> tuple[str, str]:
+    # A character and its replacement, e.g. "—-" or "-=" replaces the first character with the second
+    if len(value) != 2:
+        raise argparse.ArgumentTypeError("expected two characters")
+    return value[0], value[1]
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Validate, measure, trim, re-palette and convert grid files "
+                                                 "in parallel.")
+    parser.add_argument("paths", nargs="+", help="grid files, or directories of them")
+    parser.add_argument("--trim", action="store_true", help="remove blank rows and columns around the art")
+    parser.add_argument("--replace", type=parse_replacement, action="append", metavar="FROMTO",
+                        help="replace one character with another, e.g. --replace '—-'; may be repeated")
+    parser.add_argument("--format", choices=("keep", "json", "compact"), default="keep",
+                        help="format to write files in")
+    parser.add_argument("--no-compress", action="store_true", help="write compact files without zlib compression")
+    parser.add_argument("--output-dir", help="directory to write to; next to each input file if omitted")
+    parser.add_argument("--in-place", action="store_true", help="allow overwriting input files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--report", help="JSONL file to write the report to; standard output if omitted")
+    arguments = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        jobs = list(create_jobs(arguments))
+    except ValueError as error:
+        print(f"error: {error}", file=sys.stderr)
+        sys.exit(2)
+    if arguments.output_dir:
+        os.makedirs(arguments.output_dir, exist_ok=True)
+    chunk_size = max(1, len(jobs) // (arguments.workers * 8))
+    file = open(arguments.report, "w") if arguments.report else sys.stdout
+    try:
+        with ProcessPoolExecutor(max_workers=arguments.workers) as executor:
+            count, invalid = write_results(executor.map(process_asset, jobs, chunksize=chunk_size), file)
+    finally:
+        if file is not sys.stdout:
+            file.close()
+    print(f"Processed {count} files, {invalid} invalid, in {time.perf_counter() - start:.2f}s.", file=sys.stderr)
+    if invalid:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
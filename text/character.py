@@ -38,6 +38,14 @@ class ModifiedCharacter:
     def character(self) -> str:
         return self._character
 
+    @property
+    def fore_colour(self) -> str:
+        return self._fore_colour
+
+    @property
+    def back_colour(self) -> str:
+        return self._back_colour
+
 
 # a = ModifiedCharacter("y", "GREEN", "RED")
 # b = ModifiedCharacter("x")
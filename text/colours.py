@@ -30,6 +30,20 @@ BACK_COLOUR_MAPPING = {
 FORE_COLOUR_MAPPING[""] = ""
 BACK_COLOUR_MAPPING[""] = ""
 
+# Approximate RGB values of the colours in a typical (xterm) terminal, for matching images to them
+COLOUR_RGB_VALUES = {
+    "BLACK": (0, 0, 0), "RED": (205, 0, 0), "GREEN": (0, 205, 0), "YELLOW": (205, 205, 0),
+    "BLUE": (0, 0, 238), "MAGENTA": (205, 0, 205), "CYAN": (0, 205, 205), "WHITE": (229, 229, 229),
+    "LIGHTBLACK": (127, 127, 127), "LIGHTRED": (255, 0, 0), "LIGHTGREEN": (0, 255, 0), "LIGHTYELLOW": (255, 255, 0),
+    "LIGHTBLUE": (92, 92, 255), "LIGHTMAGENTA": (255, 0, 255), "LIGHTCYAN": (0, 255, 255), "LIGHTWHITE": (255, 255, 255),
+}
+
+# Escape codes indexed by small integers, for storing colours in byte planes; index 0 is no colour
+FORE_COLOUR_CODES = ("",) + tuple(sorted(set(FORE_COLOUR_MAPPING.values()) - {""}))
+BACK_COLOUR_CODES = ("",) + tuple(sorted(set(BACK_COLOUR_MAPPING.values()) - {""}))
+FORE_COLOUR_INDICES = {code: index for index, code in enumerate(FORE_COLOUR_CODES)}
+BACK_COLOUR_INDICES = {code: index for index, code in enumerate(BACK_COLOUR_CODES)}
+
 
 def colour_name_to_fore_colour(colour_name: str):
     return FORE_COLOUR_MAPPING[colour_name]
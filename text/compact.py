@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import zlib
+import argparse
+from typing import Iterable, Iterator, Optional
+
+"""
+A compact, versioned file format for grids of characters: terrains, sprites and saved art.
+
+A file starts with a magic number, a version and a flags byte. Its body holds one or
+more grids, each stored as its dimensions, a palette of the distinct characters in it
+and, for every row, runs of (palette index, length). Every integer is an unsigned
+LEB128 varint. When the compressed flag is set, the body is a zlib stream.
+
+Files which do not start with the magic number are read as JSON, one grid per line,
+so every loader can accept both formats. Corrupt or truncated data of either format
+raises ValueError.
+"""
+
+MAGIC = b"ACG"
+VERSION = 1
+COMPRESSED_FLAG = 0b1
+COMPACT_EXTENSION = "acg"
+
+Grid = list[list[str]]
+
+
+def _write_varint(buffer: bytearray, value: int):
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+class _Reader:
+
+    __slots__ = ("data", "offset")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def read_varint(self) -> int:
+        value = shift = 0
+        while True:
+            if self.offset >= len(self.data):
+                raise ValueError("corrupt compact grid: data is truncated")
+            byte = self.data[self.offset]
+            self.offset += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def read_bytes(self, length: int) -> bytes:
+        data = self.data[self.offset:self.offset + length]
+        if len(data) != length:
+            raise ValueError("corrupt compact grid: data is truncated")
+        self.offset += length
+        return data
+
+
+def _encode_grid(buffer: bytearray, grid: Iterable[Iterable[str]]):
+    rows = [list(row) for row in grid]
+    palette: dict[str, int] = {}
+    encoded_rows = []
+    for row in rows:
+        runs = []
+        for character in row:
+            index = palette.setdefault(character, len(palette))
+            if runs and runs[-1][0] == index:
+                runs[-1][1] += 1
+            else:
+                runs.append([index, 1])
+        encoded_rows.append(runs)
+    _write_varint(buffer, len(rows))
+    _write_varint(buffer, len(rows[0]) if rows else 0)
+    _write_varint(buffer, len(palette))
+    for character in palette:
+        encoded_character = character.encode("utf-8")
+        _write_varint(buffer, len(encoded_character))
+        buffer += encoded_character
+    for runs in encoded_rows:
+        _write_varint(buffer, len(runs))
+        for index, length in runs:
+            _write_varint(buffer, index)
+            _write_varint(buffer, length)
+
+
+def _decode_grid(reader: _Reader) -> Grid:
+    height, width = reader.read_varint(), reader.read_varint()
+    palette = [reader.read_bytes(reader.read_varint()).decode("utf-8") for _ in range(reader.read_varint())]
+    grid = []
+    for _ in range(height):
+        row = []
+        for _ in range(reader.read_varint()):
+            index, length = reader.read_varint(), reader.read_varint()
+            # Checked before the run is expanded, as a corrupt length could be enormous
+            if index >= len(palette) or len(row) + length > width:
+                raise ValueError(f"corrupt compact grid: run of {length} of palette index {index} does not fit")
+            row += [palette[index]] * length
+        if len(row) != width:
+            raise ValueError(f"corrupt compact grid: row has {len(row)} characters, expected {width}")
+        grid.append(row)
+    return grid
+
+
+def encode_grids(grids: Iterable[Iterable[Iterable[str]]], compress: bool = True) -> bytes:
+    grids = list(grids)
+    body = bytearray()
+    _write_varint(body, len(grids))
+    for grid in grids:
+        _encode_grid(body, grid)
+    flags = COMPRESSED_FLAG if compress else 0
+    return MAGIC + bytes((VERSION, flags)) + (zlib.compress(body, 9) if compress else bytes(body))
+
+
+def decode_grids(data: bytes) -> list[Grid]:
+    if not is_compact(data):
+        raise ValueError("data is not in the compact grid format")
+    if len(data) < len(MAGIC) + 2:
+        raise ValueError("corrupt compact grid: header is truncated")
+    version, flags = data[len(MAGIC)], data[len(MAGIC) + 1]
+    if version > VERSION:
+        raise ValueError(f"unsupported compact grid version {version}")
+    body = data[len(MAGIC) + 2:]
+    if flags & COMPRESSED_FLAG:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error as error:
+            raise ValueError(f"corrupt compact grid: {error}") from error
+    reader = _Reader(body)
+    return [_decode_grid(reader) for _ in range(reader.read_varint())]
+
+
+def is_compact(data: bytes) -> bool:
+    return data[:len(MAGIC)] == MAGIC
+
+
+def parse_grids(data: bytes) -> list[Grid]:
+    if is_compact(data):
+        return decode_grids(data)
+    return [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+
+
+def read_grids(path: str) -> list[Grid]:
+    with open(path, "rb") as file:
+        return parse_grids(file.read())
+
+
+def read_grid(path: str) -> Grid:
+    return read_grids(path)[0]
+
+
+def write_grids(path: str, grids: Iterable[Iterable[Iterable[str]]], compress: bool = True):
+    with open(path, "wb") as file:
+        file.write(encode_grids(grids, compress))
+
+
+def convert_files(paths: Iterable[str], to_json: bool = False, compress: bool = True,
+                  output_directory: Optional[str] = None) -> Iterator[tuple[str, int, int]]:
+    if output_directory:
+        os.makedirs(output_directory, exist_ok=True)
+    for path in paths:
+        grids = read_grids(path)
+        extension = "json" if to_json else COMPACT_EXTENSION
+        output_path = os.path.join(output_directory or os.path.dirname(path),
+                                   os.path.splitext(os.path.basename(path))[0] + "." + extension)
+        if os.path.realpath(output_path) == os.path.realpath(path):
+            raise ValueError(f"converting {path!r} would overwrite it")
+        if to_json:
+            with open(output_path, "w") as file:
+                file.write("\n".join(json.dumps(grid) for grid in grids))
+        else:
+            write_grids(output_path, grids, compress)
+        yield output_path, os.path.getsize(path), os.path.getsize(output_path)
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Convert character grid files between JSON and the compact format.")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--to-json", action="store_true", help="convert compact files back to JSON")
+    parser.add_argument("--no-compress", action="store_true", help="write the body without zlib compression")
+    parser.add_argument("--output-dir", help="directory to write to; next to each input file if omitted")
+    arguments = parser.parse_args(argv)
+    try:
+        for output_path, input_size, output_size in convert_files(arguments.paths, arguments.to_json,
+                                                                   not arguments.no_compress, arguments.output_dir):
+            print(f"{output_path}: {input_size} -> {output_size} bytes")
+    except (OSError, ValueError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()